@@ -6,7 +6,7 @@ These APIs are memory-free. Therefore, it is suitable for single use.
 """
 import random
 import re
-from typing import List
+from typing import List, Tuple
 
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
@@ -197,36 +197,26 @@ def model_scale(info: List[GameObject], question: str) -> ScaleOperationResponse
 
 
 @log_run_time()
-def sentiment_score(text: str) -> float:
-    system_template = "你的任务：你现在是一个情感分析助手，你将要对所给的文句进行情感分析，从-1到1内的一个浮点数，数字越小代表情感越负面，数字越大代表情感越正面\n输出格式：必须仅返回数字，不要输出多余内容。"
-
-    prompt_template = ChatPromptTemplate.from_messages(
-        [("system", system_template), ("user", "{text}")]
-    )
-
-    result = prompt_template.invoke({"text": text})
-    result.to_messages()
-    response = _model.invoke(result)
-
-    try:
-        return float(response)
-    except Exception:
-        return 0.0
-
-
-@log_run_time()
-def memory_score(text: str) -> float:
-    system_template = "你的任务：你现在是一个文本是否存储为记忆的价值分析助手，你将要对所给的文句进行分析，从-1到1内的一个浮点数，数字越小代表该段文字越没有价值，应该被丢弃，数字越大代表该段文字越有价值，应该被保留\n输出格式：必须仅返回数字，不要输出多余内容。\n"
+def memory_scores(text: str, response: str) -> Tuple[float, float]:
+    """
+    Score a round of the conversation for the intelligent memory, in a single request.
+    :param text: The text of the user.
+    :param response: The response of the bot.
+    :return: The sentiment of the text and the value of the response as a memory, both in [-1, 1].
+    """
+    system_template = "你的任务：你现在是一个对话分析助手，你将要对所给的一轮对话进行两项分析，结果均为从-1到1内的一个浮点数：\n" \
+                      "1. sentiment：用户文句的情感，数字越小代表情感越负面，数字越大代表情感越正面；\n" \
+                      "2. value：回复文句是否存储为记忆的价值，数字越小代表该段文字越没有价值，应该被丢弃，数字越大代表该段文字越有价值，应该被保留。\n" \
+                      "输出格式：必须仅返回JSON {format}，不要输出多余内容。"
 
     prompt_template = ChatPromptTemplate.from_messages(
-        [("system", system_template), ("user", "{text}")]
+        [("system", system_template), ("user", "【用户】{text}\n【回复】{response}")]
     )
 
-    result = prompt_template.invoke({"text": text})
+    result = prompt_template.invoke({"format": {"sentiment": float, "value": float}, "text": text,
+                                     "response": response})
     result.to_messages()
     response = _model.invoke(result)
-
-    try:
-        return float(response)
-    except Exception:
-        return 0.0
+    scores = smart_load_json_like(response.content)
+    return (min(max(float(scores["sentiment"]), -1.), 1.),
+            min(max(float(scores["value"]), -1.), 1.))
@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+
+
+class SentimentConfig(BaseModel):
+    confidence_threshold: float = Field(default=0.5, ge=0, le=1,
+                                        description="The sentiment of a reply is classified locally. "
+                                                    "Below this confidence, the LLM is asked as a fallback (if `llm_fallback` is `True`).")
+    llm_fallback: bool = Field(default=True,
+                               description="Ask the LLM for the sentiment when the local classifier is not confident.")
+    wait_llm_fallback: bool = Field(default=False,
+                                    description="If `True`, the TTS waits for the answer of the LLM fallback. \n"
+                                                "Otherwise, the LLM is asked in the background after the first clause has started, "
+                                                "and its answer only calibrates the local classifier for the following replies.")
+    calibrate: bool = Field(default=True,
+                            description="Calibrate the local classifier with the labels given by the LLM, "
+                                        "which are logged to `label_log` and learned again at startup.")
+    label_log: str = Field(default="",
+                           description="JSON Lines file of the labels given by the LLM. \n"
+                                       "If empty, `.temp/sentiment_labels.jsonl` in the project directory is used.")
@@ -1,11 +1,14 @@
 # See:
 #   https://python.langchain.com/docs/tutorials/agents/
+from typing import List
+
 from injector import inject
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.tools import BaseTool
 from loguru import logger
 from selenium.webdriver import Firefox, Chrome
 
+from agent.intent_router import IntentRouter
 from agent.tool.go_creator import GameObjectCreator
 from agent.tool.lang_changer import LangChanger
 from agent.tool.microphone_tool import MicrophoneTool
@@ -31,6 +34,16 @@ class CustomAgent:
         self._model.bind_tools(tools)
         for tool in tools:
             self._tools[tool.name] = tool
+        self._router = IntentRouter([(tool.name, tool.description) for tool in tools])
+
+    def plausible_tools(self, query: str) -> List[str]:
+        """
+        Names of the tools the query may need, decided locally without the LLM.
+        If it is empty, there is no need to `run` the agent.
+        """
+        tools = self._router.route(query)
+        logger.debug(f"Plausible tools: {tools}")
+        return tools
 
     def run(self, query: str) -> bool:
         messages = [self._model.system_prompt, HumanMessage(query)]
@@ -0,0 +1,72 @@
+"""
+Intent Router
+    Decides locally whether a query may need a tool, so the tool-calling agent (a full LLM round trip)
+    is only asked when one is plausible.
+    A tool is plausible if a keyword rule of the tool matches,
+    or if the character bigrams of the query are similar enough to the description of the tool.
+    The bigrams are weighted by their IDF over the descriptions, so the phrases all the descriptions share
+    (e.g. `使用此工具`) weigh nothing.
+    The router is tuned for recall: a false positive only costs the agent call the router is there to skip.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Tool name => keyword rule
+_RULES: Dict[str, str] = {
+    "百度百科": r"是什么|什么是|介绍一下|科普|百科|查一下|搜一下|搜索|的意思|的定义|原理|\bwhat is\b|\bwho is\b",
+    "萌娘百科": r"萌娘|二次元|动漫|动画|番剧|声优|漫画|角色|galgame",
+    "语言切换": r"(切换|换成|改成|改用|使用|用|说).{0,6}(中文|汉语|英语|英文|日语|日文|语言)|"
+                r"\b(speak|switch to|change to)\b.{0,12}\b(english|chinese|japanese)\b|日本語で|英語で|中国語で",
+    "麦克风控制器": r"(打开|关闭|开启|关掉|关上|静音|开一下|关一下).{0,4}(麦克风|麦|话筒)|"
+                    r"(麦克风|话筒).{0,4}(打开|关闭|开启|关掉|静音)|\b(un)?mute\b|microphone",
+    "游戏对象创建器": r"(创建|生成|放置|放一个|加一个|造一个|添加|\bcreate\b|\bspawn\b).{0,10}"
+                      r"(立方体|方块|球体|球|圆柱|胶囊|平面|物体|对象|\bcube\b|\bsphere\b|\bobject\b)",
+}
+
+
+def _bigrams(text: str) -> Counter:
+    chars = [c for c in text.lower() if not c.isspace() and c.isalnum()]
+    return Counter(chars[i] + chars[i + 1] for i in range(len(chars) - 1))
+
+
+class IntentRouter:
+    def __init__(self, tools: List[Tuple[str, str]], threshold: float = 0.15):
+        """
+        :param tools: Name and description of each tool.
+        :param threshold: Minimum cosine similarity between the query and the description of a tool.
+        """
+        self.threshold = threshold
+        self._rules = {name: re.compile(_RULES[name], re.IGNORECASE) for name, _ in tools if name in _RULES}
+        documents = {name: _bigrams(f"{name} {description}") for name, description in tools}
+        # Bigrams in every description have an IDF of 0
+        document_frequency = Counter(bigram for bigrams in documents.values() for bigram in bigrams)
+        self._idf = {bigram: math.log(len(documents) / df) for bigram, df in document_frequency.items()}
+        self._max_idf = math.log(len(documents)) if len(documents) > 1 else 1.
+        self._vectors: Dict[str, Tuple[Dict[str, float], float]] = {}
+        for name, bigrams in documents.items():
+            vector = {bigram: count * self._idf[bigram] for bigram, count in bigrams.items() if self._idf[bigram] > 0}
+            self._vectors[name] = (vector, math.sqrt(sum(w * w for w in vector.values())))
+
+    def route(self, query: str) -> List[str]:
+        """
+        :param query: The text of the user.
+        :return: Names of the plausible tools, the most plausible first. Empty if no tool is needed.
+        """
+        scores: Dict[str, float] = {}
+        for name, rule in self._rules.items():
+            if rule.search(query):
+                scores[name] = 1.
+        bigrams = _bigrams(query)
+        # A bigram in no description is as rare as it gets, it only lowers the similarity
+        query_vector = {bigram: count * self._idf.get(bigram, self._max_idf) for bigram, count in bigrams.items()}
+        query_norm = math.sqrt(sum(w * w for w in query_vector.values()))
+        if query_norm > 0:
+            for name, (vector, norm) in self._vectors.items():
+                if norm == 0:
+                    continue
+                similarity = sum(w * vector.get(bigram, 0.) for bigram, w in query_vector.items()) / (norm * query_norm)
+                if similarity >= self.threshold:
+                    scores[name] = max(scores.get(name, 0.), similarity)
+        return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,199 @@
+"""
+Sentiment Classifier
+    Picks the sentiment of the TTS prompt locally, in microseconds, instead of an extra LLM round trip per reply.
+    The labels are the sentiments of the TTS prompt files, which are arbitrary words in any language,
+    so each label is mapped to a canonical emotion by its name (e.g. `开心`, `happy` and `嬉しい` are all joy),
+    and the text is scored by the cue words, emoticons and emojis of the emotions, and by the label itself.
+    The labels the LLM gave when the local prediction was not confident are logged, and calibrate the classifier:
+    the character bigrams and words typical of a label add to its score.
+"""
+import json
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from loguru import logger
+
+# Emotion => (names of the labels, cues in the text)
+_LEXICON: Dict[str, Tuple[List[str], List[str]]] = {
+    "joy": (["开心", "高兴", "快乐", "喜悦", "愉快", "兴奋", "happy", "joy", "glad", "excited", "cheerful",
+             "嬉しい", "楽しい", "喜び"],
+            ["开心", "高兴", "太好了", "哈哈", "嘻嘻", "好耶", "喜欢", "真棒", "快乐", "谢谢", "happy", "glad", "great",
+             "awesome", "yay", "haha", "love", "nice", "wonderful", "嬉しい", "楽しい", "やった", "最高", "わーい",
+             "😀", "😃", "😄", "😁", "😆", "😊", "🥰", "😍", "🎉", "✨", "^_^", ":)", "(^^)"]),
+    "sadness": (["难过", "伤心", "悲伤", "哀伤", "失落", "委屈", "sad", "sadness", "sorrow", "upset", "悲しい",
+                 "寂しい", "悲しみ"],
+                ["难过", "伤心", "呜呜", "哭", "可惜", "唉", "遗憾", "对不起", "抱歉", "sad", "sorry", "unfortunately",
+                 "cry", "miss you", "悲しい", "寂しい", "残念", "ごめん", "😢", "😭", "😞", "😔", "🥺", "T_T", "QAQ"]),
+    "anger": (["生气", "愤怒", "恼火", "angry", "anger", "mad", "怒り", "怒る"],
+              ["生气", "气死", "可恶", "讨厌", "哼", "闭嘴", "混蛋", "angry", "hate", "damn", "stupid", "annoying",
+               "ムカつく", "うるさい", "バカ", "😠", "😡", "🤬"]),
+    "fear": (["害怕", "恐惧", "紧张", "焦虑", "担心", "fear", "scared", "anxiety", "anxious", "nervous", "怖い",
+              "不安"],
+             ["害怕", "可怕", "吓", "恐怖", "担心", "紧张", "救命", "scared", "afraid", "terrified", "worried", "help",
+              "怖い", "不安", "助けて", "😨", "😰", "😱"]),
+    "surprise": (["惊讶", "吃惊", "震惊", "surprise", "surprised", "shocked", "驚き", "びっくり"],
+                 ["哇", "天哪", "居然", "竟然", "真的吗", "wow", "whoa", "really?", "omg", "えっ", "まさか", "びっくり",
+                  "すごい", "😮", "😲", "😯", "🤯", "?!", "？！", "!?", "！？"]),
+    "shy": (["害羞", "羞涩", "不好意思", "shy", "embarrassed", "恥ずかしい", "羞恥", "照れ"],
+            ["害羞", "脸红", "不好意思", "羞", "人家", "shy", "embarrass", "blush", "恥ずかし", "照れ", "😳", "☺️"]),
+    "disgust": (["厌恶", "恶心", "嫌弃", "disgust", "disgusted", "嫌悪"],
+                ["恶心", "嫌弃", "呕", "gross", "disgusting", "ew", "気持ち悪い", "キモい", "🤢", "🤮"]),
+}
+# Names of the neutral labels, which win when nothing else is found
+_NEUTRAL_NAMES = ["default", "normal", "neutral", "calm", "默认", "正常", "平静", "普通", "通常"]
+
+_CUE_WEIGHT = 2.0
+_LABEL_WEIGHT = 3.0
+_NEUTRAL_PRIOR = 1.0
+_WORD = re.compile(r"[a-z']+")
+
+
+def _cue_regex(cue: str) -> str:
+    # English words must not match inside other words, e.g. `ew` in `new`
+    regex = re.escape(cue)
+    if cue[0].isascii() and cue[0].isalpha():
+        regex = r"(?<![a-z])" + regex
+    if cue[-1].isascii() and cue[-1].isalpha():
+        regex += r"(?![a-z])"
+    return regex
+
+
+def _features(text: str) -> set[str]:
+    # Character bigrams for Chinese and Japanese, words for English
+    text = text.lower()
+    chars = [c for c in text if not c.isspace()]
+    features = {chars[i] + chars[i + 1] for i in range(len(chars) - 1)}
+    features.update(_WORD.findall(text))
+    return features
+
+
+class SentimentClassifier:
+    def __init__(self, labels: List[str], min_count: int = 3):
+        """
+        :param labels: The sentiments to choose from.
+        :param min_count: Number of calibration samples a feature needs before it is used.
+        """
+        self.min_count = min_count
+        self._lock = threading.Lock()
+        # Feature => label => count, learned from the calibration samples
+        self._counts: Dict[str, Counter] = defaultdict(Counter)
+        self._label_totals: Counter = Counter()
+        self.labels: List[str] = []
+        self.neutral: str | None = None
+        self._emotions: Dict[str, str] = {}
+        self._pattern: re.Pattern | None = None
+        self.set_labels(labels)
+
+    def set_labels(self, labels: List[str]):
+        """
+        Change the sentiments to choose from, e.g. when the language changes. The calibration is kept.
+        """
+        self.labels = list(dict.fromkeys(labels))
+        self.neutral = next((label for label in self.labels if label.lower() in _NEUTRAL_NAMES), None)
+        # Label => emotion
+        self._emotions = {}
+        for label in self.labels:
+            for emotion, (names, _) in _LEXICON.items():
+                if label.lower() in names:
+                    self._emotions[label] = emotion
+                    break
+        # Cue => emotions, the labels are cues of themselves
+        cues: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for label, emotion in self._emotions.items():
+            for cue in _LEXICON[emotion][1]:
+                cues[cue.lower()].append((label, _CUE_WEIGHT))
+        for label in self.labels:
+            if label != self.neutral:
+                cues[label.lower()].append((label, _LABEL_WEIGHT))
+        self._cues = cues
+        # The longest cues first, so that `真的吗` is not matched as `真`
+        alternatives = sorted(cues.keys(), key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(_cue_regex, alternatives))) if alternatives else None
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Classify the text.
+        :return: The sentiment, and the confidence of the classifier in [0, 1].
+        """
+        if len(self.labels) == 0:
+            raise ValueError("No sentiment to choose from")
+        if len(self.labels) == 1:
+            return self.labels[0], 1.
+        scores = dict.fromkeys(self.labels, 0.)
+        if self.neutral is not None:
+            scores[self.neutral] = _NEUTRAL_PRIOR
+        lowered = text.lower()
+        if self._pattern is not None:
+            for match in self._pattern.finditer(lowered):
+                for label, weight in self._cues[match.group()]:
+                    scores[label] += weight
+        if len(self._label_totals) > 0:
+            with self._lock:
+                for feature in _features(lowered):
+                    for label, weight in self._learned_weights(feature):
+                        if label in scores:
+                            scores[label] += weight
+        # Softmax of the scores
+        top = max(scores.values())
+        exp_scores = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp_scores.values())
+        label = max(exp_scores, key=exp_scores.get)
+        return label, exp_scores[label] / total
+
+    def _learned_weights(self, feature: str) -> List[Tuple[str, float]]:
+        counts = self._counts.get(feature, None)
+        if counts is None:
+            return []
+        total = sum(counts.values())
+        if total < self.min_count:
+            return []
+        num_labels = max(len(self.labels), 2)
+        weights = []
+        for label, count in counts.items():
+            # Log-odds of the label given the feature against a uniform guess, with additive smoothing
+            weight = math.log((count + 1) / (total + num_labels) * num_labels)
+            if weight > 0:
+                weights.append((label, weight))
+        return weights
+
+    def learn(self, text: str, label: str):
+        """
+        Add a calibration sample, e.g. the label the LLM gave to the text.
+        """
+        with self._lock:
+            for feature in _features(text):
+                self._counts[feature][label] += 1
+            self._label_totals[label] += 1
+
+    def calibrate(self, path: Path) -> int:
+        """
+        Learn the samples of a label log.
+        :param path: JSON Lines of `{"text": ..., "label": ...}`.
+        :return: Number of samples learned.
+        """
+        if not path.exists():
+            return 0
+        num_samples = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    sample = json.loads(line)
+                    self.learn(sample["text"], sample["label"])
+                    num_samples += 1
+                except (ValueError, KeyError, TypeError):
+                    continue
+        logger.info(f"Sentiment classifier calibrated with {num_samples} samples: {path}")
+        return num_samples
+
+
+def log_label(path: Path, text: str, label: str):
+    """
+    Append a calibration sample to the label log.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"text": text, "label": label}, ensure_ascii=False) + "\n")
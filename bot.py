@@ -1,43 +1,59 @@
 import asyncio
+import json
 import os
-from concurrent.futures.thread import ThreadPoolExecutor
+from contextlib import aclosing
 from pathlib import Path
 from queue import Queue
-from typing import List
+from typing import Any, Callable, Coroutine, List, Set, Tuple
 
 from loguru import logger
 from zerolan.data.data.prompt import TTSPrompt
-from zerolan.data.pipeline.asr import ASRStreamQuery
 from zerolan.data.pipeline.img_cap import ImgCapQuery
 from zerolan.data.pipeline.llm import LLMQuery, LLMPrediction
 from zerolan.data.pipeline.milvus import MilvusInsert, InsertRow, MilvusQuery
 from zerolan.data.pipeline.ocr import OCRQuery
-from zerolan.data.pipeline.tts import TTSQuery
+from zerolan.data.pipeline.tts import TTSQuery, TTSPrediction
 from zerolan.data.pipeline.vla import ShowUiQuery
 
-from agent.api import sentiment_analyse, translate, summary_history, find_file, model_scale, sentiment_score, \
-    memory_score
+from agent.api import sentiment_analyse, translate, summary_history, find_file, model_scale, memory_scores
+from agent.sentiment import SentimentClassifier, log_label
+from common.command_matcher import voice_commands, CommandMatch
 from common.concurrent.abs_runnable import stop_all_runnable
+from common.concurrent.cancellation import CancellationScope, CancellationToken, OperationCancelledError, \
+    current_token, use_token, raise_if_cancelled
 from common.concurrent.killable_thread import KillableThread, kill_all_threads
+from common.concurrent.reorder_buffer import ReorderBuffer
 from common.enumerator import Language
 from common.io.api import save_audio
+from common.io.audio_clip import AudioClip
+from common.io.file_sys import fs
 from common.io.file_type import AudioFileType
-from common.utils import audio_util, math_util
+from common.utils import math_util
 from common.utils.img_util import is_image_uniform
-from common.utils.str_util import split_by_punc, is_blank
+from common.utils.str_util import split_by_punc, is_blank, ClauseSegmenter
+from devices.audio_stream import AudioStream
 from event.event_data import DeviceMicrophoneVADEvent, DeviceKeyboardPressEvent, DeviceScreenCapturedEvent, \
     PipelineOutputLLMEvent, \
     PipelineImgCapEvent, \
-    QQMessageEvent, DeviceMicrophoneSwitchEvent, PipelineOutputTTSEvent, PipelineASREvent, \
+    QQMessageEvent, DeviceMicrophoneSwitchEvent, PipelineOutputTTSEvent, PipelineASREvent, PipelineASRPartialEvent, \
     PipelineOCREvent, SecondEvent, ConfigFileModifiedEvent, LiveStreamDanmakuEvent, DeviceSpeakerPlayEvent
 from event.event_emitter import emitter
+from event.recorder import EventRecorder
 from event.registry import EventKeyRegistry
+from framework import voice_commands as specs
 from framework.base_bot import BaseBot
 from manager.config_manager import get_config
+from pipeline.asr.stream_session import ASRStreamSession
+from pipeline.base.cache import ResponseCache, ResponseCacheConfig, content_key
 from pipeline.ocr.ocr_sync import avg_confidence, stringify
 
 _config = get_config()
 
+# Handlers that read and write the shared LLM history run one at a time in emission order
+_CHAT_LANE = "chat"
+# Speech chunks must be recognized in the order they were spoken
+_MICROPHONE_LANE = "microphone"
+
 
 class ZerolanLiveRobot(BaseBot):
     def __init__(self):
@@ -45,11 +61,39 @@ class ZerolanLiveRobot(BaseBot):
         self.cur_lang = Language.ZH
         self.tts_prompt_manager.set_lang(self.cur_lang)
         self._timer_flag = True
-        self.tts_thread_pool = ThreadPoolExecutor(max_workers=1)
+        # The clauses are synthesized in parallel, but played (with their subtitles) in submission order
+        self._tts_semaphore = asyncio.Semaphore(self.tts.max_concurrency if self.tts is not None else 1)
+        self._tts_playback: ReorderBuffer[Tuple[CancellationToken | None, PipelineOutputTTSEvent, AudioClip]] = \
+            ReorderBuffer(self._play_tts_in_order)
+        self._tts_tasks: Set[asyncio.Task] = set()
+        # Streamed clips need the local speaker, the playground plays audio files
+        self._stream_tts = _config.system.speaker.stream and self.speaker is not None and self.playground is None
+        if self._stream_tts and self.tts is not None and not self.tts.supports_stream:
+            logger.warning(f"TTS model {self.tts.model_id} can not stream, the clauses are synthesized as whole clips.")
+            self._stream_tts = False
         self.enable_exp_memory = _config.system.enable_intelligent_memory
+        self._memory_score_cache: ResponseCache | None = None
+        if self.enable_exp_memory:
+            self._memory_score_cache = ResponseCache("memory_score", ResponseCacheConfig())
+        self._memory_tasks: Set[asyncio.Task] = set()
         self.enable_sentiment_analysis = _config.system.enable_sentiment_analysis
+        self._sentiment_config = _config.system.sentiment
+        self.sentiment_classifier = SentimentClassifier(self.tts_prompt_manager.sentiments)
+        self._sentiment_label_log = Path(self._sentiment_config.label_log) if self._sentiment_config.label_log \
+            else fs.temp_dir.joinpath("sentiment_labels.jsonl")
+        if self.enable_sentiment_analysis and self._sentiment_config.calibrate:
+            self.sentiment_classifier.calibrate(self._sentiment_label_log)
+        self._sentiment_tasks: Set[asyncio.Task] = set()
         self.enable_split_by_punc = _config.system.enable_clause_split
+        self.enable_llm_stream = _config.system.enable_llm_stream
         self.subtitles_queue = Queue()
+        # Each utterance of the streamer starts a new chain (ASR -> LLM -> TTS -> playback),
+        # which supersedes the chain of the previous utterance
+        self.utterance_scope = CancellationScope("utterance")
+        self._asr_session = ASRStreamSession(self.asr) if self.asr is not None else None
+        # Token of the utterance being streamed, if a partial transcript has already barged in
+        self._partial_token: Tuple[str, CancellationToken] | None = None
+        self._configure_emitter()
         self.init()
         logger.info("🤖 Zerolan Live Robot: Initialized services successfully.")
 
@@ -119,12 +163,25 @@ class ZerolanLiveRobot(BaseBot):
             thread.join()
 
     async def stop(self):
-        self.tts_thread_pool.shutdown()
+        for task in list(self._tts_tasks):
+            task.cancel()
         emitter.stop()
         kill_all_threads()
         await stop_all_runnable()
         logger.info("Good Bye!")
 
+    def _configure_emitter(self):
+        config = _config.system.emitter
+        emitter.configure(config, policies={
+            EventKeyRegistry.Device.MICROPHONE_VAD: config.asr,
+            EventKeyRegistry.Pipeline.ASR: config.asr,
+            EventKeyRegistry.LiveStream.SUPER_CHAT: config.super_chat,
+            EventKeyRegistry.LiveStream.GIFT: config.gift,
+            EventKeyRegistry.LiveStream.DANMAKU: config.danmaku,
+        })
+        if config.record_path:
+            emitter.set_recorder(EventRecorder(config.record_path))
+
     def init(self):
         @emitter.on(EventKeyRegistry.Playground.CONNECTED)
         def on_playground_connected(_):
@@ -196,100 +253,151 @@ class ZerolanLiveRobot(BaseBot):
                     return
                 self.mic.resume()
 
-        @emitter.on(EventKeyRegistry.Device.MICROPHONE_VAD)
-        def on_service_vad_speech_chunk(event: DeviceMicrophoneVADEvent):
+        @emitter.on(EventKeyRegistry.Device.MICROPHONE_VAD, lane=_MICROPHONE_LANE)
+        async def on_service_vad_speech_chunk(event: DeviceMicrophoneVADEvent):
             logger.debug("`SpeechEvent` received.")
-            speech, channels, sample_rate = event.speech, event.channels, event.sample_rate
-            query = ASRStreamQuery(is_final=True, audio_data=speech, channels=channels, sample_rate=sample_rate,
-                                   media_type=event.audio_type.value)
-
-            for prediction in self.asr.stream_predict(query):
+            if not event.is_final:
+                prediction = await self._asr_session.partial(event)
+                if prediction is None or is_blank(prediction.transcript):
+                    return
+                logger.debug(f"ASR (partial): {prediction.transcript}")
+                if self._partial_token is None or self._partial_token[0] != event.utterance_id:
+                    # The streamer interrupts the answer as soon as something is recognized
+                    self._partial_token = (event.utterance_id, self._barge_in())
+                emitter.emit(PipelineASRPartialEvent(prediction=prediction, utterance_id=event.utterance_id))
+                return
+
+            token = None
+            if self._partial_token is not None and self._partial_token[0] == event.utterance_id:
+                token = self._partial_token[1]
+            self._partial_token = None
+            async for prediction in self._asr_session.final(event):
                 logger.info(f"ASR: {prediction.transcript}")
                 if is_blank(prediction.transcript):
                     continue
-                emitter.emit(PipelineASREvent(prediction=prediction))
+                if token is None:
+                    # Only barge in when something was really said, noise should not interrupt the answer
+                    token = self._barge_in()
+                with use_token(token):
+                    emitter.emit(PipelineASREvent(prediction=prediction))
                 logger.debug("ASREvent emitted.")
 
-        @emitter.on(EventKeyRegistry.Pipeline.ASR)
-        def asr_handler(event: PipelineASREvent):
-            logger.debug("`ASREvent` received.")
-            prediction = event.prediction
-            if self.playground:
-                self.playground.add_history(role="user", text=prediction.transcript, username=self.master_name)
-            if "打开浏览器" in prediction.transcript:
-                if self.browser is not None:
-                    self.browser.open("https://www.bing.com")
-            elif "关闭浏览器" in prediction.transcript:
-                if self.browser is not None:
-                    self.browser.close()
-            elif "网页搜索" in prediction.transcript:
-                if self.browser is not None:
+        @emitter.on(EventKeyRegistry.Pipeline.ASR_PARTIAL)
+        async def on_asr_partial(event: PipelineASRPartialEvent):
+            if self.obs:
+                await asyncio.to_thread(self.obs.subtitle, event.prediction.transcript, which="user")
+
+        # The voice commands (see `framework/voice_commands.py`), the blocking clients (browser, screen, agents, ...)
+        # run in the default thread pool, so that the event loop keeps serving the other handlers
+        @voice_commands.on_spec(specs.OPEN_BROWSER)
+        async def on_open_browser(command: CommandMatch):
+            if self.browser is not None:
+                await asyncio.to_thread(self.browser.open, "https://www.bing.com")
+
+        @voice_commands.on_spec(specs.CLOSE_BROWSER)
+        async def on_close_browser(command: CommandMatch):
+            if self.browser is not None:
+                await asyncio.to_thread(self.browser.close)
+
+        @voice_commands.on_spec(specs.WEB_SEARCH)
+        async def on_web_search(command: CommandMatch):
+            if self.browser is not None:
+                def search(text: str):
                     self.browser.move_to_search_box()
-                    text = prediction.transcript[4:]
                     self.browser.send_keys_and_enter(text)
-            elif "游戏" in prediction.transcript:
-                self.game_agent.exec_instruction(prediction.transcript)
-            elif "看见" in prediction.transcript:
-                img, img_save_path = self.screen.safe_capture(k=0.99)
-                if not self.check_img(img):
-                    return
-                emitter.emit(DeviceScreenCapturedEvent(img_path=img_save_path, is_camera=False))
-            elif "点击" in prediction.transcript:
-                # If there is no display, then can not use this feature
-                if os.environ.get('DISPLAY', None) is None:
-                    return
-                img, img_save_path = self.screen.safe_capture(k=0.99)
-                if not self.check_img(img):
-                    return
 
-                query = ShowUiQuery(query=prediction.transcript, env="web", img_path=img_save_path)
-                prediction = self.showui.predict(query)
-                logger.debug("ShowUI: " + prediction.model_dump_json())
-                action = prediction.actions[0]
-                if action.action == "CLICK":
-                    import pyautogui
-                    logger.info("Click action triggered.")
-                    x, y = action.position[0] * img.width, action.position[1] * img.height
+                await asyncio.to_thread(search, command.argument)
+
+        @voice_commands.on_spec(specs.GAME)
+        async def on_game(command: CommandMatch):
+            await asyncio.to_thread(self.game_agent.exec_instruction, command.text)
+
+        @voice_commands.on_spec(specs.SEE)
+        async def on_see(command: CommandMatch):
+            img, img_save_path = await asyncio.to_thread(self.screen.safe_capture, k=0.99)
+            if not await self.check_img(img):
+                return False
+            emitter.emit(DeviceScreenCapturedEvent(img_path=img_save_path, is_camera=False))
+
+        @voice_commands.on_spec(specs.CLICK)
+        async def on_click(command: CommandMatch):
+            # If there is no display, then can not use this feature
+            if os.environ.get('DISPLAY', None) is None:
+                return False
+            img, img_save_path = await asyncio.to_thread(self.screen.safe_capture, k=0.99)
+            if not await self.check_img(img):
+                return False
+
+            query = ShowUiQuery(query=command.text, env="web", img_path=img_save_path)
+            prediction = await self.showui.predict(query)
+            logger.debug("ShowUI: " + prediction.model_dump_json())
+            action = prediction.actions[0]
+            if action.action == "CLICK":
+                import pyautogui
+                logger.info("Click action triggered.")
+                x, y = action.position[0] * img.width, action.position[1] * img.height
+
+                def click():
                     pyautogui.moveTo(x, y)
                     pyautogui.click()
-            elif "记得" in prediction.transcript:
-                query = MilvusQuery(collection_name="history_collection", limit=2, output_fields=['history', 'text'],
-                                    query=prediction.transcript)
-                result = self.vec_db.search(query)
-                memory = result.result[0][0]
-                memory = memory.entity["text"]
-                logger.debug(f"Memory found: {memory}")
-                self.emit_llm_prediction(f"{memory}\n\n请根据上文回答：{prediction.transcript} \n")
-            elif "加载模型" in prediction.transcript:
-                file_id = find_file(self.model_manager.get_files(), prediction.transcript)
-                file_info = self.model_manager.get_file_by_id(file_id)
-                if self.playground:
-                    self.playground.load_3d_model(file_info)
-            elif "调整模型" in prediction.transcript:
-                if self.playground:
-                    info = self.playground.get_gameobjects_info()
-                    if not info:
-                        logger.warning("No gameobjects info")
-                        return
-                    so = model_scale(info, prediction.transcript)
-                    self.playground.modify_game_object_scale(so)
+
+                await asyncio.to_thread(click)
+
+        @voice_commands.on_spec(specs.REMEMBER)
+        async def on_remember(command: CommandMatch):
+            query = MilvusQuery(collection_name="history_collection", limit=2, output_fields=['history', 'text'],
+                                query=command.text)
+            result = await self.vec_db.search(query)
+            memory = result.result[0][0]
+            memory = memory.entity["text"]
+            logger.debug(f"Memory found: {memory}")
+            await self.emit_llm_prediction(f"{memory}\n\n请根据上文回答：{command.text} \n")
+
+        @voice_commands.on_spec(specs.LOAD_MODEL)
+        async def on_load_model(command: CommandMatch):
+            file_id = await asyncio.to_thread(find_file, self.model_manager.get_files(), command.text)
+            file_info = self.model_manager.get_file_by_id(file_id)
+            if self.playground:
+                self.playground.load_3d_model(file_info)
+
+        @voice_commands.on_spec(specs.SCALE_MODEL)
+        async def on_scale_model(command: CommandMatch):
+            if self.playground:
+                info = self.playground.get_gameobjects_info()
+                if not info:
+                    logger.warning("No gameobjects info")
+                    return False
+                so = await asyncio.to_thread(model_scale, info, command.text)
+                self.playground.modify_game_object_scale(so)
+
+        @emitter.on(EventKeyRegistry.Pipeline.ASR, lane=_CHAT_LANE)
+        async def asr_handler(event: PipelineASREvent):
+            logger.debug("`ASREvent` received.")
+            prediction = event.prediction
+            if self.playground:
+                self.playground.add_history(role="user", text=prediction.transcript, username=self.master_name)
+            command = voice_commands.match(prediction.transcript)
+            if command is not None:
+                logger.debug(f"Voice command: {command.command.name}")
+                # A command returns False when the transcript should not be shown
+                if await command.run() is False:
+                    return
+            elif self.playground and self.custom_agent.plausible_tools(prediction.transcript):
+                # The agent decides on the tool call while the reply is generated, not before
+                await asyncio.gather(self._run_custom_agent(prediction.transcript),
+                                     self.emit_llm_prediction(prediction.transcript))
             else:
-                if self.playground:
-                    assert self.custom_agent is not None
-                    tool_called = self.custom_agent.run(prediction.transcript)
-                    if tool_called:
-                        logger.debug("Tool called.")
-                self.emit_llm_prediction(prediction.transcript)
+                await self.emit_llm_prediction(prediction.transcript)
             if self.playground:
                 if self.playground.is_connected:
                     self.playground.show_user_input_text(prediction.transcript)
             if self.obs:
-                self.obs.subtitle(prediction.transcript, which="user")
+                await asyncio.to_thread(self.obs.subtitle, prediction.transcript, which="user")
 
-        @emitter.on(EventKeyRegistry.LiveStream.DANMAKU)
-        def on_danmaku(event: LiveStreamDanmakuEvent):
+        @emitter.on(EventKeyRegistry.LiveStream.DANMAKU, lane=_CHAT_LANE)
+        async def on_danmaku(event: LiveStreamDanmakuEvent):
             text = f"你收到了一条弹幕，用户“{event.danmaku.username}”说：\n{event.danmaku.content}"
-            self.emit_llm_prediction(text)
+            await self.emit_llm_prediction(text)
 
         # @emitter.on(EventKeyRegistry.System.SECOND)
         # async def on_second_danmaku_check(event: SecondEvent):
@@ -299,45 +407,43 @@ class ZerolanLiveRobot(BaseBot):
         #         if danmaku:
         #             logger.info(f"Selected danmaku: [{danmaku.username}] {danmaku.content}")
         #             text = f"你收到了一条弹幕，用户“{danmaku.username}”说：\n{danmaku.content}"
-        #             self.emit_llm_prediction(text)
+        #             await self.emit_llm_prediction(text)
 
         @emitter.on(EventKeyRegistry.Device.SCREEN_CAPTURED)
-        def on_device_screen_captured(event: DeviceScreenCapturedEvent):
+        async def on_device_screen_captured(event: DeviceScreenCapturedEvent):
             img_path = event.img_path
             if isinstance(event.img_path, Path):
                 img_path = str(event.img_path)
 
-            ocr_prediction = self.ocr.predict(OCRQuery(img_path=img_path))
+            ocr_prediction = await self.ocr.predict(OCRQuery(img_path=img_path))
             # TODO: 0.6 is a hyperparameter that indicates the average confidence of the text contained in the image.
             if avg_confidence(ocr_prediction) > 0.6:
                 logger.info("OCR: " + stringify(ocr_prediction.region_results))
                 emitter.emit(PipelineOCREvent(prediction=ocr_prediction))
             else:
-                img_cap_prediction = self.img_cap.predict(ImgCapQuery(prompt="There", img_path=img_path))
+                img_cap_prediction = await self.img_cap.predict(ImgCapQuery(prompt="There", img_path=img_path))
                 src_lang = Language.value_of(img_cap_prediction.lang)
-                caption = translate(src_lang, self.cur_lang, img_cap_prediction.caption)
+                caption = await asyncio.to_thread(translate, src_lang, self.cur_lang, img_cap_prediction.caption)
                 img_cap_prediction.caption = caption
                 logger.info("ImgCap: " + caption)
                 emitter.emit(PipelineImgCapEvent(prediction=img_cap_prediction))
 
-        def predict_image_modal(images: List[Path]):
-            results = []
-            for image in images:
-                if image.exists():
-                    ocr_prediction = self.ocr.predict(OCRQuery(img_path=str(image)))
-                    ocr_text = stringify(ocr_prediction.region_results)
-                    img_cap_prediction = self.img_cap.predict(ImgCapQuery(prompt="There", img_path=str(image)))
-                    img_cap_text = img_cap_prediction.caption
-                    results.append({
-                        "ocr": ocr_text,
-                        "sentiment": img_cap_text
-                    })
-            return results
-
-        @emitter.on(EventKeyRegistry.QQBot.QQ_MESSAGE)
-        def on_qq_message(event: QQMessageEvent):
+        async def predict_image_modal(images: List[Path]):
+            async def predict(image: Path):
+                ocr_prediction, img_cap_prediction = await asyncio.gather(
+                    self.ocr.predict(OCRQuery(img_path=str(image))),
+                    self.img_cap.predict(ImgCapQuery(prompt="There", img_path=str(image))))
+                return {
+                    "ocr": stringify(ocr_prediction.region_results),
+                    "sentiment": img_cap_prediction.caption
+                }
+
+            return list(await asyncio.gather(*[predict(image) for image in images if image.exists()]))
+
+        @emitter.on(EventKeyRegistry.QQBot.QQ_MESSAGE, lane=_CHAT_LANE)
+        async def on_qq_message(event: QQMessageEvent):
             if "语音" in event.message:
-                prediction = self.emit_llm_prediction(event.message, direct_return=True)
+                prediction = await self.emit_llm_prediction(event.message, direct_return=True)
                 if prediction is None:
                     logger.warning("No response from LLM remote service and will not send QQ message.")
                     return
@@ -350,51 +456,50 @@ class ZerolanLiveRobot(BaseBot):
                     prompt_language=tts_prompt.lang,
                     audio_type="wav"
                 )
-                prediction = self.tts.predict(query=query)
-                file_path = save_audio(prediction.wave_data, prefix="tts")
-                self.qq.send_speech(event.group_id, str(file_path))
+                prediction = await self.tts.predict(query=query)
+                file_path = await asyncio.to_thread(save_audio, prediction.wave_data, prefix="tts")
+                await asyncio.to_thread(self.qq.send_speech, event.group_id, str(file_path))
             elif event.images is not None and len(event.images) > 0:
-                result = predict_image_modal(event.images)
+                result = await predict_image_modal(event.images)
                 query_text = "你看见群友给你发了张图片，内容是：" + str(result)
                 logger.info(f"OCR + ImgCap: {result}")
-                prediction = self.emit_llm_prediction(query_text, direct_return=True)
+                prediction = await self.emit_llm_prediction(query_text, direct_return=True)
                 if prediction is None:
                     logger.warning("No response from LLM remote service and will not send QQ message.")
                     return
-                self.qq.send_plain_message(group_id=event.group_id, receiver_id=event.sender_id,
-                                           text=prediction.response)
+                await asyncio.to_thread(self.qq.send_plain_message, group_id=event.group_id,
+                                        receiver_id=event.sender_id, text=prediction.response)
             else:
-                prediction = self.emit_llm_prediction(event.message, direct_return=True)
+                prediction = await self.emit_llm_prediction(event.message, direct_return=True)
                 if prediction is None:
                     logger.warning("No response from LLM remote service and will not send QQ message.")
                     return
-                self.qq.send_plain_message(group_id=event.group_id, receiver_id=event.sender_id,
-                                           text=prediction.response)
+                await asyncio.to_thread(self.qq.send_plain_message, group_id=event.group_id,
+                                        receiver_id=event.sender_id, text=prediction.response)
 
-        @emitter.on(EventKeyRegistry.Pipeline.OCR)
-        def on_pipeline_ocr(event: PipelineOCREvent):
+        @emitter.on(EventKeyRegistry.Pipeline.OCR, lane=_CHAT_LANE)
+        async def on_pipeline_ocr(event: PipelineOCREvent):
             prediction = event.prediction
             text = "你看见了" + stringify(prediction.region_results) + "\n请总结一下"
-            self.emit_llm_prediction(text)
+            await self.emit_llm_prediction(text)
 
-        @emitter.on(EventKeyRegistry.Pipeline.IMG_CAP)
-        def on_pipeline_img_cap(event: PipelineImgCapEvent):
+        @emitter.on(EventKeyRegistry.Pipeline.IMG_CAP, lane=_CHAT_LANE)
+        async def on_pipeline_img_cap(event: PipelineImgCapEvent):
             prediction = event.prediction
             text = "你看见了" + prediction.caption
-            self.emit_llm_prediction(text)
+            await self.emit_llm_prediction(text)
 
         @emitter.on(EventKeyRegistry.Pipeline.LLM)
-        def llm_query_handler(event: PipelineOutputLLMEvent):
+        async def llm_query_handler(event: PipelineOutputLLMEvent):
             prediction = event.prediction
             text = prediction.response
             logger.info("LLM: " + text)
-            if self.enable_sentiment_analysis:
-                sentiment = sentiment_analyse(sentiments=self.tts_prompt_manager.sentiments, text=text)
-                tts_prompt = self.tts_prompt_manager.get_tts_prompt(sentiment)
-            else:
-                tts_prompt = self.tts_prompt_manager.default_tts_prompt
             if self.playground:
                 self.playground.add_history(role="assistant", text=text, username=self.bot_name)
+            if event.streamed:
+                # The clauses have been sent to TTS while the response was generated
+                return
+            tts_prompt = await self._select_tts_prompt(text)
 
             if self.enable_split_by_punc:
                 transcripts = split_by_punc(text, self.cur_lang)
@@ -412,55 +517,239 @@ class ZerolanLiveRobot(BaseBot):
         @emitter.on(EventKeyRegistry.Device.SPEAKER_PLAY)
         def on_speaker_play(event: DeviceSpeakerPlayEvent):
             if self.obs is not None:
-                assert event.audio_path.exists()
-                sample_rate, num_channels, duration = audio_util.get_audio_info(event.audio_path)
+                # The duration of a streamed clip is unknown until it ends
+                duration = 5 if event.duration is None else event.duration
                 text = self.subtitles_queue.get()
                 self.obs.subtitle(text, which="assistant", duration=math_util.clamp(0, 5, duration - 1))
 
+    async def _run_custom_agent(self, query: str):
+        assert self.custom_agent is not None
+        try:
+            tool_called = await asyncio.to_thread(self.custom_agent.run, query)
+            if tool_called:
+                logger.debug("Tool called.")
+        except Exception as e:
+            logger.exception(e)
+
+    def _barge_in(self) -> CancellationToken:
+        """
+        Cancel the work of the previous utterance and flush the audio not played yet.
+        :return: Token of the new utterance.
+        """
+        token = self.utterance_scope.supersede("new utterance")
+        dropped = 0
+        if self.speaker is not None:
+            dropped = self.speaker.flush()
+        while not self.subtitles_queue.empty():
+            self.subtitles_queue.get_nowait()
+        logger.debug(f"Barge-in: {dropped} audio clips dropped.")
+        return token
+
+    async def _select_tts_prompt(self, text: str) -> TTSPrompt:
+        if not self.enable_sentiment_analysis:
+            return self.tts_prompt_manager.default_tts_prompt
+        sentiment, confidence = self.sentiment_classifier.predict(text)
+        logger.debug(f"Sentiment: {sentiment} ({confidence:.2f})")
+        if confidence < self._sentiment_config.confidence_threshold and self._sentiment_config.llm_fallback:
+            if self._sentiment_config.wait_llm_fallback:
+                sentiment = await self._llm_sentiment(text)
+            else:
+                # The LLM answers after the first clause has started, and calibrates the following replies
+                task = asyncio.create_task(self._llm_sentiment(text))
+                self._sentiment_tasks.add(task)
+                task.add_done_callback(self._sentiment_tasks.discard)
+        return self.tts_prompt_manager.get_tts_prompt(sentiment)
+
+    async def _llm_sentiment(self, text: str) -> str:
+        sentiments = self.tts_prompt_manager.sentiments
+        sentiment = await asyncio.to_thread(sentiment_analyse, sentiments=sentiments, text=text)
+        logger.debug(f"Sentiment (LLM): {sentiment}")
+        if self._sentiment_config.calibrate:
+            self.sentiment_classifier.learn(text, sentiment)
+            await asyncio.to_thread(log_label, self._sentiment_label_log, text, sentiment)
+        return sentiment
+
     def _tts_without_block(self, tts_prompt: TTSPrompt, text: str):
-        def wrapper():
-            query = TTSQuery(
-                text=text,
-                text_language="auto",
-                refer_wav_path=tts_prompt.audio_path,
-                prompt_text=tts_prompt.prompt_text,
-                prompt_language=tts_prompt.lang,
-                audio_type="wav"
-            )
-            prediction = self.tts.predict(query=query)
-            logger.info(f"TTS: {query.text}")
-
-            self.play_tts(PipelineOutputTTSEvent(prediction=prediction, transcript=text))
-
-        # To sync audio playing and subtitle
-        self.tts_thread_pool.submit(wrapper)
+        token = current_token()
+        if self._stream_tts:
+            # The speaker queue keeps the submission order, and plays the clip while it is being received
+            stream = AudioStream(text, preroll_ms=_config.system.speaker.preroll_ms,
+                                 sample_rate=_config.system.speaker.sample_rate,
+                                 channels=_config.system.speaker.channels)
+            self.subtitles_queue.put(text)
+            self.speaker.enqueue_sound(stream)
+            self._start_tts_task(self._synthesize_stream(tts_prompt, text, stream), token,
+                                 lambda completed: stream.end() if completed else stream.abort())
+            return
+        # The sequence number is taken now, so the clause is played in submission order whenever it is synthesized
+        seq = self._tts_playback.reserve()
+        self._start_tts_task(self._synthesize(tts_prompt, text), token,
+                             lambda result: self._tts_playback.skip(seq) if result is None else
+                             self._tts_playback.put(seq, (token, *result)))
+
+    def _start_tts_task(self, coro: Coroutine, token: CancellationToken | None, settle: Callable[[Any], None]):
+        # The task copies the context, so it belongs to the chain of the caller
+        task = asyncio.create_task(coro)
+        self._tts_tasks.add(task)
+        unregister = None
+        if token is not None:
+            # Cancelling the chain aborts the request in flight too
+            loop = asyncio.get_running_loop()
+            unregister = token.register(lambda: loop.call_soon_threadsafe(task.cancel))
+
+        def on_done(done: asyncio.Task):
+            self._tts_tasks.discard(done)
+            if unregister is not None:
+                unregister()
+            # A task cancelled before it starts never runs its body, so the result is settled here
+            settle(None if done.cancelled() or done.exception() is not None else done.result())
+
+        task.add_done_callback(on_done)
+
+    def _tts_query(self, tts_prompt: TTSPrompt, text: str) -> TTSQuery:
+        return TTSQuery(
+            text=text,
+            text_language="auto",
+            refer_wav_path=tts_prompt.audio_path,
+            prompt_text=tts_prompt.prompt_text,
+            prompt_language=tts_prompt.lang,
+            audio_type="wav"
+        )
+
+    async def _synthesize(self, tts_prompt: TTSPrompt, text: str) \
+            -> Tuple[PipelineOutputTTSEvent, AudioClip] | None:
+        async with self._tts_semaphore:
+            try:
+                raise_if_cancelled()
+                query = self._tts_query(tts_prompt, text)
+                prediction = await self.tts.predict(query=query)
+                logger.info(f"TTS: {query.text}")
+                # Prepared while the previous clips are playing
+                clip = await asyncio.to_thread(self._prepare_clip, prediction)
+                return PipelineOutputTTSEvent(prediction=prediction, transcript=text), clip
+            except OperationCancelledError:
+                logger.debug(f"TTS cancelled: {text}")
+            except Exception as e:
+                logger.exception(e)
+            return None
+
+    async def _synthesize_stream(self, tts_prompt: TTSPrompt, text: str, stream: AudioStream) -> bool | None:
+        async with self._tts_semaphore:
+            try:
+                raise_if_cancelled()
+                async with aclosing(self.tts.stream_predict(self._tts_query(tts_prompt, text))) as predictions:
+                    async for prediction in predictions:
+                        # Flushed by a barge-in
+                        if stream.aborted:
+                            return None
+                        stream.write(prediction.wave_data)
+                logger.info(f"TTS: {text}")
+                return True
+            except OperationCancelledError:
+                logger.debug(f"TTS cancelled: {text}")
+            except Exception as e:
+                logger.exception(e)
+            return None
+
+    async def _play_tts_in_order(self, item: Tuple[CancellationToken | None, PipelineOutputTTSEvent, AudioClip]):
+        token, event, clip = item
+        # Synthesized before a barge-in, but its turn comes after it
+        if token is not None and token.cancelled:
+            logger.debug(f"TTS cancelled: {event.transcript}")
+            return
+        await asyncio.to_thread(self.play_tts, event, clip)
+
+    def _prepare_clip(self, prediction: TTSPrediction) -> AudioClip:
+        # The metadata is parsed once here, no consumer reads or decodes the audio again
+        clip = AudioClip.from_bytes(prediction.wave_data, format=AudioFileType(prediction.audio_type))
+        if self.live2d_viewer:
+            clip.compute_envelope()
+        return clip
 
     def exp_memory(self, text: str, is_filtered: bool, response: str, len_history: int):
 
         l_max = get_config().character.chat.max_history
-        try:
-            s = sentiment_score(text)
-        except Exception as e:
-            logger.exception(e)
-            s = 1
+        s, r = self._memory_scores(text, response)
 
         if not is_filtered:
             b = 0
         else:
             b = self.filter.match(response)
 
+        t_memory = 0.3 * (l_max - len_history) / l_max + 0.2 * s + 0.2 * b + 0.1 * r
+        return t_memory > 0.5
+
+    def _memory_scores(self, text: str, response: str) -> Tuple[float, float]:
+        key = content_key(text, response)
+        cached = self._memory_score_cache.get(key)
+        if cached is not None:
+            s, r = json.loads(cached)
+            return s, r
         try:
-            r = memory_score(response)
+            s, r = memory_scores(text, response)
+        except Exception as e:
+            logger.exception(e)
+            # Keep the round, and ask again next time
+            return 1, 1
+        self._memory_score_cache.put(key, json.dumps([s, r]).encode("utf-8"))
+        return s, r
+
+    async def _decide_memory(self, text: str, response: str, len_history: int):
+        try:
+            if not await asyncio.to_thread(self.exp_memory, text, False, response, len_history):
+                self.llm_prompt_manager.forget_round(text, response)
+                logger.debug(f"Round forgotten by the intelligent memory: {text}")
         except Exception as e:
             logger.exception(e)
-            r = 1
-        t_memory = 0.3 * (l_max - len_history) / l_max + 0.2 * s + 0.2 * b + 0.1 * r
-        return t_memory > 0.5
 
-    def emit_llm_prediction(self, text, direct_return: bool = False) -> None | LLMPrediction:
+    async def _stream_llm_to_tts(self, query: LLMQuery) -> LLMPrediction | None:
+        """
+        Stream the LLM response, each clause is sent to TTS as soon as it is generated.
+        :return: The complete prediction, or None if the response is empty or a clause is filtered.
+        """
+        segmenter = ClauseSegmenter(self.cur_lang)
+        tts_prompt: TTSPrompt | None = None
+        prediction: LLMPrediction | None = None
+        received = 0
+
+        async def speak(clauses: List[str]) -> bool:
+            nonlocal tts_prompt
+            for clause in clauses:
+                # Nothing filtered may be spoken, so each clause is checked before it goes to TTS
+                if self.filter.filter(clause):
+                    logger.warning(f"LLM (Filtered): {clause}")
+                    return False
+                if tts_prompt is None:
+                    # The sentiment of the first clause decides the prompt of the whole response
+                    tts_prompt = await self._select_tts_prompt(clause)
+                self._tts_without_block(tts_prompt, clause)
+            return True
+
+        # Closing the stream as soon as we stop reading it aborts the generation
+        async with aclosing(self.llm.stream_predict(query)) as stream:
+            async for prediction in stream:
+                raise_if_cancelled()
+                # Each prediction holds the whole response generated so far
+                delta = prediction.response[received:]
+                received = len(prediction.response)
+                if not await speak(segmenter.feed(delta)):
+                    return None
+        if prediction is None or not await speak(segmenter.flush()):
+            return None
+        return prediction
+
+    async def emit_llm_prediction(self, text, direct_return: bool = False) -> None | LLMPrediction:
         logger.debug("`emit_llm_prediction` called")
         query = LLMQuery(text=text, history=self.llm_prompt_manager.current_history)
-        prediction = self.llm.predict(query)
+        streamed = self.enable_llm_stream and self.enable_split_by_punc and not direct_return
+        if streamed:
+            prediction = await self._stream_llm_to_tts(query)
+            if prediction is None:
+                return None
+        else:
+            prediction = await self.llm.predict(query)
+        # A newer utterance has superseded this one, its answer is neither spoken nor remembered
+        raise_if_cancelled()
 
         # Filter applied here
         is_filtered = self.filter.filter(prediction.response)
@@ -475,37 +764,42 @@ class ZerolanLiveRobot(BaseBot):
 
         logger.info(f"Length of current history: {len(self.llm_prompt_manager.current_history)}")
 
-        if self.enable_exp_memory:
-            if self.exp_memory(text, is_filtered, prediction.response, len(prediction.response)):
-                self.llm_prompt_manager.reset_history(prediction.history)
-        else:
-            # If experiment memory disabled, history should be updated for each chat commit.
-            self.llm_prompt_manager.reset_history(prediction.history)
+        # History should be updated for each chat commit.
+        # With the experiment memory, the round is kept until the scoring decides otherwise.
+        self.llm_prompt_manager.reset_history(prediction.history)
 
         if not direct_return:
-            emitter.emit(PipelineOutputLLMEvent(prediction=prediction))
+            emitter.emit(PipelineOutputLLMEvent(prediction=prediction, streamed=streamed))
             logger.debug("LLMEvent emitted.")
+
+        if self.enable_exp_memory:
+            # Scored off the critical path, after the response has been emitted
+            task = asyncio.create_task(self._decide_memory(text, prediction.response,
+                                                             len(self.llm_prompt_manager.current_history)))
+            self._memory_tasks.add(task)
+            task.add_done_callback(self._memory_tasks.discard)
         return prediction
 
     def change_lang(self, lang: Language):
         self.cur_lang = lang.name()
         self.tts_prompt_manager.set_lang(self.cur_lang)
+        self.sentiment_classifier.set_labels(self.tts_prompt_manager.sentiments)
 
-    def check_img(self, img) -> bool:
+    async def check_img(self, img) -> bool:
         if is_image_uniform(img):
             logger.warning("Are you sure you capture the screen properly? The screen is black!")
-            self.emit_llm_prediction("你忽然什么都看不见了！请向你的开发者求助！")
+            await self.emit_llm_prediction("你忽然什么都看不见了！请向你的开发者求助！")
             return False
         return True
 
-    def save_memory(self):
+    async def save_memory(self):
         start = len(self.llm_prompt_manager.injected_history)
         history = self.llm_prompt_manager.current_history[start:]
-        ai_msg = summary_history(history)
+        ai_msg = await asyncio.to_thread(summary_history, history)
         row = InsertRow(id=1, text=ai_msg.content, subject="history")
         insert = MilvusInsert(collection_name="history_collection", texts=[row])
         try:
-            insert_res = self.vec_db.insert(insert)
+            insert_res = await self.vec_db.insert(insert)
             if insert_res.insert_count == 1:
                 logger.info(f"Add a history memory: {row.text}")
             else:
@@ -513,20 +807,20 @@ class ZerolanLiveRobot(BaseBot):
         except Exception as e:
             logger.warning("Milvus pipeline failed!")
 
-    def play_tts(self, event: PipelineOutputTTSEvent):
-        prediction = event.prediction
+    def play_tts(self, event: PipelineOutputTTSEvent, clip: AudioClip | None = None):
         text = event.transcript
         self.subtitles_queue.put(text)
-        audio_path = save_audio(wave_data=prediction.wave_data, format=AudioFileType(prediction.audio_type),
-                                prefix='tts')
+        if clip is None:
+            clip = self._prepare_clip(event.prediction)
         if self.live2d_viewer:
-            self.live2d_viewer.sync_lip(audio_path)
+            # The local speaker starts the lip sync when it starts the clip, the playground plays it now
+            self.live2d_viewer.sync_lip(clip, follow_playback=not self.playground)
         if self.playground:
             if self.playground.is_connected:
-                self.playground.play_speech(bot_id=self.bot_id, audio_path=audio_path,
+                self.playground.play_speech(bot_id=self.bot_id, audio=clip,
                                             transcript=text, bot_name=self.bot_name)
                 logger.debug("Remote speaker enqueue speech data")
         else:
-            # `playsound(audio_path, block=True)` will block the thread, use `enqueue_sound(audio_path)` instead
-            self.speaker.enqueue_sound(audio_path)
+            # `playsound(clip, block=True)` will block the thread, use `enqueue_sound(clip)` instead
+            self.speaker.enqueue_sound(clip)
             logger.debug("Local speaker enqueue speech data")
@@ -0,0 +1,188 @@
+"""
+Command Matcher
+    Voice commands are registered declaratively (`@voice_commands.on("打开浏览器")`), from any module,
+    and all their keywords are compiled into a single Aho-Corasick automaton,
+    which finds every keyword of every command in one linear pass over the transcript.
+    When several commands match, the one with the highest priority wins,
+    then the one whose keyword comes first, then the longest keyword.
+    A command can be anchored (`max_start`): its keyword must start within so many characters of the start
+    of the transcript, so that a command is not triggered by a sentence which only mentions it.
+    The text after the keyword is the argument of the command, e.g. the text to search with `网页搜索`.
+"""
+import inspect
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+# Leading and trailing characters which are not part of a command or its argument
+_PUNCTUATIONS = " \t\r\n,.!?;:，。！？；：、…~～\"'“”‘’"
+# Only the ASCII letters are case-folded, `str.lower` changes the length of some characters (e.g. `İ`),
+# and the offsets found in the folded text must hold in the original one
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _fold(text: str) -> str:
+    return text.translate(_ASCII_LOWER)
+
+
+class AhoCorasick:
+    def __init__(self, patterns: Iterable[str]):
+        """
+        :param patterns: The strings to find.
+        """
+        self.patterns: List[str] = list(patterns)
+        # State => character => next state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # State => indexes of the patterns ending in this state
+        self._out: List[List[int]] = [[]]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char, None)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._out[state].append(index)
+        # Breadth-first, so the failure state of a state is computed before its children
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] += self._out[self._fail[next_state]]
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Find all the occurrences of the patterns, overlapping ones included.
+        :return: (start, index of the pattern) of each occurrence.
+        """
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                yield end - len(self.patterns[index]), index
+
+
+class Command:
+    def __init__(self, keywords: List[str], handler: Callable[["CommandMatch"], Any], priority: int = 0,
+                 max_start: int | None = None, name: str | None = None):
+        """
+        :param keywords: Any of them triggers the command.
+        :param handler: Called with the `CommandMatch`, synchronous or coroutine function.
+        :param priority: The command with the highest priority wins when several match.
+        :param max_start: If set, the keyword must start within this many characters of the start of the transcript.
+        :param name: Name in the logs, the first keyword by default.
+        """
+        assert len(keywords) > 0, "A command needs at least one keyword."
+        self.keywords = keywords
+        self.handler = handler
+        self.priority = priority
+        self.max_start = max_start
+        self.name = name if name is not None else keywords[0]
+
+
+class CommandSpec(NamedTuple):
+    """
+    Keywords and anchor of a command, without its handler.
+    See `Command` for the fields.
+    """
+    keywords: Tuple[str, ...]
+    priority: int = 0
+    max_start: int | None = None
+
+
+class CommandMatch:
+    def __init__(self, command: Command, keyword: str, text: str, start: int):
+        self.command = command
+        self.keyword = keyword
+        # The transcript without its leading and trailing punctuation
+        self.text = text
+        self.start = start
+        self.end = start + len(keyword)
+
+    @property
+    def argument(self) -> str:
+        """
+        The text after the keyword.
+        """
+        return self.text[self.end:].strip(_PUNCTUATIONS)
+
+    async def run(self) -> Any:
+        result = self.command.handler(self)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+
+class CommandMatcher:
+    def __init__(self):
+        self._commands: List[Command] = []
+        # Index of each keyword of the automaton => command
+        self._keyword_commands: List[Tuple[str, Command]] = []
+        self._automaton: AhoCorasick | None = None
+        self._lock = threading.Lock()
+
+    def register(self, command: Command):
+        with self._lock:
+            self._commands.append(command)
+            # Recompiled on the next match
+            self._automaton = None
+
+    def on(self, *keywords: str, priority: int = 0, max_start: int | None = None, name: str | None = None):
+        """
+        Register the decorated function as the handler of a command.
+        See `Command` for the parameters.
+        """
+
+        def decorator(func: Callable[[CommandMatch], Any | Awaitable[Any]]):
+            self.register(Command(list(keywords), func, priority=priority, max_start=max_start, name=name))
+            return func
+
+        return decorator
+
+    def on_spec(self, spec: CommandSpec):
+        """
+        Register the decorated function as the handler of a command declared with `CommandSpec`.
+        """
+        return self.on(*spec.keywords, priority=spec.priority, max_start=spec.max_start)
+
+    def _compile(self) -> Tuple[AhoCorasick, List[Tuple[str, Command]]]:
+        with self._lock:
+            if self._automaton is None:
+                self._keyword_commands = [(_fold(keyword), command) for command in self._commands
+                                          for keyword in command.keywords]
+                self._automaton = AhoCorasick(keyword for keyword, _ in self._keyword_commands)
+            return self._automaton, self._keyword_commands
+
+    def match(self, transcript: str) -> CommandMatch | None:
+        """
+        Find the command of the transcript.
+        :return: The match of the command, None if it is not a command.
+        """
+        text = transcript.strip(_PUNCTUATIONS)
+        automaton, keyword_commands = self._compile()
+        best: Tuple[int, int, int] | None = None
+        best_match: CommandMatch | None = None
+        for start, index in automaton.find_all(_fold(text)):
+            keyword, command = keyword_commands[index]
+            if command.max_start is not None and start > command.max_start:
+                continue
+            rank = (command.priority, -start, len(keyword))
+            if best is None or rank > best:
+                best = rank
+                best_match = CommandMatch(command, text[start:start + len(keyword)], text, start)
+        return best_match
+
+
+voice_commands = CommandMatcher()
@@ -0,0 +1,155 @@
+"""
+Cancellation Token
+    A token follows a chain of work (e.g. VAD -> ASR -> LLM -> TTS -> playback) across threads and coroutines.
+    The current token is kept in a context variable:
+    `TypedEventEmitter` captures it when an event is emitted and restores it when the listener runs,
+    so every task created by a chain shares the token of the chain.
+    Long-running operations (HTTP requests, synthesis jobs, ...) check the token or register a callback,
+    which is called once when the token is cancelled, to abort themselves early.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List
+
+from loguru import logger
+
+
+class OperationCancelledError(Exception):
+    def __init__(self, msg: str = "The operation has been cancelled."):
+        super().__init__(msg)
+
+
+class CancellationToken:
+    def __init__(self, name: str = "anonymous"):
+        self.name: str = name
+        self.reason: str | None = None
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self, reason: str = "cancelled"):
+        """
+        Cancel the token and call the registered callbacks. It is safe to call it more than once.
+        :param reason: Why the token is cancelled, used for diagnosis.
+        """
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self.reason = reason
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+        logger.debug(f"Token {self.name} cancelled: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.exception(e)
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Register a callback which is called once when the token is cancelled.
+        If the token has already been cancelled, the callback is called immediately.
+        :param callback: Called in the thread that cancels the token, so it must be cheap and thread-safe.
+        :return: A function to unregister the callback.
+        """
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def _unregister(self, callback: Callable[[], None]):
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise OperationCancelledError(f"Token {self.name} has been cancelled: {self.reason}")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Block until the token is cancelled.
+        :return: True if the token is cancelled.
+        """
+        return self._cancelled.wait(timeout)
+
+    def __repr__(self):
+        return f"CancellationToken(name={self.name}, cancelled={self.cancelled})"
+
+
+_current_token: ContextVar[CancellationToken | None] = ContextVar("current_cancellation_token", default=None)
+
+
+def current_token() -> CancellationToken | None:
+    """
+    Get the token of the chain running in the current thread or coroutine.
+    """
+    return _current_token.get()
+
+
+def is_cancelled() -> bool:
+    token = _current_token.get()
+    return token is not None and token.cancelled
+
+
+def raise_if_cancelled():
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def use_token(token: CancellationToken | None):
+    """
+    Make the token current in the block, so that events emitted and operations started in it belong to its chain.
+    """
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+class CancellationScope:
+    """
+    Holds the token of the latest chain, starting a new chain cancels the previous one.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._lock = threading.Lock()
+        self._token: CancellationToken | None = None
+        self._count = 0
+
+    @property
+    def token(self) -> CancellationToken | None:
+        return self._token
+
+    def supersede(self, reason: str = "superseded") -> CancellationToken:
+        """
+        Cancel the token of the previous chain and create a token for the new one.
+        :param reason: Why the previous chain is cancelled.
+        :return: Token of the new chain.
+        """
+        with self._lock:
+            self._count += 1
+            previous, self._token = self._token, CancellationToken(f"{self._name}-{self._count}")
+            token = self._token
+        if previous is not None:
+            previous.cancel(reason)
+        return token
+
+    def cancel(self, reason: str = "cancelled"):
+        with self._lock:
+            previous, self._token = self._token, None
+        if previous is not None:
+            previous.cancel(reason)
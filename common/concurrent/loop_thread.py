@@ -0,0 +1,101 @@
+"""
+Background Event Loop
+    The pipelines are implemented with coroutines only. Synchronous callers (e.g. the LangChain agents or scripts)
+    run them on one shared event loop in a daemon thread, instead of blocking a thread per request.
+    The context of the caller, including its cancellation token, is passed to the coroutine,
+    and cancelling the token of the caller cancels the coroutine.
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import AsyncIterator, Coroutine, Iterator, TypeVar
+
+from common.concurrent.cancellation import current_token
+
+T = TypeVar("T")
+
+
+class LoopThread:
+    def __init__(self, name: str = "PipelineLoopThread"):
+        self._name = name
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        The event loop of the thread, the thread is started on first use.
+        """
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, daemon=True, name=self._name)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def run_sync(self, coro: Coroutine[None, None, T], timeout: float | None = None) -> T:
+        """
+        Run the coroutine on the loop and block until it finishes.
+        Note: Must not be called from the loop thread itself, otherwise it waits for itself forever.
+        :param coro: The coroutine to run.
+        :param timeout: Seconds to wait for the result.
+        :return: The result of the coroutine.
+        """
+        loop = self.loop
+        assert threading.current_thread() is not self._thread, f"Can not block the loop thread waiting for itself."
+        # The task is created in a copy of the context of the caller
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        token = current_token()
+        unregister = token.register(future.cancel) if token is not None else None
+        try:
+            return future.result(timeout)
+        except (concurrent.futures.CancelledError, asyncio.CancelledError):
+            if token is not None:
+                token.raise_if_cancelled()
+            raise
+        finally:
+            if unregister is not None:
+                unregister()
+
+    def iter_sync(self, agen: AsyncIterator[T]) -> Iterator[T]:
+        """
+        Iterate an asynchronous generator from synchronous code, one item per round trip to the loop.
+        """
+        try:
+            while True:
+                try:
+                    item = self.run_sync(agen.__anext__())
+                except StopAsyncIteration:
+                    break
+                yield item
+        finally:
+            aclose = getattr(agen, "aclose", None)
+            if aclose is not None:
+                self.run_sync(aclose())
+
+    def stop(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+
+
+pipeline_loop = LoopThread()
+
+
+def run_sync(coro: Coroutine[None, None, T], timeout: float | None = None) -> T:
+    return pipeline_loop.run_sync(coro, timeout)
+
+
+def iter_sync(agen: AsyncIterator[T]) -> Iterator[T]:
+    return pipeline_loop.iter_sync(agen)
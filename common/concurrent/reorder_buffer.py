@@ -0,0 +1,72 @@
+"""
+Reorder Buffer
+    Jobs submitted in order (e.g. the TTS of the clauses of a response) may finish out of order when they run in parallel.
+    Each job reserves a sequence number when it is submitted and puts its result when it finishes, or is skipped
+    if it fails or is cancelled. The results are released one at a time in the order of their sequence numbers,
+    so a result waits only for the results before it.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+_SKIPPED = object()
+
+
+class ReorderBuffer(Generic[T]):
+    def __init__(self, release: Callable[[T], Awaitable[None]]):
+        """
+        :param release: Called with the results in the order of their sequence numbers, one call at a time.
+        """
+        self._release = release
+        self._next_seq = 0
+        self._next_release = 0
+        self._pending: Dict[int, T | object] = dict()
+        self._drain_task: asyncio.Task | None = None
+
+    def reserve(self) -> int:
+        """
+        Reserve the sequence number of a job. Every reserved number must be `put` or `skip`ped,
+        otherwise the results after it are never released.
+        """
+        seq = self._next_seq
+        self._next_seq += 1
+        return seq
+
+    def put(self, seq: int, item: T):
+        """
+        Put the result of the job. Must be called in the event loop.
+        """
+        assert seq >= self._next_release and seq not in self._pending, f"Sequence number {seq} has been put."
+        self._pending[seq] = item
+        if self._drain_task is None and self._next_release in self._pending:
+            self._drain_task = asyncio.get_running_loop().create_task(self._drain())
+
+    def skip(self, seq: int):
+        """
+        The job has no result, the results after it do not wait for it.
+        """
+        self.put(seq, _SKIPPED)
+
+    @property
+    def waiting(self) -> int:
+        """
+        Number of the results waiting for the results before them.
+        """
+        return len(self._pending)
+
+    async def _drain(self):
+        try:
+            while self._next_release in self._pending:
+                item = self._pending.pop(self._next_release)
+                self._next_release += 1
+                if item is _SKIPPED:
+                    continue
+                try:
+                    await self._release(item)
+                except Exception as e:
+                    logger.exception(e)
+        finally:
+            self._drain_task = None
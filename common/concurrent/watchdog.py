@@ -0,0 +1,131 @@
+"""
+Deadline Watchdog
+    A single daemon thread watches the deadlines of all registered tasks with a min-heap,
+    instead of starting a timer or a polling thread for every call.
+    When a deadline passes, the `on_timeout` callback of the task is called once in the watchdog thread,
+    so callbacks must be cheap (e.g. logging).
+    The watchdog never cancels the task, it is only used for diagnosis.
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from loguru import logger
+
+
+class WatchedTask:
+    def __init__(self, watchdog: "DeadlineWatchdog", seq: int, name: str, timeout: float,
+                 on_timeout: Callable[["WatchedTask"], None] | None = None):
+        self._watchdog = watchdog
+        self.seq: int = seq
+        self.name: str = name
+        self.timeout: float = timeout
+        self.start: float = time.perf_counter()
+        self.deadline: float = self.start + timeout
+        self.on_timeout = on_timeout
+        # Set when the deadline has passed before `done()` is called
+        self.fired: bool = False
+        self.finished: bool = False
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    @property
+    def overdue(self) -> bool:
+        return not self.finished and time.perf_counter() > self.deadline
+
+    def done(self):
+        """
+        Tell the watchdog that the task has finished. It is safe to call it more than once.
+        """
+        if not self.finished:
+            self.finished = True
+            self._watchdog._unregister(self)
+
+    def __repr__(self):
+        return f"WatchedTask(name={self.name}, timeout={self.timeout}s, elapsed={self.elapsed:.4f}s)"
+
+
+class DeadlineWatchdog:
+    def __init__(self):
+        self._heap: List[Tuple[float, int, WatchedTask]] = []
+        self._live: Dict[int, WatchedTask] = dict()
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._thread: threading.Thread | None = None
+
+    def register(self, name: str, timeout: float,
+                 on_timeout: Callable[[WatchedTask], None] | None = None) -> WatchedTask:
+        """
+        Register a deadline, call `done()` of the returned task when the work is finished.
+        :param name: Name of the task, used for diagnosis.
+        :param timeout: Seconds before the task is considered overdue.
+        :param on_timeout: Called in the watchdog thread once the deadline has passed.
+        :return: Instance of WatchedTask.
+        """
+        assert timeout > 0, f"Timeout must be positive."
+        with self._cond:
+            task = WatchedTask(self, next(self._seq), name, timeout, on_timeout)
+            self._live[task.seq] = task
+            heapq.heappush(self._heap, (task.deadline, task.seq, task))
+            self._ensure_started()
+            # Only wake the watchdog up if the new deadline is the earliest one
+            if self._heap[0][2] is task:
+                self._cond.notify()
+        return task
+
+    def overdue(self) -> List[WatchedTask]:
+        """
+        Get the tasks that are still running and have exceeded their deadlines.
+        :return: List of overdue tasks, the oldest first.
+        """
+        with self._cond:
+            tasks = [task for task in self._live.values() if task.overdue]
+        tasks.sort(key=lambda task: task.deadline)
+        return tasks
+
+    def live(self) -> List[WatchedTask]:
+        """
+        Get all the tasks that are still running.
+        """
+        with self._cond:
+            return list(self._live.values())
+
+    def _unregister(self, task: WatchedTask):
+        with self._cond:
+            self._live.pop(task.seq, None)
+            # The heap entry is dropped lazily by the watchdog thread.
+
+    def _ensure_started(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="WatchdogThread")
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    # Drop finished tasks at the top of the heap
+                    while self._heap and self._heap[0][2].finished:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    deadline, _, task = self._heap[0]
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        heapq.heappop(self._heap)
+                        task.fired = True
+                        break
+                    self._cond.wait(remaining)
+            if task.on_timeout is not None:
+                try:
+                    task.on_timeout(task)
+                except Exception as e:
+                    logger.exception(e)
+
+
+watchdog = DeadlineWatchdog()
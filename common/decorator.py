@@ -1,8 +1,10 @@
-import threading
+import time
 from functools import wraps
 
 from loguru import logger
 
+from common.concurrent.watchdog import watchdog, WatchedTask
+
 
 def log_init(service_name: str):
     def decorator(func):
@@ -48,43 +50,31 @@ def log_stop(service_name: str):
 def log_run_time(time_limit=10):
     """
     装饰器：对函数进行实时计时，运行时间超过指定限制时实时打印警告。
+    超时检测由共享的 DeadlineWatchdog 完成，不会为每次调用创建线程。
 
     Args:
-        time_limit (int): 时间限制（秒），默认为5秒。
+        time_limit (int): 时间限制（秒），默认为10秒。
     """
 
     def decorator(func):
+        @wraps(func)
         def wrapper(*args, **kwargs):
-            import time
             start_time = time.perf_counter()
-            # 标志函数是否完成
-            finished = threading.Event()
-
-            def check_duration():
-                while not finished.is_set():
-                    elapsed_time = time.perf_counter() - start_time
-                    if elapsed_time > time_limit:
-                        # 如果尚未发出警告，则发出警告
-                        if not getattr(func, 'warned', False):
-                            logger.warning(
-                                f"Function {func.__name__} exceeded time limit. Time elapsed: {elapsed_time:.4f} seconds."
-                            )
-                            setattr(func, 'warned', True)
-                    # 简单的延时，避免过度CPU占用
-                    time.sleep(0.1)
-
-            # 启动一个后台线程来检查运行时间
-            monitor_thread = threading.Thread(target=check_duration, daemon=True)
-            monitor_thread.start()
 
+            def on_timeout(task: WatchedTask):
+                logger.warning(
+                    f"Function {func.__name__} exceeded time limit. Time elapsed: {task.elapsed:.4f} seconds."
+                )
+
+            watched = watchdog.register(func.__name__, time_limit, on_timeout)
             try:
                 result = func(*args, **kwargs)
             finally:
                 # 标志函数已完成
-                finished.set()
+                watched.done()
 
             elapsed_time = time.perf_counter() - start_time
-            if not getattr(func, 'warned', False):
+            if not watched.fired:
                 logger.info(
                     f"Function {func.__name__} completed in {elapsed_time:.4f} seconds."
                 )
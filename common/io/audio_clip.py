@@ -0,0 +1,290 @@
+"""
+Audio Clip
+    The audio of a TTS prediction with its metadata, which is parsed once from the header of the bytes
+    (RIFF/WAVE chunks, the identification header and last granule of Ogg Vorbis/Opus, the first MPEG frame),
+    so the speaker, the Live2D lip sync, the playground and the OBS subtitles do not read and decode it again.
+    Nothing here needs ffmpeg, only the PCM view of a compressed clip is decoded, on first use.
+    The mouth-open envelope of the lip sync is computed once per clip, right after the synthesis,
+    and the renderer only looks up the value at the playback position of the speaker.
+"""
+import io
+import struct
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import lfilter
+
+from common.io.file_type import AudioFileType
+from common.utils.audio_util import get_audio_real_format
+
+
+class AudioHeaderError(ValueError):
+    pass
+
+
+class AudioClip:
+    def __init__(self, data: bytes, format: AudioFileType, sample_rate: int, channels: int, duration: float,
+                 sample_width: int = 2, pcm_range: tuple[int, int] | None = None, path: Path | None = None):
+        """
+        Audio bytes with their metadata. Use `AudioClip.from_bytes` or `AudioClip.from_file` to parse them.
+        :param data: The bytes of the audio file.
+        :param format: Format of the audio.
+        :param sample_rate: The sample rate of the audio in Hz.
+        :param channels: Number of channels.
+        :param duration: Duration in seconds.
+        :param sample_width: Bytes per sample of the PCM view.
+        :param pcm_range: Start and end of the PCM samples in `data` if they are stored as is (WAV and RAW).
+        :param path: The file the bytes are saved to, if any.
+        """
+        self.data = data
+        self.format = format
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.duration = duration
+        self.sample_width = sample_width
+        self.path = path
+        self._pcm_range = pcm_range
+        self._pcm: memoryview | None = None
+        self._decoded_format: tuple[int, int] | None = None
+        self._lock = threading.Lock()
+        # Mouth-open values, one per 1 / `envelope_fps` seconds
+        self.envelope: np.ndarray | None = None
+        self.envelope_fps: float = 0.
+        # Set by the speaker, `started_at` is in the clock of `time.time()`
+        self.started = threading.Event()
+        self.started_at: float | None = None
+        self.done = threading.Event()
+
+    @staticmethod
+    def from_bytes(data: bytes, format: AudioFileType | None = None, raw_sample_rate: int = 32000,
+                   raw_channels: int = 1) -> "AudioClip":
+        """
+        Parse the metadata of the audio bytes.
+        :param data: The bytes of the audio file.
+        :param format: Format of the audio, detected from the magic bytes if None.
+        :param raw_sample_rate: Sample rate of headerless 16-bit PCM.
+        :param raw_channels: Number of channels of headerless 16-bit PCM.
+        :return: The clip.
+        """
+        if format is None:
+            format = AudioFileType(get_audio_real_format(data))
+        if format == AudioFileType.WAV:
+            return _parse_wav(data)
+        elif format == AudioFileType.OGG:
+            return _parse_ogg(data)
+        elif format == AudioFileType.MP3:
+            return _parse_mp3(data)
+        elif format == AudioFileType.RAW:
+            frame_size = raw_channels * 2
+            duration = len(data) // frame_size / raw_sample_rate
+            return AudioClip(data, format, raw_sample_rate, raw_channels, duration, pcm_range=(0, len(data)))
+        return _parse_with_soundfile(data, format)
+
+    @staticmethod
+    def from_file(path: Path) -> "AudioClip":
+        clip = AudioClip.from_bytes(Path(path).read_bytes())
+        clip.path = Path(path)
+        return clip
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_width
+
+    @property
+    def pcm(self) -> memoryview:
+        """
+        Interleaved PCM samples, `sample_width` bytes each.
+        The samples of WAV and RAW clips are a view of `data`, the others are decoded once.
+        """
+        with self._lock:
+            if self._pcm is None:
+                if self._pcm_range is not None:
+                    start, end = self._pcm_range
+                    # Whole frames only
+                    end -= (end - start) % self.frame_size
+                    self._pcm = memoryview(self.data)[start:end]
+                else:
+                    self._pcm = memoryview(self._decode())
+            return self._pcm
+
+    def samples(self) -> np.ndarray:
+        """
+        The PCM samples in float32, shape (channels, frames).
+        """
+        dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[self.sample_width]
+        data = np.frombuffer(self.pcm, dtype=dtype).astype(np.float32)
+        if self.sample_width == 1:
+            data = (data - 128) / 128
+        else:
+            data /= float(2 ** (self.sample_width * 8 - 1))
+        return data.reshape(-1, self.channels).T
+
+    def compute_envelope(self, fps: float = 60., window_ms: float = 40., smoothing_ms: float = 30.) -> np.ndarray:
+        """
+        Compute the mouth-open envelope of the lip sync, which is the RMS of the samples.
+        :param fps: Values per second.
+        :param window_ms: Length of the RMS window, centered on each value.
+        :param smoothing_ms: Time constant of the exponential smoothing.
+        :return: The envelope, also kept in `envelope`.
+        """
+        samples = self.samples()
+        num_frames = samples.shape[1]
+        # Mean power of all the channels, whose prefix sums give the sum of any window in O(1)
+        power = np.square(samples, dtype=np.float64).mean(axis=0)
+        prefix = np.concatenate(([0.], np.cumsum(power)))
+        hop = self.sample_rate / fps
+        half = int(self.sample_rate * window_ms / 2000)
+        centers = ((np.arange(int(np.ceil(num_frames / hop))) + 0.5) * hop).astype(np.int64)
+        lo = np.clip(centers - half, 0, num_frames)
+        hi = np.clip(centers + half, 0, num_frames)
+        rms = np.sqrt((prefix[hi] - prefix[lo]) / np.maximum(hi - lo, 1))
+        # One-pole low-pass filter, so the mouth does not flicker
+        alpha = 1 - np.exp(-1000 / (fps * smoothing_ms)) if smoothing_ms > 0 else 1.
+        self.envelope = lfilter([alpha], [1, alpha - 1], rms).astype(np.float32)
+        self.envelope_fps = fps
+        return self.envelope
+
+    def envelope_at(self, seconds: float) -> float | None:
+        """
+        :param seconds: Playback position.
+        :return: The mouth-open value at the position, None after the end of the clip.
+        """
+        if self.envelope is None:
+            self.compute_envelope()
+        index = int(seconds * self.envelope_fps)
+        if index >= len(self.envelope):
+            return None
+        return float(self.envelope[max(index, 0)])
+
+    def mark_started(self):
+        self.started_at = time.time()
+        self.started.set()
+
+    def _decode(self) -> bytes:
+        self.sample_width = 2
+        try:
+            data, sample_rate = sf.read(io.BytesIO(self.data), dtype="int16", always_2d=True)
+            self._decoded_format = (sample_rate, data.shape[1])
+            return data.tobytes()
+        except (RuntimeError, sf.SoundFileError):
+            # E.g. MP3 and FLV, which older versions of libsndfile do not support
+            from pydub import AudioSegment
+            audio = AudioSegment.from_file(io.BytesIO(self.data), format=self.format.value).set_sample_width(2)
+            self._decoded_format = (audio.frame_rate, audio.channels)
+            return audio.raw_data
+
+
+def _parse_wav(data: bytes) -> AudioClip:
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise AudioHeaderError("Not a RIFF/WAVE file")
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id = data[offset:offset + 4]
+        chunk_size = int.from_bytes(data[offset + 4:offset + 8], "little")
+        body = offset + 8
+        if chunk_id == b"fmt ":
+            audio_format, channels, sample_rate = struct.unpack_from("<HHI", data, body)
+            bits = struct.unpack_from("<H", data, body + 14)[0]
+            fmt = (audio_format, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise AudioHeaderError("The `data` chunk comes before the `fmt ` chunk")
+            audio_format, channels, sample_rate, bits = fmt
+            # Streamed WAV has a size of 0 or 0xFFFFFFFF, the rest of the bytes are samples
+            end = len(data) if chunk_size in (0, 0xFFFFFFFF) else min(len(data), body + chunk_size)
+            sample_width = bits // 8
+            # 1 = PCM, 0xFFFE = WAVE_FORMAT_EXTENSIBLE (PCM in practice)
+            pcm_range = (body, end) if audio_format in (1, 0xFFFE) else None
+            return AudioClip(data, AudioFileType.WAV, sample_rate, channels,
+                             duration=(end - body) // (channels * sample_width) / sample_rate,
+                             sample_width=sample_width, pcm_range=pcm_range)
+        # Chunks are aligned to 2 bytes
+        offset = body + chunk_size + (chunk_size & 1)
+    raise AudioHeaderError("No `data` chunk")
+
+
+def _parse_ogg(data: bytes) -> AudioClip:
+    if data[:4] != b"OggS" or len(data) < 28:
+        raise AudioHeaderError("Not an Ogg file")
+    segments = data[26]
+    packet = 27 + segments
+    if data[packet:packet + 7] == b"\x01vorbis":
+        channels = data[packet + 11]
+        sample_rate = int.from_bytes(data[packet + 12:packet + 16], "little")
+        pre_skip = 0
+        granule_rate = sample_rate
+    elif data[packet:packet + 8] == b"OpusHead":
+        channels = data[packet + 9]
+        pre_skip = int.from_bytes(data[packet + 10:packet + 12], "little")
+        # The granule position of Opus always counts 48 kHz samples, the decoder outputs 48 kHz too
+        sample_rate = granule_rate = 48000
+    else:
+        return _parse_with_soundfile(data, AudioFileType.OGG)
+    # The granule position of the last page is the number of samples of the stream
+    last = data.rfind(b"OggS")
+    granule = struct.unpack_from("<q", data, last + 6)[0] if last + 14 <= len(data) else -1
+    duration = max(0, granule - pre_skip) / granule_rate if granule >= 0 else 0.
+    return AudioClip(data, AudioFileType.OGG, sample_rate, channels, duration)
+
+
+# MPEG version => sample rates
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+# Layer III bitrates (kbps) of MPEG-1 and MPEG-2/2.5
+_MP3_BITRATES = {3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+                 2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)}
+
+
+def _parse_mp3(data: bytes) -> AudioClip:
+    offset = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        # ID3v2 tag, its size is a 28-bit synchsafe integer
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        offset = 10 + size
+    while offset + 4 <= len(data) and not (data[offset] == 0xFF and data[offset + 1] & 0xE0 == 0xE0):
+        offset += 1
+    if offset + 4 > len(data):
+        raise AudioHeaderError("No MPEG frame")
+    header = int.from_bytes(data[offset:offset + 4], "big")
+    version = (header >> 19) & 0b11
+    bitrate_index = (header >> 12) & 0b1111
+    rate_index = (header >> 10) & 0b11
+    if version == 1 or rate_index == 3 or bitrate_index in (0, 15):
+        return _parse_with_soundfile(data, AudioFileType.MP3)
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    channels = 1 if (header >> 6) & 0b11 == 3 else 2
+    samples_per_frame = 1152 if version == 3 else 576
+    # A Xing/Info tag in the first frame gives the number of frames of VBR files
+    side_info = (32 if channels == 2 else 17) if version == 3 else (17 if channels == 2 else 9)
+    tag = offset + 4 + side_info
+    flags = int.from_bytes(data[tag + 4:tag + 8], "big")
+    if data[tag:tag + 4] in (b"Xing", b"Info") and flags & 1:
+        frames = int.from_bytes(data[tag + 8:tag + 12], "big")
+        samples = frames * samples_per_frame
+        # The LAME tag after the optional byte count, TOC and quality fields has the encoder delay and padding
+        lame = tag + 12 + (4 if flags & 2 else 0) + (100 if flags & 4 else 0) + (4 if flags & 8 else 0)
+        if data[lame:lame + 4] in (b"LAME", b"Lavc", b"Lavf") and lame + 24 <= len(data):
+            delay = (data[lame + 21] << 4) | (data[lame + 22] >> 4)
+            padding = ((data[lame + 22] & 0x0F) << 8) | data[lame + 23]
+            samples = max(0, samples - delay - padding)
+        duration = samples / sample_rate
+    else:
+        bitrate = _MP3_BITRATES[3 if version == 3 else 2][bitrate_index] * 1000
+        duration = (len(data) - offset) * 8 / bitrate
+    return AudioClip(data, AudioFileType.MP3, sample_rate, channels, duration)
+
+
+def _parse_with_soundfile(data: bytes, format: AudioFileType) -> AudioClip:
+    try:
+        info = sf.info(io.BytesIO(data))
+    except (RuntimeError, sf.SoundFileError):
+        # E.g. FLV, the last resort is to decode it
+        clip = AudioClip(data, format, 0, 0, 0.)
+        pcm = clip.pcm
+        clip.sample_rate, clip.channels = clip._decoded_format
+        clip.duration = len(pcm) // clip.frame_size / clip.sample_rate
+        return clip
+    return AudioClip(data, format, info.samplerate, info.channels, info.duration)
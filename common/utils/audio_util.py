@@ -1,4 +1,5 @@
 import io
+import wave
 from io import BytesIO
 from pathlib import Path
 
@@ -102,3 +103,22 @@ def from_bytes_to_np_ndarray(bytes_data: bytes, dtype: str = "float32") -> (np.n
     wave_bytes_buf = io.BytesIO(bytes_data)
     data, samplerate = sf.read(wave_bytes_buf, dtype=dtype)
     return data, samplerate
+
+
+@typechecked
+def from_pcm_to_wav_bytes(pcm: bytes | memoryview, sample_rate: int, channels: int, sample_width: int = 2) -> bytes:
+    """
+    Wrap PCM data in a WAV header.
+    :param pcm: Interleaved PCM samples.
+    :param sample_rate: Sample rate of the samples.
+    :param channels: Number of channels.
+    :param sample_width: Bytes per sample.
+    :return: WAV file bytes.
+    """
+    wave_file = io.BytesIO()
+    with wave.open(wave_file, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return wave_file.getvalue()
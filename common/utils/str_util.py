@@ -8,13 +8,17 @@ def is_blank(s: str) -> bool:
     return s is None or not s.strip() or s == ""
 
 
-def split_by_punc(text: str, lang: Language) -> List[str]:
+def _cut_punc(lang: Language) -> str:
     if lang == Language.ZH:
-        cut_punc = "，。！？"
+        return "，。！？"
     elif lang == Language.JA:
-        cut_punc = "、。！？"
+        return "、。！？"
     else:
-        cut_punc = ",.!?"
+        return ",.!?"
+
+
+def split_by_punc(text: str, lang: Language) -> List[str]:
+    cut_punc = _cut_punc(lang)
 
     def punc_cut(text: str, punc: str):
         texts = []
@@ -29,3 +33,40 @@ def split_by_punc(text: str, lang: Language) -> List[str]:
         return texts
 
     return punc_cut(text, cut_punc)
+
+
+class ClauseSegmenter:
+    def __init__(self, lang: Language):
+        """
+        Incremental version of `split_by_punc` for streamed text:
+        a clause is returned as soon as the punctuation ending it arrives.
+        :param lang: Language of the text, which decides the punctuations.
+        """
+        self._cut_punc = _cut_punc(lang)
+        self._pending = ""
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Add the newly generated text.
+        :param text: Text generated since the last call.
+        :return: The clauses ended by this text, stripped and without the punctuations. Blank clauses are skipped.
+        """
+        clauses = []
+        start = 0
+        for i, char in enumerate(text):
+            if char in self._cut_punc:
+                clause = (self._pending + text[start:i]).strip()
+                self._pending = ""
+                start = i + 1
+                if clause:
+                    clauses.append(clause)
+        self._pending += text[start:]
+        return clauses
+
+    def flush(self) -> List[str]:
+        """
+        End the text.
+        :return: The last clause if the text does not end with a punctuation.
+        """
+        clause, self._pending = self._pending.strip(), ""
+        return [clause] if clause else []
@@ -1,7 +1,10 @@
 from pydantic import BaseModel, Field
 
+from agent.config import SentimentConfig
 from character.config import CharacterConfig
+from devices.config import SpeakerConfig
 from common.utils.enum_util import try_get_pynput_key_enum_str
+from event.config import EmitterConfig
 from pipeline.base.config import PipelineConfig
 from services.config import ServiceConfig
 
@@ -13,6 +16,11 @@ class SystemConfig(BaseModel):
     microphone_vad_mode: int = Field(default=3,
                                      description="Optionally, set its aggressiveness mode, which is an integer between 0 and 3. " \
                                                  "0 is the least aggressive about filtering out non-speech, 3 is the most aggressive.")
+    microphone_stream_interval_ms: int = Field(default=600,
+                                               description="While you are speaking, your speech is sent to the ASR model every this many milliseconds, "
+                                                           "so that it is recognized while you speak instead of after. \n"
+                                                           "Only the ASR models of Zerolan Core keep the state of the stream, the third-party APIs recognize the whole speech at the end. \n"
+                                                           "0 disables it.")
     microphone_hotkey: str = Field(default='f8',
                                    description="Your microphone is set to be off when the program starts. One tap on this hotkey will change its status between on and off.\n" \
                                                "You can pick your own hotkey on Key names like: {} ...".format(
@@ -21,10 +29,22 @@ class SystemConfig(BaseModel):
                                       description='If `True`, splits LLM responses into smaller clauses before sending to TTS service. '
                                                   'This enables faster audio generation and reduced latency for real-time applications. \n'
                                                   'Set to `False` to send full sentences as a single unit for more natural speech flow at the cost of longer wait times.')
+    enable_llm_stream: bool = Field(default=True,
+                                    description='If `True` (and `enable_clause_split` is `True`), streams the LLM response and sends each clause to TTS service as soon as it is generated, '
+                                                'instead of waiting for the whole response. \n'
+                                                'The filter and the history are applied once the response is complete.')
     enable_sentiment_analysis: bool = Field(default=False, description='Automatically analyzes sentiment to select appropriate TTS prompts. '
-                                                                      'This also increases token consumption and adds slight latency due to extra processing.')
+                                                                      'A local classifier is used, the LLM is only asked when it is not confident, '
+                                                                      'which increases token consumption.')
+    sentiment: SentimentConfig = Field(default=SentimentConfig(),
+                                       description="Sentiment analysis of the replies, if `enable_sentiment_analysis` is `True`.")
     enable_intelligent_memory: bool = Field(default=False,
                                             description='🧪 EXPERIMENTAL: Automatically scores and filters conversation history entries based on sentiment, relevance, and safety.')
+    speaker: SpeakerConfig = Field(default=SpeakerConfig(),
+                                   description="Playback of the TTS audio on the local speaker.")
+    emitter: EmitterConfig = Field(default=EmitterConfig(),
+                                   description="Concurrency and overload shedding of the event emitter. \n"
+                                               "When all workers are busy, events wait in per-type queues and the events with higher priority run first.")
 
 
 class ZerolanLiveRobotConfig(BaseModel):
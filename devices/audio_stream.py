@@ -0,0 +1,191 @@
+"""
+Audio Stream
+    Streamed TTS audio is played while it is still being synthesized, and never written to a file.
+    The producer writes the received chunks, the WAV header (if any) of the first chunk gives the PCM format.
+    The samples wait in an in-memory jitter buffer, from which the speaker starts reading
+    once `preroll_ms` of audio has been buffered (or the stream has ended),
+    so a chunk arriving a little late does not interrupt the playback.
+    The non-blocking methods (`ready`, `read_nowait`, `exhausted`) are for the audio callback of the speaker,
+    which must never wait.
+"""
+import threading
+import time
+from typing import Tuple
+
+from loguru import logger
+
+_RIFF_HEADER_SIZE = 12
+_CHUNK_HEADER_SIZE = 8
+
+
+class AudioStream:
+    def __init__(self, transcript: str = "", preroll_ms: int = 200, sample_rate: int = 32000, channels: int = 1,
+                 sample_width: int = 2):
+        """
+        A clip played while it is received.
+        :param transcript: Text of the clip.
+        :param preroll_ms: Milliseconds of audio buffered before the playback starts.
+        :param sample_rate: Sample rate of the audio if it has no WAV header.
+        :param channels: Number of channels of the audio if it has no WAV header.
+        :param sample_width: Bytes per sample of the audio if it has no WAV header.
+        """
+        self.transcript = transcript
+        self.preroll_ms = preroll_ms
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.underruns: int = 0
+        self._cond = threading.Condition()
+        self._head = bytearray()
+        self._format_known = False
+        self._buffer = bytearray()
+        self._ended = False
+        self._aborted = False
+        self._started = False
+        self._created_at = time.perf_counter()
+        # Set by the speaker when the clip has been played or dropped
+        self.done = threading.Event()
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_width
+
+    @property
+    def aborted(self) -> bool:
+        return self._aborted
+
+    @property
+    def format(self) -> Tuple[int, int, int] | None:
+        """
+        (sample_rate, channels, sample_width), None until the header has been received.
+        """
+        return (self.sample_rate, self.channels, self.sample_width) if self._format_known else None
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        Whether all the audio of the stream has been read.
+        """
+        with self._cond:
+            return self._aborted or (self._ended and not self._readable())
+
+    def _preroll_bytes(self) -> int:
+        return int(self.sample_rate * self.preroll_ms / 1000) * self.frame_size
+
+    def write(self, data: bytes):
+        """
+        Add a received chunk.
+        """
+        with self._cond:
+            if self._aborted or self._ended or not data:
+                return
+            if self._format_known:
+                self._buffer += data
+            else:
+                self._head += data
+                self._parse_head()
+            self._cond.notify_all()
+
+    def end(self):
+        """
+        No more chunks, the buffered audio is still played.
+        """
+        with self._cond:
+            if not self._format_known:
+                # Too short to tell, play it as raw PCM
+                self._buffer += self._head
+                self._format_known = True
+            self._ended = True
+            self._cond.notify_all()
+
+    def abort(self):
+        """
+        Stop the stream, the buffered audio is dropped.
+        """
+        with self._cond:
+            self._aborted = True
+            self._buffer.clear()
+            self._cond.notify_all()
+
+    def _parse_head(self):
+        head = self._head
+        if len(head) < 4:
+            return
+        if head[:4] != b"RIFF":
+            self._buffer += head
+            self._format_known = True
+            return
+        offset = _RIFF_HEADER_SIZE
+        while len(head) >= offset + _CHUNK_HEADER_SIZE:
+            chunk_id = bytes(head[offset:offset + 4])
+            chunk_size = int.from_bytes(head[offset + 4:offset + 8], "little")
+            body = offset + _CHUNK_HEADER_SIZE
+            if chunk_id == b"data":
+                # The size of a streamed `data` chunk is unknown (0 or 0xFFFFFFFF), the rest of the stream is PCM
+                self._buffer += head[body:]
+                self._format_known = True
+                return
+            if len(head) < body + chunk_size:
+                return
+            if chunk_id == b"fmt ":
+                self.channels = int.from_bytes(head[body + 2:body + 4], "little")
+                self.sample_rate = int.from_bytes(head[body + 4:body + 8], "little")
+                self.sample_width = int.from_bytes(head[body + 14:body + 16], "little") // 8
+            # Chunks are aligned to 2 bytes
+            offset = body + chunk_size + (chunk_size & 1)
+
+    def _is_preroll_done(self) -> bool:
+        return self._aborted or self._ended or (self._format_known and len(self._buffer) >= self._preroll_bytes())
+
+    def ready(self) -> bool:
+        """
+        Whether the playback can start (or the stream is over), without waiting.
+        """
+        with self._cond:
+            if self._started or self._is_preroll_done():
+                if not self._aborted:
+                    self._mark_started()
+                return True
+            return False
+
+    def _mark_started(self):
+        if not self._started:
+            self._started = True
+            logger.debug(f"Audio stream starts after {time.perf_counter() - self._created_at:.3f}s: "
+                         f"{self.transcript}")
+
+    def wait_preroll(self, timeout: float | None = None) -> bool:
+        """
+        Wait until enough audio is buffered to start the playback.
+        :return: False if the stream is aborted, or has ended without any audio.
+        """
+        with self._cond:
+            ready = self._cond.wait_for(self._is_preroll_done, timeout)
+            if not ready or self._aborted or len(self._buffer) < self.frame_size:
+                return False
+            self._mark_started()
+            return True
+
+    def read_nowait(self, max_bytes: int) -> bytes:
+        """
+        Take the buffered audio, whole frames only.
+        :param max_bytes: Maximum number of bytes to take.
+        :return: The audio, empty if nothing has been buffered.
+        """
+        with self._cond:
+            if not self._readable() and not self._ended and not self._aborted:
+                # The playback has caught up with the stream
+                self.underruns += 1
+            return self._take(max_bytes)
+
+    def _take(self, max_bytes: int) -> bytes:
+        if self._aborted:
+            return b""
+        size = min(max_bytes, len(self._buffer))
+        size -= size % self.frame_size
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _readable(self) -> bool:
+        return len(self._buffer) >= self.frame_size
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+
+class SpeakerConfig(BaseModel):
+    stream: bool = Field(default=False,
+                         description="If `True`, the local speaker plays the TTS audio while it is streamed from the TTS server, "
+                                     "without writing it to a file. \n"
+                                     "The TTS server must support `stream_predict`. "
+                                     "The responses are not cached and the lip of the Live2D model is not synced in this mode.")
+    preroll_ms: int = Field(default=200,
+                            description="Milliseconds of audio buffered before a streamed clip starts playing, "
+                                        "which absorbs the jitter of the chunks.")
+    sample_rate: int = Field(default=32000,
+                             description="Sample rate of the streamed audio if the server sends raw PCM without a WAV header.")
+    channels: int = Field(default=1,
+                          description="Number of channels of the streamed audio if the server sends raw PCM without a WAV header.")
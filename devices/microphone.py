@@ -1,6 +1,5 @@
-import io
 import threading
-import wave
+import uuid
 
 import pyaudio
 import webrtcvad
@@ -8,17 +7,21 @@ from loguru import logger
 
 from common.concurrent.abs_runnable import ThreadRunnable
 from common.io.file_type import AudioFileType
+from common.utils.audio_util import from_pcm_to_wav_bytes
 from event.event_data import DeviceMicrophoneVADEvent
 from event.event_emitter import emitter
 
 
 class SmartMicrophone(ThreadRunnable):
-    def __init__(self, enable_vad: bool=False, vad_mode=3, frame_duration=30):
+    def __init__(self, enable_vad: bool=False, vad_mode=3, frame_duration=30, stream_interval_ms: int = 0):
         """
         初始化智能麦克风类
         :param vad_mode: Optionally, set its aggressiveness mode, which is an integer between 0 and 3.
                          0 is the least aggressive about filtering out non-speech, 3 is the most aggressive.
         :param frame_duration: A frame must be either 10, 20, or 30 ms in duration.
+        :param stream_interval_ms: While the streamer is speaking, the new audio is emitted every this many
+                                   milliseconds as a chunk with `is_final=False`, so the ASR runs during the utterance.
+                                   0 only emits the whole utterance once it has ended.
         """
         super().__init__()
         self._enable_vad = enable_vad
@@ -41,6 +44,11 @@ class SmartMicrophone(ThreadRunnable):
 
         self._audio_frames = []
         self._is_speaking = False
+        # Streaming of the current utterance
+        self._stream_frames = max(1, stream_interval_ms // frame_duration) if stream_interval_ms > 0 else 0
+        self._utterance_id: str | None = None
+        self._streamed_frames = 0
+        self._chunk_index = 0
 
         # self._pause_event = threading.Event()
         self._stop_flag = False
@@ -93,8 +101,9 @@ class SmartMicrophone(ThreadRunnable):
             if self._vad.is_speech(data, self._sample_rate):
                 if not self._is_speaking:
                     logger.info("Voice detected: Beginning.")
-                    self._is_speaking = True
+                    self._begin_utterance()
                 self._audio_frames.append(data)
+                self._stream_chunk()
             else:
                 if self._is_speaking:
                     logger.info("Voice detected: Ending.")
@@ -103,27 +112,46 @@ class SmartMicrophone(ThreadRunnable):
                     self._audio_frames = []
         else:
             if not self._is_speaking:
-                self._is_speaking = True
+                self._begin_utterance()
             self._audio_frames.append(data)
+            self._stream_chunk()
+
+    def _begin_utterance(self):
+        self._is_speaking = True
+        self._utterance_id = uuid.uuid4().hex if self._stream_frames > 0 else None
+        self._streamed_frames = 0
+        self._chunk_index = 0
+
+    def _to_wav(self, frames: list) -> bytes:
+        return from_pcm_to_wav_bytes(b''.join(frames), sample_rate=self._sample_rate, channels=self._channels,
+                                     sample_width=self._audio.get_sample_size(self._format))
+
+    def _stream_chunk(self):
+        if self._stream_frames == 0 or len(self._audio_frames) - self._streamed_frames < self._stream_frames:
+            return
+        frames = self._audio_frames[self._streamed_frames:]
+        self._streamed_frames = len(self._audio_frames)
+        emitter.emit(DeviceMicrophoneVADEvent(
+            speech=self._to_wav(frames),
+            audio_type=AudioFileType.WAV,
+            channels=self._channels,
+            sample_rate=self._sample_rate,
+            is_final=False,
+            utterance_id=self._utterance_id,
+            chunk_index=self._chunk_index,
+        ))
+        self._chunk_index += 1
 
     def _emit_event(self):
         if self._audio_frames:
-            # 创建一个BytesIO对象来存储WAV文件
-            file = io.BytesIO()
-            wf = wave.open(file, 'wb')
-            wf.setnchannels(self._channels)
-            wf.setsampwidth(self._audio.get_sample_size(self._format))
-            wf.setframerate(self._sample_rate)
-            wf.writeframes(b''.join(self._audio_frames))
-            wf.close()
-
-            # 将BytesIO对象的指针移到开始位置
-            file.seek(0)
+            # The whole utterance, the listeners which streamed the chunks only need what follows them
             emitter.emit(DeviceMicrophoneVADEvent(
-                speech=file.read(),
+                speech=self._to_wav(self._audio_frames),
                 audio_type=AudioFileType.WAV,
                 channels=self._channels,
                 sample_rate=self._sample_rate,
+                utterance_id=self._utterance_id if self._chunk_index > 0 else None,
+                chunk_index=self._chunk_index,
             ))
 
     def _stream_update(self):
@@ -1,17 +1,32 @@
+"""
+Speaker
+    The audio clips are played by a PyAudio output stream in callback mode:
+    PortAudio calls `_callback` from its own thread whenever it needs more samples,
+    so no thread polls the playback state, and an idle speaker uses no CPU at all.
+    The clips are enqueued as PCM in memory, the samples of a WAV `AudioClip` are played without any decoding.
+    The callback moves on to the next clip within the same buffer, so the clips of the same format play without gaps.
+    When the next clip has another format (or there is none), the stream completes and is reopened for the next clip.
+    The completion of each clip is signaled by its `done` event.
+"""
 import threading
+from collections import deque
 from enum import Enum
 from pathlib import Path
-from queue import Queue
+from typing import Deque, List, Tuple
 
-import pygame
+import pyaudio
+from loguru import logger
 
 from common.concurrent.abs_runnable import ThreadRunnable
 from common.concurrent.killable_thread import KillableThread
+from common.io.audio_clip import AudioClip
+from devices.audio_stream import AudioStream
 from event.event_data import DeviceSpeakerPlayEvent
 from event.event_emitter import emitter
 
-pygame.mixer.init()
 _system_sound = False
+# Frames per buffer of the output stream
+_BUFFER_MS = 20
 
 
 class SystemSoundEnum(str, Enum):
@@ -24,6 +39,56 @@ class SystemSoundEnum(str, Enum):
     filtered: str = "filtered.wav"
 
 
+class PCMClip:
+    def __init__(self, pcm: bytes | memoryview, sample_rate: int, channels: int, sample_width: int = 2,
+                 path: Path | None = None):
+        """
+        A decoded audio clip.
+        :param pcm: Interleaved PCM samples.
+        :param path: The file it was decoded from.
+        """
+        self.format: Tuple[int, int, int] = (sample_rate, channels, sample_width)
+        self.path = path
+        # The clip whose samples are played, which follows the playback through `started` and `done`
+        self.source: AudioClip | None = None
+        self.done = threading.Event()
+        self._pcm = memoryview(pcm)
+        self._pos = 0
+
+    @staticmethod
+    def from_file(path: Path) -> "PCMClip":
+        return PCMClip.from_audio_clip(AudioClip.from_file(path))
+
+    @staticmethod
+    def from_audio_clip(clip: AudioClip) -> "PCMClip":
+        pcm = clip.pcm
+        pcm_clip = PCMClip(pcm, sample_rate=clip.sample_rate, channels=clip.channels,
+                           sample_width=clip.sample_width, path=clip.path)
+        pcm_clip.source = clip
+        pcm_clip.done = clip.done
+        return pcm_clip
+
+    @property
+    def duration(self) -> float:
+        sample_rate, channels, sample_width = self.format
+        return len(self._pcm) / (sample_rate * channels * sample_width)
+
+    def ready(self) -> bool:
+        return True
+
+    @property
+    def exhausted(self) -> bool:
+        return self._pos >= len(self._pcm)
+
+    def read_nowait(self, max_bytes: int) -> bytes:
+        data = self._pcm[self._pos:self._pos + max_bytes]
+        self._pos += len(data)
+        return data.tobytes()
+
+
+Clip = PCMClip | AudioStream
+
+
 class Speaker(ThreadRunnable):
 
     def name(self):
@@ -32,60 +97,197 @@ class Speaker(ThreadRunnable):
     def __init__(self):
         super().__init__()
         self._stop_flag = False
-        self._semaphore = threading.Event()
-        self._speaker_thread = KillableThread(target=self._run)
-        self.audio_clips: Queue[Path] = Queue()
+        self._speaker_thread = KillableThread(target=self._run, daemon=True, name="SpeakerOutputThread")
+        self._lock = threading.Lock()
+        self._clips: Deque[Clip] = deque()
+        self._current: Clip | None = None
+        # Clips started by the callback, whose events are emitted by the speaker thread
+        self._started: List[Clip] = []
+        # Wakes the speaker thread up: a clip is enqueued, started, or the output stream has completed
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._pyaudio: pyaudio.PyAudio | None = None
+        self._output: pyaudio.Stream | None = None
+        self._output_format: Tuple[int, int, int] | None = None
+        # Set by the callback when it returns `paComplete`
+        self._output_complete = threading.Event()
 
     def start(self):
         super().start()
         self._stop_flag = False
-        self._semaphore.set()
+        self._pyaudio = pyaudio.PyAudio()
         self._speaker_thread.start()
 
     def stop(self):
         super().stop()
         self._stop_flag = True
-        self.audio_clips = None
-        self._speaker_thread.kill()
+        self.flush()
+        self._wakeup.set()
+        if self._output is not None:
+            self._output.close()
+            self._output = None
+        if self._pyaudio is not None:
+            self._pyaudio.terminate()
+            self._pyaudio = None
 
     def _run(self):
+        # Sleeps until something happens, the samples themselves are pulled by the callback
         while not self._stop_flag:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self._emit_started()
+            output = self._output
+            if output is not None and output.is_active():
+                if not self._output_complete.is_set():
+                    continue
+                # PortAudio keeps a completed stream active until its last buffer has been played,
+                # and does not call back again: stopping the stream waits for it
+                output.stop_stream()
+            fmt = self._wait_head_format()
+            if fmt is not None:
+                self._open_output(fmt)
 
-            if self.audio_clips.empty():
-                self._semaphore.clear()
-            self._semaphore.wait()
-            audio_clip = self.audio_clips.get()
-            emitter.emit(DeviceSpeakerPlayEvent(audio_path=audio_clip))
-            self.playsound(audio_clip, block=True)
+    def _emit_started(self):
+        with self._lock:
+            started, self._started = self._started, []
+        for clip in started:
+            if isinstance(clip, PCMClip):
+                emitter.emit(DeviceSpeakerPlayEvent(audio_path=clip.path, duration=clip.duration))
+            else:
+                emitter.emit(DeviceSpeakerPlayEvent())
 
-    def enqueue_sound(self, path_or_data: Path):
-        self.activate_check()
-        self.audio_clips.put(path_or_data)
-        self._semaphore.set()
+    def _wait_head_format(self) -> Tuple[int, int, int] | None:
+        while not self._stop_flag:
+            with self._lock:
+                if len(self._clips) == 0:
+                    return None
+                head = self._clips[0]
+            if isinstance(head, PCMClip):
+                return head.format
+            # The format of a stream is known once its header has arrived, no need to hold the output open before
+            if head.wait_preroll() and head.format is not None:
+                return head.format
+            with self._lock:
+                if len(self._clips) > 0 and self._clips[0] is head:
+                    self._clips.popleft()
+            head.done.set()
+        return None
 
-    def stop_now(self):
-        pygame.mixer.stop()
-        self.audio_clips = Queue()
+    def _open_output(self, fmt: Tuple[int, int, int]):
+        self._output_complete.clear()
+        if self._output is not None:
+            if self._output_format == fmt:
+                # A completed stream must be stopped before it is started again
+                self._output.stop_stream()
+                self._output.start_stream()
+                return
+            self._output.close()
+        sample_rate, channels, sample_width = fmt
+        self._output_format = fmt
+        logger.debug(f"Speaker output opened: {sample_rate} Hz, {channels} channel(s), {sample_width * 8} bits")
+        self._output = self._pyaudio.open(format=self._pyaudio.get_format_from_width(sample_width),
+                                          channels=channels, rate=sample_rate, output=True,
+                                          frames_per_buffer=sample_rate * _BUFFER_MS // 1000,
+                                          stream_callback=self._callback)
 
-    @staticmethod
-    def playsound(path: Path, block: bool = True):
-        if block:
-            Speaker._sync_playsound(path)
+    def _callback(self, in_data, frame_count: int, time_info, status):
+        # Runs in the thread of PortAudio, it must never block
+        sample_rate, channels, sample_width = self._output_format
+        size = frame_count * channels * sample_width
+        out = bytearray()
+        complete = False
+        with self._lock:
+            while len(out) < size:
+                if self._current is None:
+                    self._current = self._take_next()
+                    if self._current is None:
+                        complete = len(self._clips) == 0 or self._clips[0].format not in (None, self._output_format)
+                        break
+                clip = self._current
+                data = clip.read_nowait(size - len(out))
+                out += data
+                if clip.exhausted:
+                    self._current = None
+                    clip.done.set()
+                elif len(data) == 0:
+                    # The stream is late, play silence until its next chunk
+                    break
+            if complete and len(self._clips) == 0:
+                self._idle.set()
+        out += bytes(size - len(out))
+        if complete:
+            self._output_complete.set()
+            self._wakeup.set()
+            return bytes(out), pyaudio.paComplete
+        return bytes(out), pyaudio.paContinue
+
+    def _take_next(self) -> Clip | None:
+        while len(self._clips) > 0:
+            clip = self._clips[0]
+            if isinstance(clip, AudioStream) and clip.aborted:
+                self._clips.popleft()
+                clip.done.set()
+                continue
+            if clip.format != self._output_format or not clip.ready():
+                return None
+            self._clips.popleft()
+            if isinstance(clip, PCMClip) and clip.source is not None:
+                # The lip sync follows the playback from now on
+                clip.source.mark_started()
+            self._started.append(clip)
+            self._wakeup.set()
+            return clip
+        return None
+
+    def enqueue_sound(self, path_or_data: Path | AudioClip | Clip) -> Clip:
+        """
+        Play the audio after the clips already enqueued.
+        :param path_or_data: Path of an audio file, which is decoded now, or a clip in memory.
+        :return: The clip, whose `done` event is set when it has been played or dropped.
+        """
+        self.activate_check()
+        if isinstance(path_or_data, (PCMClip, AudioStream)):
+            clip = path_or_data
+        elif isinstance(path_or_data, AudioClip):
+            clip = PCMClip.from_audio_clip(path_or_data)
         else:
-            Speaker._async_playsound(path)
+            clip = PCMClip.from_file(Path(path_or_data))
+        with self._lock:
+            self._clips.append(clip)
+            self._idle.clear()
+        self._wakeup.set()
+        return clip
 
-    @staticmethod
-    def _sync_playsound(path: Path):
-        pygame.mixer.music.load(path)
-        pygame.mixer.music.play()
-        Speaker.wait()
+    def stop_now(self):
+        self.flush()
 
-    @staticmethod
-    def wait():
-        while pygame.mixer.music.get_busy():
-            continue
+    def flush(self) -> int:
+        """
+        Drop the queued audio clips and stop the playing one.
+        :return: Number of dropped clips.
+        """
+        with self._lock:
+            dropped = list(self._clips)
+            self._clips.clear()
+            if self._current is not None:
+                dropped.append(self._current)
+                self._current = None
+            self._idle.set()
+        for clip in dropped:
+            if isinstance(clip, AudioStream):
+                clip.abort()
+            clip.done.set()
+        return len(dropped)
 
-    @staticmethod
-    def _async_playsound(path: Path):
-        sound = pygame.mixer.Sound(path)
-        pygame.mixer.Sound.play(sound)
+    def playsound(self, path: Path | AudioClip | Clip, block: bool = True):
+        clip = self.enqueue_sound(path)
+        if block:
+            clip.done.wait()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Wait until all the enqueued clips have been played.
+        :return: False if it timed out.
+        """
+        return self._idle.wait(timeout)
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+
+from common.enumerator import BaseEnum
+from common.utils.enum_util import enum_to_markdown
+
+
+class OverflowPolicy(BaseEnum):
+    DropOldest: str = "drop_oldest"
+    DropNewest: str = "drop_newest"
+    Coalesce: str = "coalesce"
+    Block: str = "block"
+
+
+class EventQueueConfig(BaseModel):
+    max_pending: int = Field(default=0, description="Maximum number of tasks of this event type waiting for a worker. \n"
+                                                    "0 means unbounded.")
+    priority: int = Field(default=1, description="Tasks with higher priority are picked first when all workers are busy. \n"
+                                                 "Event types without a queue config have priority 1.")
+    overflow: OverflowPolicy = Field(default=OverflowPolicy.DropOldest,
+                                     description=f"What to do when the queue is full. \n{enum_to_markdown(OverflowPolicy)} \n"
+                                                 "`coalesce`: Only the newest pending event is kept for each listener. \n"
+                                                 "`block`: The emitting thread waits until there is room in the queue. "
+                                                 "Coroutine listeners, events emitted in the event loop and events emitted by the synchronous listeners "
+                                                 "(which would wait for a worker while holding one) fall back to `drop_oldest`.")
+
+
+class EmitterConfig(BaseModel):
+    max_workers: int = Field(default=16, description="Maximum number of threads running synchronous listeners at the same time.")
+    max_coroutines: int = Field(default=0, description="Maximum number of coroutine listeners running at the same time. \n"
+                                                       "0 means unbounded.")
+    record_path: str = Field(default="", description="If not empty, every emitted event and the timing of every listener "
+                                                     "are appended to this file (JSON lines). \n"
+                                                     "Use `replay.py` to feed the recording back to the bot.")
+    asr: EventQueueConfig = Field(default=EventQueueConfig(max_pending=0, priority=3),
+                                  description="Queue for the speech of the streamer (VAD and ASR events).")
+    super_chat: EventQueueConfig = Field(default=EventQueueConfig(max_pending=16, priority=2,
+                                                                  overflow=OverflowPolicy.DropOldest),
+                                         description="Queue for the super chat events from live streaming platforms.")
+    gift: EventQueueConfig = Field(default=EventQueueConfig(max_pending=16, priority=2,
+                                                            overflow=OverflowPolicy.DropOldest),
+                                   description="Queue for the gift events from live streaming platforms.")
+    danmaku: EventQueueConfig = Field(default=EventQueueConfig(max_pending=8, priority=0,
+                                                               overflow=OverflowPolicy.DropOldest),
+                                      description="Queue for the danmaku events from live streaming platforms.")
@@ -51,8 +51,17 @@ class PipelineASREvent(BaseEvent):
     type: str = EventKeyRegistry.Pipeline.ASR
 
 
+class PipelineASRPartialEvent(BaseEvent):
+    # The transcript of the utterance so far, while the streamer is still speaking
+    prediction: ASRPrediction
+    utterance_id: str
+    type: str = EventKeyRegistry.Pipeline.ASR_PARTIAL
+
+
 class PipelineOutputLLMEvent(BaseEvent):
     prediction: LLMPrediction
+    # Whether the clauses have been sent to TTS while the response was streamed
+    streamed: bool = False
     type: str = EventKeyRegistry.Pipeline.LLM
 
 
@@ -89,6 +98,13 @@ class DeviceMicrophoneVADEvent(BaseEvent):
     audio_type: AudioFileType
     channels: int
     sample_rate: int
+    # False for the chunks streamed while the streamer is still speaking, which only hold the audio since the
+    # previous chunk. The final event holds the whole utterance.
+    is_final: bool = True
+    # Same for all the events of an utterance, None if the utterance was not streamed
+    utterance_id: str | None = None
+    # Index of the chunk in the utterance
+    chunk_index: int = 0
     type: str = EventKeyRegistry.Device.MICROPHONE_VAD
 
 
@@ -98,7 +114,10 @@ class DeviceMicrophoneSwitchEvent(BaseEvent):
 
 
 class DeviceSpeakerPlayEvent(BaseEvent):
-    audio_path: Path
+    # None if the audio is streamed
+    audio_path: Path | None = None
+    # Seconds, None if the audio is streamed
+    duration: float | None = None
     type: str = EventKeyRegistry.Device.SPEAKER_PLAY
 
 
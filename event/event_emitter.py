@@ -11,70 +11,158 @@ Executor:
     AsyncTaskExecutor use event loop to handle AsyncCoros.
     SyncTaskExecutor use thread pool to handle SyncFuncs.
 
+Dispatch:
+    In `DispatchMode.DIRECT` (default), `emit()` hands the task straight to the thread pool or the event loop.
+    In `DispatchMode.QUEUED`, tasks go through an intermediate queue and a dispatcher thread first.
+    Listeners registered with `inline=True` are cheap synchronous handlers and run in the emitting thread.
+    For each task, the time spent waiting for a worker and the time spent running are reported separately.
+
+Overload:
+    Both executors run a bounded number of tasks at the same time, the others wait in `PendingTasks`.
+    Each event type can have its own `EventPolicy`: a queue size, a priority and an `OverflowPolicy`.
+    When all workers are busy, the pending task with the highest priority runs first.
+    Dropped and coalesced tasks are counted in `TypedEventEmitter.stats`.
+
+Lane:
+    A listener can be registered with a lane key (`emitter.on(event, lane=...)`).
+    Tasks sharing a lane key run one at a time in the order they were emitted, even across event types,
+    while tasks in different lanes still run in parallel.
+    Lanes of synchronous and coroutine listeners are independent of each other.
+
+Cancellation:
+    The current `CancellationToken` is captured when an event is emitted and is current again when the listener runs,
+    so the tasks of an event chain share one token.
+    Tasks whose token is cancelled before they start are skipped, running coroutines are cancelled.
+
+Recording:
+    With a recorder set (`emitter.set_recorder(...)`), every emitted event and the timing of every task are recorded,
+    see `event.recorder`.
+
+Hot path:
+    `emit()`, `add_sync_task()` and `add_async_task()` are called for every event, so they are not `@typechecked`,
+    cheap `assert`s are used instead. Running with `python -O` strips them, together with all `@typechecked` checks.
+
 Timeout:
     By default, the timeout duration of a task is 5 seconds,
     and once this event is exceeded, it will be printed on the log.
     The operation will not cancel the task, but only for the diagnosis of the function called.
+    Deadlines are watched by the shared `DeadlineWatchdog`, no thread is created per task.
 """
 import asyncio
 import inspect
 import queue
 import threading
 import time
-import uuid
+import itertools
+import os
 from abc import abstractmethod
 from asyncio import Queue
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
-from typing import Callable, Dict, List
+from enum import Enum
+from typing import Callable, Dict, List, Set, Deque, TYPE_CHECKING
 
 from loguru import logger
 from typeguard import typechecked
 
+from common.concurrent.cancellation import CancellationToken, OperationCancelledError, current_token, use_token
 from common.concurrent.killable_thread import KillableThread
+from common.concurrent.watchdog import watchdog, WatchedTask
+from event.config import OverflowPolicy, EventQueueConfig, EmitterConfig
 from event.event_data import BaseEvent
 
+if TYPE_CHECKING:
+    from event.recorder import EventRecorder
+
 
 class Timer:
-    def __init__(self, timeout: int, timeout_handler: Callable):
-        self._start: int | None = None
-        self._end: int | None = None
+    def __init__(self, name: str, timeout: int, timeout_handler: Callable):
+        self._name = name
+        self._start: float | None = None
+        self._end: float | None = None
         self._timeout: int | None = timeout
-        if self._timeout:
-            self._thread_timer = threading.Timer(self._timeout, timeout_handler)
+        self._timeout_handler = timeout_handler
+        self._watched: WatchedTask | None = None
 
     def start(self):
-        self._start = time.time()
+        self._start = time.perf_counter()
         if self._timeout:
-            self._thread_timer.start()
+            self._watched = watchdog.register(self._name, self._timeout, lambda _: self._timeout_handler())
 
     def stop(self):
-        self._end = time.time()
-        self._thread_timer.cancel()
+        self._end = time.perf_counter()
+        if self._watched is not None:
+            self._watched.done()
+
+    @property
+    def started_at(self) -> float | None:
+        return self._start
 
     @property
     def elapsed(self):
         if self._start and self._end:
             return self._end - self._start
         if self._start:
-            return time.time() - self._end
+            return time.perf_counter() - self._start
         raise Exception("Timer has not been started")
 
 
+_task_ids = itertools.count(1)
+
+
 class BaseTask:
     def __init__(self, target, name: str = None, timeout: int = None):
-        self.id = str(uuid.uuid4())
+        # Only used in logs, a counter is much cheaper than uuid4
+        self.id = str(next(_task_ids))
         assert target is not None, f"Target is null."
         self.name = self.id if name is None else name
         self.target = target
         self._args = None
         self._kwargs = {}
         self.exception = None
-        self.timer = Timer(timeout, lambda: logger.warning(f"Task(id={self.id}) {self.name} timeout for {timeout}s!"))
+        self.timer = Timer(self.name, timeout,
+                           lambda: logger.warning(f"Task(id={self.id}) {self.name} timeout for {timeout}s!"))
+        # Set when the task is created, i.e. when the event is emitted
+        self.created_at: float = time.perf_counter()
+        self.event_type: str | None = None
+        self.stats: "DispatchStats | None" = None
+        # Tasks with the same lane key never run at the same time
+        self.lane: str | None = None
+        # Token of the event chain, captured when the event is emitted
+        self.token: CancellationToken | None = current_token()
+        self.recorder: "EventRecorder | None" = None
 
     @abstractmethod
     def execute(self):
         raise NotImplementedError()
 
+    @property
+    def queue_wait(self) -> float:
+        """
+        Seconds between the event being emitted and the task starting to run.
+        """
+        if self.timer.started_at is None:
+            return time.perf_counter() - self.created_at
+        return self.timer.started_at - self.created_at
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token is not None and self.token.cancelled
+
+    def _skip(self, kind: str):
+        logger.debug(f"{kind}(id={self.id}) {self.name} skipped, token {self.token.name} has been cancelled")
+        if self.stats is not None and self.event_type is not None:
+            self.stats.record_cancelled(self.event_type)
+
+    def _report(self, kind: str):
+        wait, run = self.queue_wait, self.timer.elapsed
+        # Formatted lazily, it costs nothing when the debug level is off
+        logger.debug("{}(id={}) {} waited {:.4f} s in queue, execution costs {:.4f} s", kind, self.id, self.name, wait, run)
+        if self.stats is not None and self.event_type is not None:
+            self.stats.record(self.event_type, wait, run)
+        if self.recorder is not None:
+            self.recorder.record_task(self, wait, run)
+
     def set_args(self, *args):
         self._args = args
 
@@ -84,16 +172,22 @@ class BaseTask:
 
 class SyncFunc(BaseTask):
     def execute(self):
+        if self.cancelled:
+            self._skip("Function")
+            return
         self.timer.start()
         try:
-            self.target(*self._args, **self._kwargs)
+            with use_token(self.token):
+                self.target(*self._args, **self._kwargs)
+        except OperationCancelledError:
+            logger.debug(f"Function(id={self.id}) {self.name} cancelled")
         except Exception as e:
             self.exception = e
             logger.exception(e)
             raise e
         finally:
             self.timer.stop()
-            logger.debug(f"Function(id={self.id}) {self.name} execution costs {self.timer.elapsed} s")
+            self._report("Function")
 
     def __init__(self, target, name: str = None, timeout: int = None):
         super().__init__(target, name, timeout)
@@ -101,56 +195,377 @@ class SyncFunc(BaseTask):
 
 class AsyncCoro(BaseTask):
     async def execute(self):
+        if self.cancelled:
+            self._skip("Coroutine")
+            return
         self.timer.start()
         try:
-            await self.target(*self._args, **self._kwargs)
+            with use_token(self.token):
+                await self.target(*self._args, **self._kwargs)
+        except (asyncio.CancelledError, OperationCancelledError):
+            logger.debug(f"Coroutine(id={self.id}) {self.name} cancelled")
         except Exception as e:
             self.exception = e
             logger.exception(e)
             raise e
         finally:
             self.timer.stop()
-            logger.debug(f"Coroutine(id={self.id}) {self.name} execution costs {self.timer.elapsed} s")
+            self._report("Coroutine")
 
     def __init__(self, target, name: str = None, timeout: int = None):
         super().__init__(target, name, timeout)
 
 
-class AsyncTaskExecutor:
+class DispatchMode(str, Enum):
+    # emit() -> queue -> dispatcher -> thread pool / event loop
+    QUEUED = "queued"
+    # emit() -> thread pool / event loop
+    DIRECT = "direct"
+
+
+class DispatchStats:
+    """
+    Aggregated queue-wait and run time of the tasks created for each event type,
+    and the number of tasks dropped or coalesced under overload, or skipped because their chain was cancelled.
+    """
+
     def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = dict()
+
+    def _get(self, event_type: str) -> Dict[str, float]:
+        stat = self._stats.get(event_type, None)
+        if stat is None:
+            stat = {"count": 0, "total_wait": 0., "max_wait": 0., "total_run": 0., "max_run": 0.,
+                    "dropped": 0, "coalesced": 0, "cancelled": 0}
+            self._stats[event_type] = stat
+        return stat
+
+    def record(self, event_type: str, wait: float, run: float):
+        with self._lock:
+            stat = self._get(event_type)
+            stat["count"] += 1
+            stat["total_wait"] += wait
+            stat["total_run"] += run
+            stat["max_wait"] = max(stat["max_wait"], wait)
+            stat["max_run"] = max(stat["max_run"], run)
+
+    def record_dropped(self, event_type: str):
+        with self._lock:
+            self._get(event_type)["dropped"] += 1
+
+    def record_coalesced(self, event_type: str):
+        with self._lock:
+            self._get(event_type)["coalesced"] += 1
+
+    def record_cancelled(self, event_type: str):
+        with self._lock:
+            self._get(event_type)["cancelled"] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get a snapshot of the statistics.
+        :return: Event type => {count, avg_wait, max_wait, avg_run, max_run, dropped, coalesced, cancelled} (seconds).
+        """
+        with self._lock:
+            result = dict()
+            for event_type, stat in self._stats.items():
+                count = stat["count"]
+                result[event_type] = {
+                    "count": count,
+                    "avg_wait": stat["total_wait"] / count if count else 0.,
+                    "max_wait": stat["max_wait"],
+                    "avg_run": stat["total_run"] / count if count else 0.,
+                    "max_run": stat["max_run"],
+                    "dropped": stat["dropped"],
+                    "coalesced": stat["coalesced"],
+                    "cancelled": stat["cancelled"],
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class EventPolicy:
+    def __init__(self, max_pending: int = 0, priority: int = 1,
+                 overflow: OverflowPolicy = OverflowPolicy.DropOldest):
+        """
+        Overload policy of an event type.
+        :param max_pending: Maximum number of pending tasks, 0 means unbounded.
+        :param priority: Pending tasks with higher priority run first.
+        :param overflow: What to do when the pending queue is full.
+        """
+        self.max_pending: int = max_pending
+        self.priority: int = priority
+        self.overflow: OverflowPolicy = overflow
+
+    @staticmethod
+    def from_config(config: EventQueueConfig) -> "EventPolicy":
+        return EventPolicy(max_pending=config.max_pending, priority=config.priority, overflow=config.overflow)
+
+
+_default_policy = EventPolicy()
+
+
+class PendingTasks:
+    """
+    Tasks waiting for a free worker, one FIFO queue per event type.
+    A task whose lane is busy, or which is not the oldest waiting task of its lane, is skipped by `pop()`.
+    Not thread-safe: the owner must hold `cond` when calling any method.
+    """
+
+    def __init__(self, stats: DispatchStats, cond: threading.Condition | None = None):
+        self._stats = stats
+        self._cond = cond
+        self._queues: Dict[str, Deque[BaseTask]] = dict()
+        self._policies: Dict[str, EventPolicy] = dict()
+        self._size = 0
+        # Lane key => waiting tasks of the lane in emission order
+        self._lanes: Dict[str, Deque[BaseTask]] = dict()
+        self._busy_lanes: Set[str] = set()
+
+    def set_policy(self, event_type: str, policy: EventPolicy):
+        self._policies[event_type] = policy
+
+    def policy_of(self, event_type: str) -> EventPolicy:
+        return self._policies.get(event_type, _default_policy)
+
+    def __len__(self):
+        return self._size
+
+    def put(self, task: BaseTask, can_block: bool = False) -> bool:
+        """
+        Add a task to its queue, applying the overflow policy of its event type.
+        :param task: The task to add.
+        :param can_block: Whether the caller can wait on `cond` when the policy is `block`.
+        :return: False if the task itself was dropped.
+        """
+        event_type = task.event_type
+        policy = self.policy_of(event_type)
+        q = self._queues.get(event_type, None)
+        if q is None:
+            q = deque()
+            self._queues[event_type] = q
+
+        if policy.overflow == OverflowPolicy.Coalesce:
+            # Only the newest pending event is kept for each listener
+            for idx, pending in enumerate(q):
+                if pending.target is task.target and pending.lane == task.lane:
+                    q[idx] = task
+                    if task.lane is not None:
+                        lane = self._lanes[task.lane]
+                        lane[lane.index(pending)] = task
+                    self._stats.record_coalesced(event_type)
+                    return True
+
+        if 0 < policy.max_pending <= len(q):
+            if policy.overflow == OverflowPolicy.DropNewest:
+                self._stats.record_dropped(event_type)
+                logger.warning(f"Queue of {event_type} is full, the new task {task.name} is dropped.")
+                return False
+            elif policy.overflow == OverflowPolicy.Block and can_block and self._cond is not None:
+                while 0 < policy.max_pending <= len(q):
+                    self._cond.wait()
+                    # `clear()` may have replaced the queue while waiting
+                    q = self._queues.setdefault(event_type, q)
+            else:
+                dropped = q.popleft()
+                self._size -= 1
+                if dropped.lane is not None:
+                    self._lanes[dropped.lane].remove(dropped)
+                self._stats.record_dropped(event_type)
+                logger.warning(f"Queue of {event_type} is full, the oldest task {dropped.name} is dropped.")
+
+        q.append(task)
+        self._size += 1
+        if task.lane is not None:
+            lane = self._lanes.get(task.lane, None)
+            if lane is None:
+                lane = deque()
+                self._lanes[task.lane] = lane
+            lane.append(task)
+        return True
+
+    def _runnable(self, task: BaseTask) -> bool:
+        if task.lane is None:
+            return True
+        return task.lane not in self._busy_lanes and self._lanes[task.lane][0] is task
+
+    def pop(self) -> BaseTask | None:
+        """
+        Remove and get the oldest runnable task of the queue with the highest priority.
+        The lane of the returned task is busy until `release()` is called.
+        """
+        selected: BaseTask | None = None
+        selected_q: Deque[BaseTask] | None = None
+        selected_priority = None
+        for event_type, q in self._queues.items():
+            candidate = None
+            for task in q:
+                if self._runnable(task):
+                    candidate = task
+                    break
+            if candidate is None:
+                continue
+            priority = self.policy_of(event_type).priority
+            if selected is None or priority > selected_priority or \
+                    (priority == selected_priority and candidate.created_at < selected.created_at):
+                selected, selected_q, selected_priority = candidate, q, priority
+        if selected is None:
+            return None
+        selected_q.remove(selected)
+        self._size -= 1
+        if selected.lane is not None:
+            lane = self._lanes[selected.lane]
+            lane.popleft()
+            if not lane:
+                del self._lanes[selected.lane]
+            self._busy_lanes.add(selected.lane)
+        if self._cond is not None:
+            # Wake up the emitters blocked on a full queue
+            self._cond.notify_all()
+        return selected
+
+    def release(self, task: BaseTask):
+        """
+        Free the lane of a finished task.
+        """
+        if task.lane is not None:
+            self._busy_lanes.discard(task.lane)
+
+    def clear(self):
+        for q in self._queues.values():
+            # The emitters blocked on a full queue check its length
+            q.clear()
+        self._queues.clear()
+        self._lanes.clear()
+        self._busy_lanes.clear()
+        self._size = 0
+        if self._cond is not None:
+            self._cond.notify_all()
+
+
+def _default_max_workers() -> int:
+    # Same as the default of ThreadPoolExecutor
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+class AsyncTaskExecutor:
+    def __init__(self, stats: DispatchStats, max_concurrency: int = 0, mode: DispatchMode = DispatchMode.DIRECT):
+        self._mode = mode
         self._async_tasks: Queue[AsyncCoro] = Queue()
+        self._loop: asyncio.AbstractEventLoop | None = None
         # Pending tasks may be deleted by Python-GC,
         # so use strong reference to avoid this issue!
-        self._submitted_tasks: List[asyncio.Task] = []
+        self._submitted_tasks: Set[asyncio.Task] = set()
+        # All the fields below are only accessed in the event loop thread
+        self._max_concurrency = max_concurrency
+        self._running = 0
+        self.pending = PendingTasks(stats)
+
+    def set_max_concurrency(self, max_concurrency: int):
+        """
+        :param max_concurrency: Maximum number of coroutines running at the same time, 0 means unbounded.
+        """
+        self._max_concurrency = max_concurrency
 
     async def start(self):
+        self._loop = asyncio.get_running_loop()
         await self._async_event_loop()
 
     async def stop(self):
-        for task in self._submitted_tasks:
+        self.pending.clear()
+        for task in list(self._submitted_tasks):
             task.cancel()
 
     async def _async_event_loop(self):
         while True:
             task = await self._async_tasks.get()
             if task:
-                t = asyncio.create_task(task.execute())
-                self._submitted_tasks.append(t)
+                self._dispatch(task)
+
+    def _dispatch(self, task: AsyncCoro):
+        # The event loop can not be blocked, so `block` works like `drop_oldest` here
+        if self.pending.put(task, can_block=False):
+            self._schedule()
+
+    def _schedule(self):
+        while self._max_concurrency <= 0 or self._running < self._max_concurrency:
+            task = self.pending.pop()
+            if task is None:
+                break
+            self._submit(task)
+
+    def _submit(self, task: AsyncCoro):
+        self._running += 1
+        t = asyncio.create_task(task.execute())
+        self._submitted_tasks.add(t)
+        unregister = None
+        if task.token is not None:
+            # Cancelling the token of the chain cancels the running coroutine too
+            loop = self._loop if self._loop is not None else asyncio.get_running_loop()
+            unregister = task.token.register(lambda: loop.call_soon_threadsafe(t.cancel))
+        t.add_done_callback(lambda done: self._on_done(done, task, unregister))
+
+    def _on_done(self, t: asyncio.Task, task: AsyncCoro, unregister: Callable | None = None):
+        if unregister is not None:
+            unregister()
+        self._submitted_tasks.discard(t)
+        self._running -= 1
+        self.pending.release(task)
+        self._schedule()
 
-    @typechecked
     def add_async_task(self, func: AsyncCoro):
-        self._async_tasks.put_nowait(func)
+        assert isinstance(func, AsyncCoro)
+        loop = self._loop
+        if self._mode == DispatchMode.QUEUED or loop is None:
+            # Before the executor starts, tasks wait in the queue
+            self._async_tasks.put_nowait(func)
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            self._dispatch(func)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, func)
 
 
 class SyncTaskExecutor:
-    def __init__(self, max_workers: int | None = None):
+    def __init__(self, stats: DispatchStats, max_workers: int | None = None,
+                 mode: DispatchMode = DispatchMode.DIRECT):
+        self._mode = mode
         self._sync_tasks: queue.Queue = queue.Queue()
-        self._thread_pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._max_workers = max_workers if max_workers else _default_max_workers()
+        self._thread_pool = ThreadPoolExecutor(max_workers=self._max_workers)
+        self._cond = threading.Condition()
+        self._running = 0
+        self.pending = PendingTasks(stats, self._cond)
+
+    @property
+    def mode(self) -> DispatchMode:
+        return self._mode
+
+    def set_max_workers(self, max_workers: int):
+        assert max_workers > 0, f"There must be at least 1 worker."
+        with self._cond:
+            if max_workers == self._max_workers:
+                return
+            self._max_workers = max_workers
+            old_pool, self._thread_pool = self._thread_pool, ThreadPoolExecutor(max_workers=max_workers)
+        # Running tasks in the old pool will finish normally
+        old_pool.shutdown(wait=False)
 
     def start(self):
         self._sync_event_loop()
 
     def stop(self):
+        with self._cond:
+            self.pending.clear()
+            self._cond.notify_all()
         try:
             self._thread_pool.shutdown(wait=False, cancel_futures=True)
         except Exception as e:
@@ -161,17 +576,85 @@ class SyncTaskExecutor:
             task = self._sync_tasks.get(block=True)
             logger.debug("Get sync task running")
             if task:
-                self._thread_pool.submit(task.execute)
+                self._dispatch(task, can_block=True)
+
+    def _dispatch(self, task: SyncFunc, can_block: bool):
+        with self._cond:
+            if self.pending.put(task, can_block=can_block):
+                self._schedule()
+
+    def _schedule(self):
+        # The caller must hold `_cond`
+        while self._running < self._max_workers:
+            task = self.pending.pop()
+            if task is None:
+                break
+            self._running += 1
+            self._thread_pool.submit(self._worker, task)
+
+    def _worker(self, task: SyncFunc):
+        _worker_state.active = True
+        try:
+            self._work(task)
+        finally:
+            _worker_state.active = False
+
+    def _work(self, task: SyncFunc):
+        # Keep the worker busy with the pending tasks instead of handing them back to the pool
+        while task is not None:
+            try:
+                task.execute()
+            except Exception:
+                # Already logged by the task itself
+                pass
+            with self._cond:
+                self.pending.release(task)
+                task = self.pending.pop()
+                if task is None:
+                    self._running -= 1
+                    # The released lane may let other waiting tasks run
+                    self._schedule()
 
-    @typechecked
     def add_sync_task(self, func: SyncFunc):
-        self._sync_tasks.put_nowait(func)
+        assert isinstance(func, SyncFunc)
+        if self._mode == DispatchMode.QUEUED:
+            self._sync_tasks.put_nowait(func)
+        else:
+            # Only the workers can make room in a full queue, a worker waiting for it could wait forever
+            self._dispatch(func, can_block=not _in_event_loop() and not _in_worker())
+
+
+# Whether the current thread is a worker of a `SyncTaskExecutor`
+_worker_state = threading.local()
+
+
+def _in_worker() -> bool:
+    return getattr(_worker_state, "active", False)
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+LaneKey = str | Callable[[BaseEvent], str | None] | None
 
 
 class Listener:
-    def __init__(self, func: Callable, once: bool = False):
+    def __init__(self, func: Callable, once: bool = False, inline: bool = False, lane: LaneKey = None):
         self.func: Callable = func
         self.once: bool = once
+        # Inline listeners run in the emitting thread, only use it for cheap, non-blocking handlers
+        self.inline: bool = inline
+        self.lane: LaneKey = lane
+
+    def lane_of(self, event: BaseEvent) -> str | None:
+        if callable(self.lane):
+            return self.lane(event)
+        return self.lane
 
 
 class TypedEventEmitter:
@@ -179,41 +662,97 @@ class TypedEventEmitter:
     TypedEventEmitter Ver2
     Github@AkagawaTsurunaki
     """
-    def __init__(self):
-        self._sync_executor = SyncTaskExecutor()
-        self._async_executor = AsyncTaskExecutor()
+    def __init__(self, mode: DispatchMode = DispatchMode.DIRECT):
+        self._mode = mode
+        self.stats = DispatchStats()
+        self._sync_executor = SyncTaskExecutor(self.stats, mode=mode)
+        self._async_executor = AsyncTaskExecutor(self.stats, mode=mode)
         self.sync_executor_thread: KillableThread | None = None
         self._async_executor_task: asyncio.Task | None = None
 
         self._listeners: Dict[str, List[Listener]] = dict()
+        self._recorder: "EventRecorder | None" = None
+
+    def set_recorder(self, recorder: "EventRecorder | None"):
+        """
+        Record every emitted event and the timing of every task, set `None` to stop recording.
+        :param recorder: Instance of EventRecorder.
+        """
+        self._recorder = recorder
+
+    def is_idle(self) -> bool:
+        """
+        Whether no task is running or waiting for a worker.
+        """
+        sync_executor, async_executor = self._sync_executor, self._async_executor
+        return sync_executor._running == 0 and len(sync_executor.pending) == 0 and \
+            async_executor._running == 0 and len(async_executor.pending) == 0
+
+    def set_policy(self, event: str, policy: EventPolicy):
+        """
+        Set the overload policy for an event type.
+        :param event: Event name, see `EventKeyRegistry`.
+        :param policy: Instance of EventPolicy.
+        """
+        with self._sync_executor._cond:
+            self._sync_executor.pending.set_policy(event, policy)
+        # Replacing a dict item is atomic, the event loop thread is safe to read it
+        self._async_executor.pending.set_policy(event, policy)
+
+    def configure(self, config: EmitterConfig, policies: Dict[str, EventQueueConfig] | None = None):
+        """
+        Apply the emitter config.
+        :param config: Instance of EmitterConfig.
+        :param policies: Event name => queue config.
+        """
+        self._sync_executor.set_max_workers(config.max_workers)
+        self._async_executor.set_max_concurrency(config.max_coroutines)
+        if policies:
+            for event, queue_config in policies.items():
+                self.set_policy(event, EventPolicy.from_config(queue_config))
 
     async def start(self):
-        self.sync_executor_thread = KillableThread(target=self._sync_executor.start, daemon=True)
+        if self._mode == DispatchMode.QUEUED:
+            self.sync_executor_thread = KillableThread(target=self._sync_executor.start, daemon=True)
+            self.sync_executor_thread.start()
         self._async_executor_task = asyncio.create_task(self._async_executor.start())
-        self.sync_executor_thread.start()
-        logger.info("TypedEventEmitter is running...")
+        logger.info(f"TypedEventEmitter is running ({self._mode.value} dispatch)...")
         await self._async_executor_task
-        self.sync_executor_thread.join()
+        if self.sync_executor_thread:
+            self.sync_executor_thread.join()
 
     async def stop(self):
+        self._sync_executor.stop()
         if self.sync_executor_thread:
-            self._sync_executor.stop()
             self.sync_executor_thread.kill()
         if self._async_executor_task:
             await self._async_executor.stop()
             self._async_executor_task.cancel()
 
-    def _add_task(self, func: Callable, event_data: BaseEvent):
+    def _add_task(self, listener: Listener, event_data: BaseEvent):
+        func = listener.func
         if inspect.iscoroutinefunction(func):
             # Coroutine function
-            async_coro = AsyncCoro(target=func, name=func.__name__, timeout=5)
-            async_coro.set_args(event_data)
-            self._async_executor.add_async_task(async_coro)
+            task = AsyncCoro(target=func, name=func.__name__, timeout=5)
         else:
             # Sync function
-            sync_func = SyncFunc(target=func, name=func.__name__, timeout=5)
-            sync_func.set_args(event_data)
-            self._sync_executor.add_sync_task(sync_func)
+            task = SyncFunc(target=func, name=func.__name__, timeout=5)
+        task.set_args(event_data)
+        task.event_type = event_data.type
+        task.stats = self.stats
+        task.lane = listener.lane_of(event_data)
+        task.recorder = self._recorder
+
+        if isinstance(task, AsyncCoro):
+            self._async_executor.add_async_task(task)
+        elif listener.inline:
+            try:
+                task.execute()
+            except Exception:
+                # Already logged by the task itself
+                pass
+        else:
+            self._sync_executor.add_sync_task(task)
 
     def _add_listener(self, event: str, listener: Listener):
         if self._listeners.get(event, None) is None:
@@ -223,27 +762,46 @@ class TypedEventEmitter:
     def _create_tasks(self, event: str, event_data: BaseEvent):
         listeners = self._listeners.get(event, None)
         if listeners:
-            for listener in listeners:
+            for listener in list(listeners):
                 if listener.once:
                     listeners.remove(listener)
-                self._add_task(listener.func, event_data)
+                self._add_task(listener, event_data)
 
     @typechecked
-    def on(self, event: str):
+    def on(self, event: str, inline: bool = False, lane: LaneKey = None):
+        """
+        Register a listener for the event.
+        :param event: Event name, see `EventKeyRegistry`.
+        :param inline: If `True`, the (synchronous) listener runs directly in the emitting thread.
+                       Only use it for cheap handlers that never block.
+        :param lane: Lane key, or a function that gets the lane key from the event.
+                     Tasks with the same lane key run one at a time in emission order.
+        """
+
         def decorator(func: Callable):
-            self._add_listener(event=event, listener=Listener(func=func, once=False))
+            self._add_listener(event=event, listener=self._create_listener(func, False, inline, lane))
 
         return decorator
 
     @typechecked
-    def once(self, event: str):
+    def once(self, event: str, inline: bool = False, lane: LaneKey = None):
         def decorator(func: Callable):
-            self._add_listener(event=event, listener=Listener(func=func, once=True))
+            self._add_listener(event=event, listener=self._create_listener(func, True, inline, lane))
 
         return decorator
 
-    @typechecked
+    @staticmethod
+    def _create_listener(func: Callable, once: bool, inline: bool, lane: LaneKey) -> Listener:
+        if inline:
+            assert not inspect.iscoroutinefunction(func), "Coroutine listeners can not be inline."
+            assert lane is None, "Inline listeners can not have a lane."
+        return Listener(func=func, once=once, inline=inline, lane=lane)
+
     def emit(self, event: BaseEvent):
+        assert isinstance(event, BaseEvent), f"Event must be an instance of BaseEvent, got {type(event)}."
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.record_event(event)
         self._create_tasks(event.type, event)
 
 
@@ -0,0 +1,151 @@
+"""
+Event Recorder
+    Every event emitted by `TypedEventEmitter` and the timing of every listener task are appended to a JSON lines file.
+    Each line is a record:
+        {"kind": "header", "version": 1, "started_at": <unix time>}
+        {"kind": "event", "t": <seconds since start>, "cls": <class name>, "event": <event fields>}
+        {"kind": "task", "t": <seconds since start>, "type": <event type>, "listener": <name>,
+         "wait": <seconds>, "run": <seconds>, "error": <bool>}
+    Bytes are encoded as `{"$bytes": <base64>}`, other values that JSON can not represent are stored as their `repr`.
+    The file is only appended, so a recording survives a crash except for the last line.
+"""
+import base64
+import json
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Iterator, Dict, Any, Type, TYPE_CHECKING
+
+from loguru import logger
+from pydantic import BaseModel
+
+from event.event_data import BaseEvent
+
+if TYPE_CHECKING:
+    from event.event_emitter import BaseTask
+
+RECORDING_VERSION = 1
+
+
+def _default(obj: Any):
+    if isinstance(obj, (bytes, bytearray)):
+        return {"$bytes": base64.b64encode(obj).decode("ascii")}
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    return repr(obj)
+
+
+def _object_hook(obj: Dict[str, Any]):
+    if len(obj) == 1 and "$bytes" in obj:
+        return base64.b64decode(obj["$bytes"])
+    return obj
+
+
+class EventRecorder:
+    def __init__(self, path: str | Path, record_tasks: bool = True):
+        """
+        Append the emitted events to a recording file.
+        :param path: Path of the recording file, created if it does not exist.
+        :param record_tasks: Whether the queue-wait and run time of the listeners are recorded too.
+        """
+        self.path = Path(path)
+        self.record_tasks = record_tasks
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Line buffered, so that every record reaches the file as soon as it is written
+        self._file = open(self.path, mode="a", encoding="utf-8", buffering=1)
+        self._write({"kind": "header", "version": RECORDING_VERSION, "started_at": time.time()})
+        logger.info(f"Recording events to {self.path}")
+
+    def _write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=_default)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+
+    def _now(self) -> float:
+        return round(time.perf_counter() - self._start, 6)
+
+    def record_event(self, event: BaseEvent):
+        self._write({"kind": "event", "t": self._now(), "cls": type(event).__name__,
+                     "event": event.model_dump()})
+
+    def record_task(self, task: "BaseTask", wait: float, run: float):
+        if not self.record_tasks:
+            return
+        self._write({"kind": "task", "t": self._now(), "type": task.event_type, "listener": task.name,
+                     "wait": round(wait, 6), "run": round(run, 6), "error": task.exception is not None})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RecordedEvent:
+    def __init__(self, t: float, event: BaseEvent):
+        # Seconds since the recording started
+        self.t: float = t
+        self.event: BaseEvent = event
+
+
+def _event_classes() -> Dict[str, Type[BaseEvent]]:
+    import event.event_data as event_data
+    classes = dict()
+    for name in dir(event_data):
+        obj = getattr(event_data, name)
+        if isinstance(obj, type) and issubclass(obj, BaseEvent):
+            classes[name] = obj
+    return classes
+
+
+def read_records(path: str | Path) -> Iterator[Dict[str, Any]]:
+    """
+    Read the raw records of a recording file.
+    """
+    with open(path, mode="r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line, object_hook=_object_hook)
+            except json.JSONDecodeError:
+                # The last line may be incomplete if the program crashed
+                logger.warning(f"{path}:{line_no} is not a valid record, skipped.")
+
+
+def read_events(path: str | Path) -> Iterator[RecordedEvent]:
+    """
+    Read the events of a recording file in the order they were emitted.
+    Events whose class is unknown or whose fields can not be validated are skipped.
+    :param path: Path of the recording file.
+    :return: Iterator of RecordedEvent.
+    """
+    classes = _event_classes()
+    # A file may contain several sessions, `t` restarts from 0 at each header
+    offset, last = 0., 0.
+    for record in read_records(path):
+        kind = record.get("kind")
+        if kind == "header":
+            offset = last
+            continue
+        if kind != "event":
+            continue
+        cls = classes.get(record["cls"], None)
+        if cls is None:
+            logger.warning(f"Unknown event class {record['cls']}, skipped.")
+            continue
+        try:
+            event = cls.model_validate(record["event"])
+        except Exception as e:
+            logger.warning(f"Can not restore {record['cls']}: {e}")
+            continue
+        last = offset + record["t"]
+        yield RecordedEvent(last, event)
@@ -15,6 +15,7 @@ class EventKeyRegistry:
 
     class Pipeline:
         ASR = "pipeline.asr"
+        ASR_PARTIAL = "pipeline.asr.partial"
         LLM = "pipeline.llm"
         TTS = "pipeline.tts"
         IMG_CAP = "pipeline.img_cap"
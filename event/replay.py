@@ -0,0 +1,146 @@
+"""
+Event Replay
+    Feed a recording made by `EventRecorder` back to an emitter at the recorded pace, faster, or as fast as possible,
+    and measure the throughput and the latency (queue-wait + run time) of the listeners.
+    See `replay.py` for the command line tool which replays a recording against `ZerolanLiveRobot`.
+"""
+import asyncio
+import math
+import threading
+import time
+from typing import List, Dict, Iterable, Set, TYPE_CHECKING
+
+from loguru import logger
+
+from event.event_data import BaseEvent
+from event.event_emitter import TypedEventEmitter, emitter as default_emitter
+from event.recorder import RecordedEvent
+from event.registry import EventKeyRegistry
+
+if TYPE_CHECKING:
+    from event.event_emitter import BaseTask
+
+# Events coming from the outside world. The other events are derived from them by the listeners,
+# so replaying them as well would run the same chain twice.
+SOURCE_EVENT_TYPES: Set[str] = {
+    EventKeyRegistry.Device.MICROPHONE_VAD,
+    EventKeyRegistry.Device.SCREEN_CAPTURED,
+    EventKeyRegistry.LiveStream.DANMAKU,
+    EventKeyRegistry.LiveStream.SUPER_CHAT,
+    EventKeyRegistry.LiveStream.GIFT,
+    EventKeyRegistry.QQBot.QQ_MESSAGE,
+}
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile.
+    :param samples: Sorted samples.
+    :param p: Percentile in [0, 100].
+    """
+    if not samples:
+        return 0.
+    rank = max(1, math.ceil(p / 100 * len(samples)))
+    return samples[rank - 1]
+
+
+class ReplayMetrics:
+    """
+    Collects the latency of every listener task, set it as the recorder of the emitter during a replay.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latency: Dict[str, List[float]] = dict()
+        self.emitted = 0
+        self.completed = 0
+        self.started_at = time.perf_counter()
+        self.last_done_at = self.started_at
+
+    def record_event(self, event: BaseEvent):
+        with self._lock:
+            self.emitted += 1
+
+    def record_task(self, task: "BaseTask", wait: float, run: float):
+        with self._lock:
+            self._latency.setdefault(task.event_type, []).append(wait + run)
+            self.completed += 1
+            self.last_done_at = time.perf_counter()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: Event type => {count, p50, p95, max} (seconds), and "total" => {events, tasks, duration, throughput}.
+        """
+        with self._lock:
+            result = dict()
+            for event_type, samples in self._latency.items():
+                samples = sorted(samples)
+                result[event_type] = {
+                    "count": len(samples),
+                    "p50": percentile(samples, 50),
+                    "p95": percentile(samples, 95),
+                    "max": samples[-1],
+                }
+            duration = self.last_done_at - self.started_at
+            result["total"] = {
+                "events": self.emitted,
+                "tasks": self.completed,
+                "duration": duration,
+                "throughput": self.completed / duration if duration > 0 else 0.,
+            }
+            return result
+
+
+class EventReplayer:
+    def __init__(self, events: Iterable[RecordedEvent], speed: float = 1.,
+                 types: Set[str] | None = None, target: TypedEventEmitter | None = None):
+        """
+        Replay recorded events.
+        :param events: Recorded events, see `event.recorder.read_events`.
+        :param speed: 1 replays at the recorded pace, 10 is ten times faster, 0 replays as fast as possible.
+        :param types: Event types to replay, `SOURCE_EVENT_TYPES` by default.
+        :param target: Emitter receiving the events, the global emitter by default.
+        """
+        assert speed >= 0, f"Speed can not be negative."
+        types = SOURCE_EVENT_TYPES if types is None else types
+        self.events: List[RecordedEvent] = [recorded for recorded in events if recorded.event.type in types]
+        self.speed = speed
+        self.target = target if target is not None else default_emitter
+        self.metrics = ReplayMetrics()
+
+    def _feed(self):
+        if not self.events:
+            return
+        first = self.events[0].t
+        start = time.perf_counter()
+        for recorded in self.events:
+            if self.speed > 0:
+                delay = start + (recorded.t - first) / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.target.emit(recorded.event)
+
+    async def replay(self, quiet: float = 2., timeout: float = 600.) -> Dict[str, Dict[str, float]]:
+        """
+        Emit the events, then wait until the emitter is idle and no listener has finished for `quiet` seconds.
+        :param quiet: Seconds without finished tasks after which the replay is considered done,
+                      it leaves time for the work done outside the emitter (e.g. the TTS thread pool).
+        :param timeout: Maximum seconds to wait after the last event has been emitted.
+        :return: See `ReplayMetrics.report`.
+        """
+        logger.info(f"Replaying {len(self.events)} events at {'max' if self.speed == 0 else f'{self.speed}x'} speed")
+        self.metrics = ReplayMetrics()
+        self.target.set_recorder(self.metrics)
+        try:
+            # Events are emitted from a separate thread, like the devices and services do
+            await asyncio.to_thread(self._feed)
+            deadline = time.perf_counter() + timeout
+            while time.perf_counter() < deadline:
+                if self.target.is_idle() and time.perf_counter() - self.metrics.last_done_at >= quiet:
+                    break
+                await asyncio.sleep(0.1)
+            else:
+                logger.warning(f"Listeners are still running after {timeout} s, the report is incomplete.")
+        finally:
+            self.target.set_recorder(None)
+        return self.metrics.report()
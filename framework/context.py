@@ -10,14 +10,15 @@ from manager.llm_prompt_manager import LLMPromptManager
 from manager.model_manager import ModelManager
 from manager.tts_prompt_manager import TTSPromptManager
 from devices.microphone import SmartMicrophone
-from pipeline.asr.asr_sync import ASRSyncPipeline
-from pipeline.db.milvus.milvus_sync import MilvusSyncPipeline
-from pipeline.imgcap.imgcap_sync import ImgCapSyncPipeline
-from pipeline.llm.llm_sync import LLMSyncPipeline
-from pipeline.ocr.ocr_sync import OCRSyncPipeline
-from pipeline.tts.tts_sync import TTSSyncPipeline
-from pipeline.vidcap.vidcap_sync import VidCapSyncPipeline
-from pipeline.vla.showui.showui_sync import ShowUISyncPipeline
+from pipeline.asr.asr_async import ASRAsyncPipeline
+from pipeline.base.transport import async_http_transport
+from pipeline.db.milvus.milvus_async import MilvusAsyncPipeline
+from pipeline.imgcap.imgcap_async import ImgCapAsyncPipeline
+from pipeline.llm.llm_async import LLMAsyncPipeline
+from pipeline.ocr.ocr_async import OCRAsyncPipeline
+from pipeline.tts.tts_async import TTSAsyncPipeline
+from pipeline.vidcap.vidcap_async import VidCapAsyncPipeline
+from pipeline.vla.showui.showui_async import ShowUIAsyncPipeline
 from services.browser.browser import Browser
 from services.game.config import PlatformEnum
 from services.game.minecraft.app import KonekoMinecraftAIAgent
@@ -40,14 +41,14 @@ class ZerolanLiveRobotContext:
     """
 
     def __init__(self):
-        self.llm: LLMSyncPipeline | None = None
-        self.asr: ASRSyncPipeline | None = None
-        self.ocr: OCRSyncPipeline | None = None
-        self.tts: TTSSyncPipeline | None = None
-        self.img_cap: ImgCapSyncPipeline | None = None
-        self.vid_cap: VidCapSyncPipeline | None = None
-        self.showui: ShowUISyncPipeline | None = None
-        self.vec_db: MilvusSyncPipeline | None = None
+        self.llm: LLMAsyncPipeline | None = None
+        self.asr: ASRAsyncPipeline | None = None
+        self.ocr: OCRAsyncPipeline | None = None
+        self.tts: TTSAsyncPipeline | None = None
+        self.img_cap: ImgCapAsyncPipeline | None = None
+        self.vid_cap: VidCapAsyncPipeline | None = None
+        self.showui: ShowUIAsyncPipeline | None = None
+        self.vec_db: MilvusAsyncPipeline | None = None
 
         self.filter: FirstMatchedFilter | None = None
         self.llm_prompt_manager: LLMPromptManager | None = None
@@ -80,7 +81,8 @@ class ZerolanLiveRobotContext:
         self.twitch: TwitchService | None = None
 
         assert _config.pipeline.llm.enable, f"At least LLMPipeline must be enabled in your config."
-        self.llm = LLMSyncPipeline(_config.pipeline.llm)
+        async_http_transport.configure(_config.pipeline.http)
+        self.llm = LLMAsyncPipeline(_config.pipeline.llm)
         self.filter = FirstMatchedFilter(_config.character.chat.filter.bad_words)
         self.llm_prompt_manager = LLMPromptManager(_config.character.chat)
         self.speaker = Speaker()
@@ -89,19 +91,19 @@ class ZerolanLiveRobotContext:
         self.model_manager = None
 
         if _config.pipeline.asr.enable:
-            self.asr = ASRSyncPipeline(_config.pipeline.asr)
+            self.asr = ASRAsyncPipeline(_config.pipeline.asr)
         if _config.pipeline.ocr.enable:
-            self.ocr = OCRSyncPipeline(_config.pipeline.ocr)
+            self.ocr = OCRAsyncPipeline(_config.pipeline.ocr)
         if _config.pipeline.tts.enable:
             self.tts_prompt_manager = TTSPromptManager(_config.character.speech)
-            self.tts = TTSSyncPipeline(_config.pipeline.tts)
+            self.tts = TTSAsyncPipeline(_config.pipeline.tts)
         if _config.pipeline.img_cap.enable:
-            self.img_cap = ImgCapSyncPipeline(_config.pipeline.img_cap)
+            self.img_cap = ImgCapAsyncPipeline(_config.pipeline.img_cap)
         if _config.pipeline.vid_cap.enable:
-            self.vid_cap = VidCapSyncPipeline(_config.pipeline.vid_cap)
+            self.vid_cap = VidCapAsyncPipeline(_config.pipeline.vid_cap)
         if _config.pipeline.vla.enable:
             if _config.pipeline.vla.showui.enable:
-                self.showui = ShowUISyncPipeline(_config.pipeline.vla.showui)
+                self.showui = ShowUIAsyncPipeline(_config.pipeline.vla.showui)
         if _config.service.browser.enable:
             self.browser = Browser(_config.service.browser)
         if _config.service.game.enable:
@@ -117,7 +119,7 @@ class ZerolanLiveRobotContext:
             if _config.service.live_stream.twitch.enable:
                 self.twitch = TwitchService(_config.service.live_stream.twitch)
         if _config.pipeline.vec_db.enable:
-            self.vec_db = MilvusSyncPipeline(_config.pipeline.vec_db.milvus)
+            self.vec_db = MilvusAsyncPipeline(_config.pipeline.vec_db.milvus)
         if _config.service.playground.enable:
             self.model_manager = ModelManager()
             self.bot_id = _config.service.playground.bot_id
@@ -128,7 +130,8 @@ class ZerolanLiveRobotContext:
             from services.qqbot.napcat import QQBotService
 
             self.qq: QQBotService = QQBotService(_config.service.qqbot)
-        self.mic = SmartMicrophone(vad_mode=_config.system.microphone_vad_mode)
+        self.mic = SmartMicrophone(vad_mode=_config.system.microphone_vad_mode,
+                                   stream_interval_ms=_config.system.microphone_stream_interval_ms)
 
         # Headless system can not load `pynput` and `pygame`
         self.keyboard = None
@@ -0,0 +1,19 @@
+"""
+Voice Commands
+    The keywords of the voice commands of the bot, their handlers are registered in `bot.py`.
+    When the transcript contains the keywords of several commands, the highest priority wins.
+    The commands which act on the screen only trigger on a request at the start of the transcript,
+    not on a sentence which merely contains the verb (e.g. `我昨天看见一只猫`, `我刚才点击了一个链接`).
+"""
+from common.command_matcher import CommandSpec
+
+OPEN_BROWSER = CommandSpec(("打开浏览器",), priority=90)
+CLOSE_BROWSER = CommandSpec(("关闭浏览器",), priority=90)
+WEB_SEARCH = CommandSpec(("网页搜索",), priority=80)
+GAME = CommandSpec(("游戏",), priority=70)
+# One leading character is allowed for the fillers, e.g. `那你看见了什么`
+SEE = CommandSpec(("你看见", "你能看见", "你看得见", "看见了什么", "看见什么"), priority=60, max_start=1)
+CLICK = CommandSpec(("点击", "点一下", "请点击", "帮我点击", "请帮我点击", "帮我点一下"), priority=50, max_start=0)
+REMEMBER = CommandSpec(("记得",), priority=40)
+LOAD_MODEL = CommandSpec(("加载模型",), priority=30)
+SCALE_MODEL = CommandSpec(("调整模型",), priority=30)
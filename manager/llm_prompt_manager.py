@@ -1,5 +1,6 @@
+from collections import deque
 from copy import deepcopy
-from typing import Callable
+from typing import Callable, Deque, Tuple
 
 from zerolan.data.pipeline.llm import Conversation, RoleEnum
 
@@ -13,12 +14,15 @@ class LLMPromptManager:
                                                                              self.system_prompt)
         self.current_history: list[Conversation] = deepcopy(self.injected_history)
         self.max_history = config.max_history
+        # (text, response) of the forgotten rounds, which a history built before the forget may still hold
+        self._forgotten: Deque[Tuple[str, str]] = deque(maxlen=max(1, self.max_history))
 
     def reset_history(self, history: list[Conversation]) -> None:
         """
         Resets `current_history` with deepcopy.
         If the length of `current_history` is greater than the `max_history`,
         resets it to `injected_history` from the config file.
+        The forgotten rounds are dropped from the history.
         :param history: List of instances of class Conversation
         :return: None
         """
@@ -26,10 +30,51 @@ class LLMPromptManager:
             self.current_history = deepcopy(self.injected_history)
         else:
             if len(history) <= self.max_history:
-                self.current_history = deepcopy(history)
+                self.current_history = self._drop_forgotten(deepcopy(history))
             else:
                 self.current_history = deepcopy(self.injected_history)
 
+    def forget_round(self, text: str, response: str) -> bool:
+        """
+        Removes the latest round of `text` and `response` from `current_history`,
+        even if other rounds have been added after it.
+        The round is also dropped from the histories reset afterwards,
+        e.g. the one of a reply which was already in flight, built before the round was forgotten.
+        The contents are compared without their leading and trailing whitespace,
+        e.g. the history may still hold the response with its leading line break.
+        :param text: Content of the user message.
+        :param response: Content of the assistant message.
+        :return: False if the round is not in the history.
+        """
+        forgotten = (text.strip(), response.strip())
+        if forgotten not in self._forgotten:
+            self._forgotten.append(forgotten)
+        history = self.current_history
+        for i in range(len(history) - 2, -1, -1):
+            if self._is_round_of(history[i], history[i + 1], forgotten):
+                self.current_history = history[:i] + history[i + 2:]
+                return True
+        return False
+
+    @staticmethod
+    def _is_round_of(user: Conversation, assistant: Conversation, pair: Tuple[str, str]) -> bool:
+        return user.role == RoleEnum.user and user.content.strip() == pair[0] \
+            and assistant.role == RoleEnum.assistant and assistant.content.strip() == pair[1]
+
+    def _drop_forgotten(self, history: list[Conversation]) -> list[Conversation]:
+        if len(self._forgotten) == 0:
+            return history
+        result = []
+        i = 0
+        while i < len(history):
+            if i + 1 < len(history) and any(self._is_round_of(history[i], history[i + 1], forgotten)
+                                            for forgotten in self._forgotten):
+                i += 2
+                continue
+            result.append(history[i])
+            i += 1
+        return result
+
     @staticmethod
     def _parse_history_list(history: list[str], system_prompt: str | None = None) -> list[Conversation]:
         result = []
@@ -1,12 +1,15 @@
+import json
 import os
 import re
-from typing import Tuple, List
+from pathlib import Path
+from typing import Dict, Tuple, List
 
 from loguru import logger
 from zerolan.data.data.prompt import TTSPrompt
 
 from character.config import SpeechConfig
 from common.enumerator import Language
+from common.io.file_sys import fs
 
 
 def _get_all_files(prompts_dir: str):
@@ -52,15 +55,61 @@ def parse_tts_prompt_filename(s: str) -> Tuple[str, str, str]:
     except IndexError:
         raise ValueError(f"The language tag could not be found in the string: {s}")
 
-    raw_filename = s.replace(f"[{lang}]", "").replace(f"[{sentiment}]", "")
+    # The tags as written, `lang` is an enum which is formatted as `Language.ZH` on Python 3.11+
+    raw_filename = s.replace(f"[{matches[0]}]", "", 1).replace(f"[{sentiment}]", "", 1)
     filetype = raw_filename.split(".")[-1]
     transcript = raw_filename[:-len(f".{filetype}")]
 
     return lang, sentiment, transcript
 
 
+class TTSPromptIndex:
+    """
+    All the TTS prompts of all the languages, keyed by (lang, sentiment).
+    """
+
+    def __init__(self, prompts: List[TTSPrompt]):
+        self.prompts: Dict[Tuple[str, str], TTSPrompt] = {}
+        self.by_lang: Dict[str, List[TTSPrompt]] = {}
+        for prompt in prompts:
+            # The first prompt of a sentiment wins
+            if (prompt.lang, prompt.sentiment) in self.prompts:
+                continue
+            self.prompts[(prompt.lang, prompt.sentiment)] = prompt
+            self.by_lang.setdefault(prompt.lang, []).append(prompt)
+
+    def default(self, lang: str) -> TTSPrompt | None:
+        """
+        :return: The `Default` prompt of the language, otherwise its first prompt.
+        """
+        prompt = self.prompts.get((lang, "Default"), None)
+        if prompt is None and len(self.by_lang.get(lang, [])) > 0:
+            prompt = self.by_lang[lang][0]
+        return prompt
+
+
+def _dir_mtimes(prompts_dir: str) -> Dict[str, int]:
+    # A file added, removed or renamed changes the mtime of its directory, which is all the index depends on
+    mtimes = {}
+    for dirpath, _, _ in os.walk(prompts_dir):
+        mtimes[os.path.abspath(dirpath)] = os.stat(dirpath).st_mtime_ns
+    return mtimes
+
+
+def _is_index_valid(dir_mtimes: Dict[str, int]) -> bool:
+    try:
+        return all(os.stat(dirpath).st_mtime_ns == mtime for dirpath, mtime in dir_mtimes.items())
+    except OSError:
+        return False
+
+
 class TTSPromptManager:
-    def __init__(self, config: SpeechConfig):
+    def __init__(self, config: SpeechConfig, index_path: Path | None = None):
+        """
+        :param config: Speech config of the character.
+        :param index_path: Where the index of a local `prompts_dir` is persisted,
+            `.temp/cache/tts_prompts.json` if None.
+        """
         self.default_tts_prompt: TTSPrompt | None = None
         self.tts_prompts: List[TTSPrompt] = []
         self.sentiments: List[str] = []
@@ -68,53 +117,82 @@ class TTSPromptManager:
         self._is_remote = config.is_remote
         if not self._is_remote:
             self._prompts_dir: str = config.prompts_dir
-            self.load_tts_prompts()
+            self._index_path = index_path if index_path is not None else fs.temp_dir.joinpath("cache",
+                                                                                              "tts_prompts.json")
         else:
             self._remote_files: List[str] = config.prompts
+        self.index: TTSPromptIndex = self._build_index()
+        self.load_tts_prompts()
 
     def set_lang(self, lang: str):
+        """
+        Switch the language of the prompts, without any disk access.
+        """
         self._lang = lang
         self.load_tts_prompts()
 
     def get_tts_prompt(self, sentiment: str) -> TTSPrompt:
-        for tts_prompt in self.tts_prompts:
-            if tts_prompt.sentiment == sentiment:
-                return tts_prompt
-        return self.default_tts_prompt
+        return self.index.prompts.get((self._lang, sentiment), self.default_tts_prompt)
 
     def load_tts_prompts(self):
-        self.tts_prompts = []
-        self.sentiments = []
-        self.default_tts_prompt = None
-        if self._is_remote:
-            self._load(self._remote_files)
-        else:
-            self._load(_get_all_files(self._prompts_dir))
+        self.tts_prompts = self.index.by_lang.get(self._lang, [])
+        self.sentiments = [tts_prompt.sentiment for tts_prompt in self.tts_prompts]
+        self.default_tts_prompt = self.index.default(self._lang)
+        if len(self.tts_prompts) <= 0:
+            if self._is_remote:
+                msg = 'You must provide a remote path for TTS prompts in your config file. '
+                if len(self._remote_files) > 0:
+                    msg += f'{len(self._remote_files)} paths were provided, ' \
+                           f'but none of them match the required naming style.'
+                raise Exception(msg)
+            raise Exception(f"There are no eligible TTS prompts in the directory you provided: {self._prompts_dir}")
+        logger.info(f"{len(self.tts_prompts)} TTS prompts ({self._lang}) loaded: {self.sentiments}")
 
-    def _load(self, audio_paths: List[str]):
+    def _build_index(self) -> TTSPromptIndex:
+        if self._is_remote:
+            return TTSPromptIndex(self._parse(self._remote_files))
+        prompts_dir = os.path.abspath(self._prompts_dir)
+        prompts = self._load_index(prompts_dir)
+        if prompts is None:
+            dir_mtimes = _dir_mtimes(prompts_dir)
+            prompts = self._parse(_get_all_files(prompts_dir))
+            self._save_index(prompts_dir, dir_mtimes, prompts)
+        return TTSPromptIndex(prompts)
+
+    def _parse(self, audio_paths: List[str]) -> List[TTSPrompt]:
+        prompts = []
         for audio_path in audio_paths:
             try:
                 prompt = parse_prompt(audio_path)
-                if prompt.lang != self._lang:
-                    continue
                 if not self._is_remote:
                     assert os.path.exists(audio_path), f"File not found: {audio_path}"
                     prompt.audio_path = os.path.abspath(audio_path)
-
-                if prompt.sentiment == "Default":
-                    self.default_tts_prompt = prompt
-                self.tts_prompts.append(prompt)
-                self.sentiments.append(prompt.sentiment)
+                prompts.append(prompt)
             except ValueError:
                 logger.warning(f"No suitable filename parsing strategy, the audio file will skip: {audio_path}")
                 continue
-        if len(self.tts_prompts) <= 0:
-            if self._is_remote:
-                msg = 'You must provide a remote path for TTS prompts in your config file. '
-                if len(audio_paths) > 0:
-                    msg += f'{len(audio_paths)} paths were provided, but none of them match the required naming style.'
-                raise Exception(msg)
-            raise Exception(f"There are no eligible TTS prompts in the directory you provided: {self._prompts_dir}")
-        # Output sentiments result
-        sentiments = [tts_prompt.sentiment for tts_prompt in self.tts_prompts]
-        logger.info(f"{len(self.tts_prompts)} TTS prompts ({self._lang}) loaded: {sentiments}")
+        return prompts
+
+    def _load_index(self, prompts_dir: str) -> List[TTSPrompt] | None:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data["prompts_dir"] != prompts_dir or not _is_index_valid(data["dir_mtimes"]):
+                return None
+            prompts = [TTSPrompt.model_validate(prompt) for prompt in data["prompts"]]
+            logger.debug(f"TTS prompt index loaded: {self._index_path}")
+            return prompts
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _save_index(self, prompts_dir: str, dir_mtimes: Dict[str, int], prompts: List[TTSPrompt]):
+        data = {"prompts_dir": prompts_dir, "dir_mtimes": dir_mtimes,
+                "prompts": [prompt.model_dump(mode="json") for prompt in prompts]}
+        try:
+            self._index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self._index_path)
+        except OSError as e:
+            logger.warning(f"Failed to save the TTS prompt index: {e}")
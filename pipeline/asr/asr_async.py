@@ -1,20 +1,25 @@
 import os
-from typing import Dict, BinaryIO, Generator
+from typing import AsyncGenerator
 
+import aiohttp
 from loguru import logger
 from typeguard import typechecked
 from zerolan.data.pipeline.abs_data import AbstractModelQuery
 from zerolan.data.pipeline.asr import ASRQuery, ASRPrediction, ASRStreamQuery
 
+from pipeline.asr.baidu_asr import BaiduASRPipeline
 from pipeline.asr.config import ASRPipelineConfig, ASRModelIdEnum
-from pipeline.base.base_async import BaseAsyncPipeline, stream_generator, get_base_url
+from pipeline.asr.whisper_asr import WhisperASRPipeline
+from pipeline.base.base_async import BaseAsyncPipeline, frame_generator, raise_for_status
 
 
 @typechecked
-def _parse_asr_query(query: ASRQuery) -> Dict[str, BinaryIO | str]:
-    data = {"json": query.model_dump_json()}
+def _parse_asr_query(query: ASRQuery) -> aiohttp.FormData:
+    data = aiohttp.FormData()
+    data.add_field("json", query.model_dump_json())
     if os.path.exists(query.audio_path):
-        data['audio'] = open(query.audio_path, 'rb')
+        with open(query.audio_path, 'rb') as f:
+            data.add_field("audio", f.read(), filename=os.path.basename(query.audio_path))
     else:
         logger.warning(f'Assume the remote server must have such file: {query.audio_path}')
 
@@ -22,7 +27,7 @@ def _parse_asr_query(query: ASRQuery) -> Dict[str, BinaryIO | str]:
 
 
 @typechecked
-def _parse_asr_stream_query(query: ASRStreamQuery) -> Dict[str, BinaryIO | str]:
+def _parse_asr_stream_query(query: ASRStreamQuery, utterance_id: str | None = None) -> aiohttp.FormData:
     assert len(query.audio_data) > 0
 
     # Only used for converting to json
@@ -32,15 +37,20 @@ def _parse_asr_stream_query(query: ASRStreamQuery) -> Dict[str, BinaryIO | str]:
         media_type: str
         sample_rate: int
         channels: int
+        utterance_id: str | None
 
     stub_query = StubASRStreamQuery(
+        id=query.id,
+        utterance_id=utterance_id,
         is_final=query.is_final,
         audio_data="",
         media_type=query.media_type,
         sample_rate=query.sample_rate,
         channels=query.channels,
     )
-    data = {"json": stub_query.model_dump_json(), "audio": query.audio_data}
+    data = aiohttp.FormData()
+    data.add_field("json", stub_query.model_dump_json())
+    data.add_field("audio", query.audio_data, filename="audio")
 
     return data
 
@@ -48,20 +58,55 @@ def _parse_asr_stream_query(query: ASRStreamQuery) -> Dict[str, BinaryIO | str]:
 class ASRAsyncPipeline(BaseAsyncPipeline):
 
     def __init__(self, config: ASRPipelineConfig):
-        super().__init__(base_url=get_base_url(config.predict_url))
-        self._model_id: ASRModelIdEnum = config.model_id
-        self._predict_endpoint = "/asr/predict"
-        self._stream_predict_endpoint = "/asr/stream-predict"
+        super().__init__(config)
+        self.model_id: ASRModelIdEnum = config.model_id
+        self.predict_url: str = config.predict_url
+        self.stream_predict_url: str = config.stream_predict_url
+        self.stream_cumulative: bool = config.stream_cumulative
+        # The third-party APIs have blocking clients, which run in the default thread pool
+        self._remote = None
+        if config.model_id == ASRModelIdEnum.BaiduASR and config.baidu_asr_config is not None:
+            self._remote = BaiduASRPipeline(api_key=config.baidu_asr_config.api_key,
+                                            secret_key=config.baidu_asr_config.secret_key)
+        elif config.model_id == ASRModelIdEnum.WhisperASR and config.whisper_asr_config is not None:
+            self._remote = WhisperASRPipeline(
+                api_key=config.whisper_asr_config.api_key,
+                api_url=config.whisper_asr_config.api_url,
+                model=config.whisper_asr_config.model,
+                language=config.whisper_asr_config.language,
+                prompt=config.whisper_asr_config.prompt,
+                temperature=config.whisper_asr_config.temperature,
+                response_format=config.whisper_asr_config.response_format
+            )
+
+    @property
+    def supports_partial(self) -> bool:
+        """
+        Whether the chunks with `is_final=False` are worth sending.
+        The third-party APIs recognize (and bill) each request on its own.
+        """
+        return self._remote is None
 
     @typechecked
     async def predict(self, query: ASRQuery) -> ASRPrediction:
-        data = _parse_asr_query(query)
-        async with self.session.post(self._predict_endpoint, data=data) as resp:
-            return await resp.json(encoding='utf8', loads=ASRPrediction.model_validate_json)
+        if self._remote is not None:
+            return await self._remote.predict(query)
+        return await self._post_model(self.predict_url, ASRPrediction, data=lambda: _parse_asr_query(query))
 
-    @typechecked
-    async def stream_predict(self, query: ASRStreamQuery) -> Generator[ASRPrediction, None, None]:
-        data = _parse_asr_stream_query(query)
-        async with self.session.post(self._stream_predict_endpoint, data=data) as resp:
-            async for chunk in stream_generator(resp):
-                yield ASRPrediction.model_validate_json(chunk)
+    async def stream_predict(self, query: ASRStreamQuery, chunk_size: int | None = None,
+                             utterance_id: str | None = None) -> AsyncGenerator[ASRPrediction, None]:
+        """
+        Recognize the audio of the query, the predictions are streamed.
+        :param utterance_id: Ties the chunks of an utterance together, for a model keeping the state of the stream.
+        """
+        assert isinstance(query, ASRStreamQuery)
+        if self._remote is not None:
+            async for prediction in self._remote.stream_predict(query):
+                yield prediction
+            return
+        data = _parse_asr_stream_query(query, utterance_id)
+        async with self.endpoint_pool(self.stream_predict_url).stream(self.stream_predict_url) as url:
+            async with self.session.post(url, data=data) as resp:
+                await raise_for_status(resp)
+                async for frame in frame_generator(resp, chunk_size):
+                    yield ASRPrediction.model_validate_json(frame)
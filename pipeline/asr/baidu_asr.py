@@ -1,12 +1,12 @@
+import asyncio
 import base64
 import json
 import os.path
 import uuid
 from io import BytesIO
-from typing import List, Generator
+from typing import List, AsyncGenerator
 
 import librosa
-import requests
 import soundfile as sf
 from pydantic import BaseModel
 from typeguard import typechecked
@@ -14,6 +14,8 @@ from zerolan.data.pipeline.asr import ASRQuery, ASRPrediction, ASRStreamQuery
 
 from common.io.api import save_audio
 from common.io.file_type import AudioFileType
+from pipeline.base.base_async import raise_for_status
+from pipeline.base.transport import async_http_transport
 
 
 class BaiduTTSResponse(BaseModel):
@@ -27,25 +29,21 @@ class BaiduTTSResponse(BaseModel):
 class BaiduASRPipeline:
 
     def __init__(self, api_key, secret_key):
-        self._access_token = self._get_access_token(api_key, secret_key)
+        self._api_key = api_key
+        self._secret_key = secret_key
+        # Fetched on the first request
+        self._access_token: str | None = None
         self._cuid = str(uuid.uuid4())
 
     @typechecked
-    def predict(self, query: ASRQuery):
+    async def predict(self, query: ASRQuery) -> ASRPrediction:
         assert os.path.exists(query.audio_path), f"{query.audio_path} does not exist!"
-        assert self._access_token is not None
+        if self._access_token is None:
+            self._access_token = await self._get_access_token(self._api_key, self._secret_key)
         url = "https://vop.baidu.com/server_api"
 
-        if query.channels > 1:
-            data, sr = librosa.load(query.audio_path, mono=True)
-            memory_file = BytesIO()
-            sf.write(memory_file, data, sr, format=query.media_type)
-            memory_file.seek(0)  # Reset pointer to beginning
-            data = memory_file.read()
-        else:
-            with open(query.audio_path, "rb") as f:
-                data = f.read()
-
+        # Reading and downmixing the audio blocks, so it runs in the default thread pool
+        data = await asyncio.to_thread(self._read_audio, query)
         data_len = len(data)
         audio_base64 = base64.b64encode(data).decode('utf-8')
 
@@ -62,30 +60,43 @@ class BaiduASRPipeline:
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         }
-        response = requests.request("POST", url, headers=headers, data=payload.encode("utf-8"))
-        response.raise_for_status()
-        response = json.loads(response.text)
+        async with async_http_transport.session().post(url, headers=headers, data=payload.encode("utf-8")) as resp:
+            await raise_for_status(resp)
+            response = json.loads(await resp.text())
 
         if response['err_no'] != 0:
             raise Exception(response)
 
         return ASRPrediction(transcript=response['result'][0])
 
+    @staticmethod
+    def _read_audio(query: ASRQuery) -> bytes:
+        if query.channels > 1:
+            data, sr = librosa.load(query.audio_path, mono=True)
+            memory_file = BytesIO()
+            sf.write(memory_file, data, sr, format=query.media_type)
+            memory_file.seek(0)  # Reset pointer to beginning
+            return memory_file.read()
+        with open(query.audio_path, "rb") as f:
+            return f.read()
+
     @staticmethod
     @typechecked
-    def _get_access_token(api_key: str, secret_key: str):
+    async def _get_access_token(api_key: str, secret_key: str) -> str:
         """
         使用 AK，SK 生成鉴权签名（Access Token）
-        :return: access_token，或是None(如果错误)
+        :return: access_token
         """
         url = "https://aip.baidubce.com/oauth/2.0/token"
         params = {"grant_type": "client_credentials", "client_id": api_key, "client_secret": secret_key}
-        return str(requests.post(url, params=params).json().get("access_token"))
+        async with async_http_transport.session().post(url, params=params) as resp:
+            await raise_for_status(resp)
+            return str((await resp.json(content_type=None)).get("access_token"))
 
-    def stream_predict(self, query: ASRStreamQuery, chunk_size: int | None = None) -> Generator[
-        ASRPrediction, None, None]:
-        audio_path = save_audio(query.audio_data, AudioFileType.WAV, prefix="asr")
-        yield self.predict(ASRQuery(
+    async def stream_predict(self, query: ASRStreamQuery, chunk_size: int | None = None) -> AsyncGenerator[
+        ASRPrediction, None]:
+        audio_path = await asyncio.to_thread(save_audio, query.audio_data, AudioFileType.WAV, prefix="asr")
+        yield await self.predict(ASRQuery(
             audio_path=str(audio_path),
             media_type=query.media_type,
             sample_rate=query.sample_rate,
@@ -3,6 +3,7 @@ from pydantic import Field, BaseModel
 from common.enumerator import BaseEnum
 from common.utils.enum_util import enum_to_markdown
 from pipeline.base.base_sync import AbstractPipelineConfig
+from pipeline.base.endpoint import EndpointPoolConfig
 
 
 #######
@@ -47,6 +48,13 @@ class ASRPipelineConfig(AbstractPipelineConfig):
                              description="The URL for ASR prediction requests.")
     stream_predict_url: str = Field(default="http://127.0.0.1:11000/asr/stream-predict",
                                     description="The URL for streaming ASR prediction requests.")
+    endpoints: EndpointPoolConfig = Field(default=EndpointPoolConfig(),
+                                          description="Replicas of the ASR model, load balancing, hedging and circuit breaking.")
+    stream_cumulative: bool = Field(default=True,
+                                    description="While the streamer is speaking, send the whole speech so far in each chunk (`is_final=False`), "
+                                                "and the whole utterance again at the end. \n"
+                                                "Set it `False` only if the model keeps the state of the stream between the chunks, "
+                                                "keyed by the `utterance_id` of the query: each chunk then holds only the new audio.")
     baidu_asr_config: BaiduASRConfig = Field(default=BaiduASRConfig(), description="Baidu ASR config."
                                                                                    f"Only edit it when you set `model_id` to `{ASRModelIdEnum.BaiduASR.value}`.\n"
                                                                                    f"For more details please see the [documents](https://cloud.baidu.com/doc/SPEECH/s/qlcirqhz0).")
@@ -0,0 +1,115 @@
+"""
+ASR Stream Session
+    The microphone streams the new audio of an utterance every few hundred milliseconds (`is_final=False`),
+    and the session sends each chunk to the ASR model while the streamer is still speaking,
+    so the partial transcripts come before the speech has ended.
+    By default (`stream_cumulative`), each chunk holds the whole speech so far, and the whole utterance is recognized
+    again at the end (`is_final=True`), so the final transcript is as good as without streaming.
+    A model which keeps the state of the stream between the chunks, keyed by the `utterance_id` of the query,
+    gets only the new audio in each chunk, and only the audio after the last chunk at the end,
+    so the recognition overlaps with the speech instead of starting once it has ended.
+    If a chunk is missing (dropped by the emitter) or fails, the utterance falls back to the final event,
+    which holds the whole audio.
+"""
+from typing import AsyncGenerator, List
+
+from loguru import logger
+from zerolan.data.pipeline.asr import ASRPrediction, ASRStreamQuery
+
+from common.io.audio_clip import AudioClip
+from common.utils.audio_util import from_pcm_to_wav_bytes
+from event.event_data import DeviceMicrophoneVADEvent
+from pipeline.asr.asr_async import ASRAsyncPipeline
+
+
+def _wav_query(pcm: bytes | memoryview, clip: AudioClip, is_final: bool) -> ASRStreamQuery:
+    wav = from_pcm_to_wav_bytes(pcm, sample_rate=clip.sample_rate, channels=clip.channels,
+                                sample_width=clip.sample_width)
+    return ASRStreamQuery(is_final=is_final, audio_data=wav, channels=clip.channels, sample_rate=clip.sample_rate,
+                          media_type="wav")
+
+
+class ASRStreamSession:
+    def __init__(self, asr: ASRAsyncPipeline):
+        self._asr = asr
+        self.utterance_id: str | None = None
+        self.transcript = ""
+        # Whether the chunks of the utterance have all been recognized so far
+        self._streaming = False
+        self._next_index = 0
+        # PCM of the chunks already recognized
+        self._pcm_chunks: List[bytes] = []
+        self._streamed_bytes = 0
+
+    def _reset(self, utterance_id: str | None):
+        self.utterance_id = utterance_id
+        self.transcript = ""
+        self._streaming = utterance_id is not None and self._asr.supports_partial
+        self._next_index = 0
+        self._pcm_chunks = []
+        self._streamed_bytes = 0
+
+    async def partial(self, event: DeviceMicrophoneVADEvent) -> ASRPrediction | None:
+        """
+        Recognize a chunk of an utterance.
+        :return: The transcript of the utterance so far, None if the chunk was not recognized.
+        """
+        assert not event.is_final
+        if event.utterance_id != self.utterance_id:
+            self._reset(event.utterance_id)
+        if not self._streaming:
+            return None
+        if event.chunk_index != self._next_index:
+            logger.warning(f"ASR stream: chunk {self._next_index} is missing, waiting for the whole utterance.")
+            self._streaming = False
+            return None
+        clip = AudioClip.from_bytes(event.speech)
+        if self._asr.stream_cumulative:
+            self._pcm_chunks.append(clip.pcm.tobytes())
+            query = _wav_query(b"".join(self._pcm_chunks), clip, is_final=False)
+        else:
+            query = ASRStreamQuery(is_final=False, audio_data=event.speech, channels=event.channels,
+                                   sample_rate=event.sample_rate, media_type=event.audio_type.value)
+        try:
+            async for prediction in self._asr.stream_predict(query, utterance_id=self.utterance_id):
+                # The model answers with the text of the audio it was sent
+                if self._asr.stream_cumulative:
+                    self.transcript = prediction.transcript
+                else:
+                    self.transcript += prediction.transcript
+        except Exception as e:
+            logger.exception(e)
+            self._streaming = False
+            return None
+        self._next_index += 1
+        self._streamed_bytes += len(clip.pcm)
+        return ASRPrediction(transcript=self.transcript)
+
+    async def final(self, event: DeviceMicrophoneVADEvent) -> AsyncGenerator[ASRPrediction, None]:
+        """
+        Recognize the end of an utterance.
+        :return: The transcript of the whole utterance. Several predictions if the utterance was not streamed.
+        """
+        assert event.is_final
+        streamed = (event.utterance_id is not None and event.utterance_id == self.utterance_id
+                    and self._streaming and self._next_index == event.chunk_index > 0
+                    and not self._asr.stream_cumulative)
+        transcript, streamed_bytes = self.transcript, self._streamed_bytes
+        self._reset(None)
+        if not streamed:
+            # Recognized on its own, without the state of the stream
+            query = ASRStreamQuery(is_final=True, audio_data=event.speech, channels=event.channels,
+                                   sample_rate=event.sample_rate, media_type=event.audio_type.value)
+            async for prediction in self._asr.stream_predict(query):
+                yield prediction
+            return
+
+        clip = AudioClip.from_bytes(event.speech)
+        tail = clip.pcm[streamed_bytes:]
+        if len(tail) == 0:
+            # The model needs some audio to end the stream, 10ms of silence
+            tail = bytes(clip.frame_size * (clip.sample_rate // 100))
+        async for prediction in self._asr.stream_predict(_wav_query(tail, clip, is_final=True),
+                                                         utterance_id=event.utterance_id):
+            transcript += prediction.transcript
+        yield ASRPrediction(transcript=transcript)
@@ -1,12 +1,15 @@
+import asyncio
 import os.path
-from typing import Generator
+from typing import AsyncGenerator
 
-import requests
+import aiohttp
 from typeguard import typechecked
 from zerolan.data.pipeline.asr import ASRQuery, ASRPrediction, ASRStreamQuery
 
 from common.io.api import save_audio
 from common.io.file_type import AudioFileType
+from pipeline.base.base_async import raise_for_status
+from pipeline.base.transport import async_http_transport
 
 
 class WhisperASRPipeline:
@@ -33,7 +36,7 @@ class WhisperASRPipeline:
         self._response_format = response_format
 
     @typechecked
-    def predict(self, query: ASRQuery) -> ASRPrediction:
+    async def predict(self, query: ASRQuery) -> ASRPrediction:
         """
         Transcribe audio using Whisper API.
         :param query: ASR query containing audio path and metadata.
@@ -43,60 +46,50 @@ class WhisperASRPipeline:
         assert self._api_key is not None and self._api_key != "", "API key must be provided!"
 
         # Prepare multipart/form-data
-        data = {
-            'model': self._model,
-        }
-        
+        data = aiohttp.FormData()
+        data.add_field('model', self._model)
+
         # Add optional parameters
         if self._language is not None:
-            data['language'] = self._language
+            data.add_field('language', self._language)
         if self._prompt is not None:
-            data['prompt'] = self._prompt
+            data.add_field('prompt', self._prompt)
         if self._temperature != 0.0:
-            data['temperature'] = str(self._temperature)
+            data.add_field('temperature', str(self._temperature))
         if self._response_format != "json":
-            data['response_format'] = self._response_format
-        
+            data.add_field('response_format', self._response_format)
+
         headers = {
             'Authorization': f'Bearer {self._api_key}'
         }
-        
-        # Open file and prepare for multipart upload
-        with open(query.audio_path, 'rb') as audio_file:
-            files = {
-                'file': (os.path.basename(query.audio_path), audio_file, self._get_content_type(query.media_type))
-            }
-            
-            response = requests.post(
-                url=self._api_url,
-                files=files,
-                data=data,
-                headers=headers
-            )
-        
-        response.raise_for_status()
-        
-        # Parse response based on format
-        if self._response_format == "json" or self._response_format == "verbose_json":
-            result = response.json()
-            if isinstance(result, dict):
-                # Standard JSON format returns {"text": "..."}
-                transcript = result.get('text', '')
-                if not transcript:
-                    # Fallback: try to get transcript from any key
+
+        # Read the file for the multipart upload, without blocking the event loop
+        audio_data = await asyncio.to_thread(self._read_file, query.audio_path)
+        data.add_field('file', audio_data, filename=os.path.basename(query.audio_path),
+                       content_type=self._get_content_type(query.media_type))
+
+        async with async_http_transport.session().post(self._api_url, data=data, headers=headers) as response:
+            await raise_for_status(response)
+
+            # Parse response based on format
+            if self._response_format == "json" or self._response_format == "verbose_json":
+                result = await response.json(content_type=None)
+                if isinstance(result, dict):
+                    # Standard JSON format returns {"text": "..."}
+                    transcript = result.get('text', '')
+                    if not transcript:
+                        # Fallback: try to get transcript from any key
+                        transcript = str(result)
+                else:
                     transcript = str(result)
             else:
-                transcript = str(result)
-        elif self._response_format == "text":
-            transcript = response.text
-        else:
-            # For srt, vtt formats, return text content
-            transcript = response.text
-        
+                # For text, srt and vtt formats, return text content
+                transcript = await response.text()
+
         return ASRPrediction(transcript=transcript)
 
-    def stream_predict(self, query: ASRStreamQuery, chunk_size: int | None = None) -> Generator[
-        ASRPrediction, None, None]:
+    async def stream_predict(self, query: ASRStreamQuery, chunk_size: int | None = None) -> AsyncGenerator[
+        ASRPrediction, None]:
         """
         Stream predict is not directly supported by Whisper API.
         We convert stream query to regular query by saving audio to temp file.
@@ -104,14 +97,19 @@ class WhisperASRPipeline:
         :param chunk_size: Not used for Whisper API.
         :return: Generator yielding ASR prediction.
         """
-        audio_path = save_audio(query.audio_data, AudioFileType.WAV, prefix="asr")
-        yield self.predict(ASRQuery(
+        audio_path = await asyncio.to_thread(save_audio, query.audio_data, AudioFileType.WAV, prefix="asr")
+        yield await self.predict(ASRQuery(
             audio_path=str(audio_path),
             media_type=query.media_type,
             sample_rate=query.sample_rate,
             channels=query.channels,
         ))
 
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
     @staticmethod
     def _get_content_type(media_type: str) -> str:
         """
@@ -1,40 +1,115 @@
 import os
-from typing import Dict, Any, Generator
+from typing import Dict, Any, AsyncGenerator, Awaitable, Callable, Type, TypeVar
+from urllib.parse import urlparse
 
 import aiohttp
-import urllib3.util
 from aiohttp import ClientResponse
+from loguru import logger
+from pydantic import BaseModel
 from typeguard import typechecked
 from zerolan.data.pipeline.abs_data import AbsractImageModelQuery
 
+from pipeline.base.base_sync import AbstractPipeline, AbstractPipelineConfig
+from pipeline.base.cache import ResponseCache, ResponseCacheConfig, content_key, file_digest
+from pipeline.base.endpoint import EndpointPool, EndpointPoolConfig
+from pipeline.base.framing import aiter_frames, frame_format_of
+from pipeline.base.transport import async_http_transport
+
+T = TypeVar("T", bound=BaseModel)
+
 
 @typechecked
 def get_base_url(url: str) -> str:
-    uri = urllib3.util.parse_url(url)
-    base_url = f"{uri.scheme}://{uri.host}:{uri.port}"
+    # The netloc as written, a URL without a port keeps the default port of its scheme
+    uri = urlparse(url)
+    base_url = f"{uri.scheme}://{uri.netloc}"
     return base_url
 
 
-class BaseAsyncPipeline:
+class BaseAsyncPipeline(AbstractPipeline):
+
+    def __init__(self, config: AbstractPipelineConfig):
+        """
+        Base of the async pipelines, which send their requests through the session shared by the running event loop.
+        :param config: An instance used to represent the pipeline configuration.
+        """
+        super().__init__(config)
+        self._endpoints_config: EndpointPoolConfig | None = getattr(config, "endpoints", None)
+        self._endpoint_pools: Dict[str, EndpointPool] = dict()
+        # Only the deterministic pipelines have the `cache` field in their configs
+        cache_config: ResponseCacheConfig | None = getattr(config, "cache", None)
+        self.cache: ResponseCache | None = None
+        if cache_config is not None and cache_config.enable:
+            self.cache = ResponseCache(type(self).__name__, cache_config)
 
-    def __init__(self, base_url: str):
-        self._base_url = base_url
-        self._session: aiohttp.ClientSession | None = None
+    def endpoint_pool(self, url: str) -> EndpointPool:
+        """
+        Get the pool of the replicas serving the URL.
+        """
+        base_url = get_base_url(url)
+        pool = self._endpoint_pools.get(base_url, None)
+        if pool is None:
+            pool = EndpointPool.from_config(base_url, self._endpoints_config)
+            self._endpoint_pools[base_url] = pool
+        return pool
 
     @property
-    def session(self):
-        if self._session is not None:
-            return self._session
-        self._session = aiohttp.ClientSession(self._base_url)
-        return self._session
+    def session(self) -> aiohttp.ClientSession:
+        return async_http_transport.session()
+
+    async def predict(self, query: BaseModel) -> BaseModel:
+        raise NotImplementedError("This method has not yet been implemented! Check your implementation of the pipeline")
+
+    def stream_predict(self, query: BaseModel, chunk_size: int | None = None) -> AsyncGenerator[BaseModel, None]:
+        raise NotImplementedError("This method has not yet been implemented! Check your implementation of the pipeline")
+
+    async def _post_model(self, url: str, return_type: Type[T], **kwargs) -> T:
+        """
+        Send a POST request to one of the replicas and parse the JSON body of the response as `return_type`.
+        :param url: URL of the request.
+        :param return_type: Subclass of BaseModel.
+        :param kwargs: Other arguments of `aiohttp.ClientSession.post`.
+                       The request may be sent more than once (hedged or retried),
+                       so a body which can only be sent once (e.g. `aiohttp.FormData`) must be given as a factory.
+        """
+
+        async def send(resolved_url: str):
+            request_kwargs = {k: v() if callable(v) else v for k, v in kwargs.items()}
+            async with self.session.post(resolved_url, **request_kwargs) as resp:
+                await raise_for_status(resp)
+                return return_type.model_validate_json(await resp.read())
+
+        return await self.endpoint_pool(url).request(url, send)
+
+    async def _cached_predict(self, key: Callable[[], str | None], predict: Callable[[], Awaitable[T]],
+                              dump: Callable[[T], bytes], load: Callable[[bytes], T]) -> T:
+        """
+        Predict through the response cache of the pipeline, if it has one.
+        :param key: Computes the content key of the query, which returns None if the query can not be cached.
+        :param predict: Sends the query to the model.
+        :param dump: Serializes the response.
+        :param load: Deserializes the response.
+        """
+        if self.cache is None:
+            return await predict()
+        return await self.cache.get_or_predict(key, predict, dump, load)
 
-    async def _dispose_client_session(self):
-        if self._session is None:
-            return
-        await self._session.close()
+    def _image_cache_key(self, query: AbsractImageModelQuery) -> str | None:
+        # Keyed by the image bytes instead of the path, so the same image saved twice hits the cache
+        if query.img_path is None or not os.path.exists(query.img_path):
+            return None
+        return content_key(str(getattr(self, "model_id", "")), file_digest(query.img_path),
+                           query.model_dump_json(exclude={"id", "img_path"}))
 
     async def close(self):
-        await self._dispose_client_session()
+        await async_http_transport.close()
+
+
+async def raise_for_status(resp: ClientResponse):
+    if resp.status >= 400:
+        # Log the error message from the model server before raising
+        logger.error(await resp.text(errors="replace"))
+        resp.raise_for_status()
 
 
 @typechecked
@@ -43,20 +118,56 @@ def _parse_imgcap_query(query: AbsractImageModelQuery) -> Dict[str, Any]:
     # then read the image as a binary file and add it to the `request.files`
     if os.path.exists(query.img_path):
         query.img_path = os.path.abspath(query.img_path).replace('\\', '/')
-        img = open(query.img_path, 'rb')
-        data = {'image': img,
-                'json': query.model_dump_json()}
-        return data
+        with open(query.img_path, 'rb') as f:
+            img = f.read()
+        json_val = query.model_dump_json()
+
+        def form_data() -> aiohttp.FormData:
+            data = aiohttp.FormData()
+            data.add_field('image', img, filename=os.path.basename(query.img_path))
+            data.add_field('json', json_val)
+            return data
+
+        return {"data": form_data}
     # If the `query.img_path` path does not exist on the local machine, it must exist on the remote host
     # Note: If the remote host does not have this file neither, raise 500 error!
     else:
-        return query.model_dump()
+        return {"json": query.model_dump()}
 
 
-@typechecked
-async def stream_generator(response: ClientResponse, chunk_size: int = -1) -> Generator[bytes, None, None]:
-    while True:
-        chunk = await response.content.read(chunk_size)
-        if not chunk:
-            break
-        yield chunk
+async def stream_generator(response: ClientResponse, chunk_size: int | None = None) -> AsyncGenerator[bytes, None]:
+    """
+    Yield the body of the response as it arrives.
+    :param response: The response whose body is streamed.
+    :param chunk_size: Numbers of bytes per chunk.
+                       If it is None or not positive, yield one HTTP chunk at a time like `requests` does,
+                       because the model servers send one prediction per chunk.
+    """
+    if chunk_size is not None and chunk_size > 0:
+        async for chunk in response.content.iter_chunked(chunk_size):
+            yield chunk
+        return
+    chunked = response.headers.get("Transfer-Encoding", "").lower() == "chunked"
+    buffer = bytearray()
+    async for data, end_of_http_chunk in response.content.iter_chunks():
+        buffer += data
+        if (end_of_http_chunk or not chunked) and buffer:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def frame_generator(response: ClientResponse, chunk_size: int | None = None) -> AsyncGenerator[bytes, None]:
+    """
+    Yield the frames (e.g. JSON documents) of the response as soon as each one is complete,
+    no matter how the body is split into chunks on the way.
+    :param response: The response whose body is streamed.
+    :param chunk_size: Maximum numbers of bytes read at a time. If it is None or not positive, read whatever has arrived.
+    """
+    if chunk_size is not None and chunk_size > 0:
+        chunks = response.content.iter_chunked(chunk_size)
+    else:
+        chunks = response.content.iter_any()
+    async for frame in aiter_frames(chunks, frame_format_of(response.headers.get("Content-Type"))):
+        yield frame
@@ -0,0 +1,246 @@
+"""
+Response Cache
+    Deterministic pipelines (OCR, ImgCap, TTS) are often asked the same question again:
+    the same screenshot or QQ image, the same catchphrase with the same TTS prompt.
+    Their responses are cached by a hash of the content of the query (e.g. the image bytes instead of the image path),
+    first in a small in-memory LRU tier, then, if enabled (`disk_max_mb`), in a size-bounded on-disk tier
+    which survives restarts. Both tiers evict the least recently used entries. See `ResponseCache.stats` for the hits and misses.
+"""
+import asyncio
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from common.io.file_sys import fs
+
+T = TypeVar("T")
+
+
+class ResponseCacheConfig(BaseModel):
+    enable: bool = Field(default=True, description="Whether the responses are cached by the content of the queries.")
+    memory_items: int = Field(default=128, description="Number of responses kept in memory.")
+    disk_max_mb: float = Field(default=0, description="Maximum size (MB) of the responses kept on disk. \n"
+                                                      "0 (the default) disables the disk cache.")
+    disk_dir: str = Field(default="", description="Directory of the disk cache. \n"
+                                                  "If empty, `.temp/cache` in the project directory is used.")
+
+
+def content_key(*parts: bytes | str | None) -> str:
+    """
+    Hash the parts into a cache key. The parts are length-prefixed, so that ("ab", "c") and ("a", "bc") differ.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b"\x00"
+        elif isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+_file_digests: Dict[Tuple[str, int, int], str] = dict()
+_file_digests_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """
+    SHA-256 of the content of the file, remembered until the file is modified.
+    """
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _file_digests_lock:
+        digest = _file_digests.get(memo_key, None)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        with _file_digests_lock:
+            _file_digests[memo_key] = digest
+    return digest
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.memory_hits: int = 0
+        self.disk_hits: int = 0
+        self.misses: int = 0
+        self.disk_evictions: int = 0
+
+    def record(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def summary(self) -> Dict[str, int | float]:
+        """
+        Get a snapshot of the statistics.
+        :return: {memory_hits, disk_hits, misses, disk_evictions, hit_rate}.
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "disk_evictions": self.disk_evictions,
+                    "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.}
+
+
+class _DiskTier:
+    def __init__(self, dir_path: Path, max_bytes: int, stats: CacheStats):
+        self._dir = dir_path
+        self._max_bytes = max_bytes
+        self._stats = stats
+        self._lock = threading.Lock()
+        # Key => size, the least recently used first
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        # The modification time of an entry is updated on each hit, so it keeps the LRU order across restarts
+        entries = []
+        for path in self._dir.glob("*/*"):
+            if path.is_file() and not path.name.endswith(".tmp"):
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.name, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size += size
+        self._evict()
+
+    def _path(self, key: str) -> Path:
+        return self._dir.joinpath(key[:2], key)
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            value = path.read_bytes()
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            with self._lock:
+                size = self._index.pop(key, None)
+                if size is not None:
+                    self._size -= size
+            return None
+
+    def put(self, key: str, value: bytes):
+        if len(value) > self._max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        # Write to a temp file first, so that a crash never leaves a truncated entry
+        tmp_path = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(value)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += len(value) - self._index.pop(key, 0)
+            self._index[key] = len(value)
+            self._evict()
+
+    def _evict(self):
+        while self._size > self._max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            self._stats.record("disk_evictions")
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ResponseCache:
+    def __init__(self, namespace: str, config: ResponseCacheConfig):
+        """
+        Two-tier LRU cache of the serialized responses of a pipeline.
+        :param namespace: Name of the pipeline, used as the directory of its disk tier.
+        :param config: Instance of ResponseCacheConfig.
+        """
+        assert config.memory_items >= 0 and config.disk_max_mb >= 0, f"Cache sizes must not be negative."
+        self.namespace = namespace
+        self.stats = CacheStats()
+        self._memory_items = config.memory_items
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: _DiskTier | None = None
+        if config.disk_max_mb > 0:
+            root = Path(config.disk_dir) if config.disk_dir else fs.temp_dir.joinpath("cache")
+            self._disk = _DiskTier(root.joinpath(namespace), int(config.disk_max_mb * 1024 * 1024), self.stats)
+
+    def _memory_put(self, key: str, value: bytes):
+        if self._memory_items == 0:
+            return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Look up the response, a disk hit is promoted to the memory tier.
+        """
+        with self._lock:
+            value = self._memory.get(key, None)
+            if value is not None:
+                self._memory.move_to_end(key)
+        if value is not None:
+            self.stats.record("memory_hits")
+            return value
+        if self._disk is not None:
+            value = self._disk.get(key)
+            if value is not None:
+                self.stats.record("disk_hits")
+                self._memory_put(key, value)
+                return value
+        self.stats.record("misses")
+        return None
+
+    def put(self, key: str, value: bytes):
+        self._memory_put(key, value)
+        if self._disk is not None:
+            try:
+                self._disk.put(key, value)
+            except OSError as e:
+                # The disk tier is an optimization, a full disk should not break the pipeline
+                logger.warning(f"Failed to write the cache of {self.namespace}: {e}")
+
+    async def get_or_predict(self, key: Callable[[], str | None], predict: Callable[[], Awaitable[T]],
+                             dump: Callable[[T], bytes], load: Callable[[bytes], T]) -> T:
+        """
+        Return the cached response of the query, or predict and cache it.
+        :param key: Computes the content key of the query, which returns None if the query can not be cached.
+                    It may hash a whole file, so it runs in a worker thread together with the lookup.
+        :param predict: Sends the query to the model.
+        :param dump: Serializes the response.
+        :param load: Deserializes the response.
+        :return: The response.
+        """
+
+        def lookup() -> Tuple[str | None, bytes | None]:
+            cache_key = key()
+            return cache_key, self.get(cache_key) if cache_key is not None else None
+
+        cache_key, value = await asyncio.to_thread(lookup)
+        if cache_key is None:
+            return await predict()
+        if value is not None:
+            logger.debug(f"{self.namespace} cache hit: {cache_key}")
+            return load(value)
+        prediction = await predict()
+        value = dump(prediction)
+        if self._disk is not None:
+            await asyncio.to_thread(self.put, cache_key, value)
+        else:
+            self.put(cache_key, value)
+        return prediction
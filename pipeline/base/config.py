@@ -10,6 +10,12 @@ from pipeline.vidcap.config import VidCapPipelineConfig
 from pipeline.vla.config import VLAPipelineConfig
 
 
+class HttpTransportConfig(BaseModel):
+    pool_connections: int = Field(default=16, description="Number of hosts whose keep-alive connection pools are kept.")
+    pool_maxsize: int = Field(default=8, description="Maximum number of connections to each host. \n"
+                                                     "Requests exceeding it wait for a free connection.")
+
+
 class PipelineConfig(BaseModel):
     asr: ASRPipelineConfig = Field(default=ASRPipelineConfig(),
                                    description="Configuration for the Automatic Speech Recognition pipeline.")
@@ -26,3 +32,5 @@ class PipelineConfig(BaseModel):
     vla: VLAPipelineConfig = Field(default=VLAPipelineConfig(),
                                    description="Configuration for the Visual Language Action pipeline.")
     vec_db: VectorDBConfig = Field(default=VectorDBConfig(), description="Configuration for the Vector Database.")
+    http: HttpTransportConfig = Field(default=HttpTransportConfig(),
+                                      description="Configuration for the pooled keep-alive HTTP connections shared by all the pipelines.")
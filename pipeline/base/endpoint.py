@@ -0,0 +1,322 @@
+"""
+Endpoint Pool
+    A pipeline may send its requests to several replicas of the same model (e.g. several TTS servers of ZerolanCore).
+    Each request goes to the available replica with the fewest outstanding requests.
+    A replica failing `failure_threshold` times in a row is skipped (its circuit is open) until either
+    a health probe succeeds or `reset_timeout` passes, after which one trial request is let through (half-open).
+    With hedging, if a request has not been answered after the p95 latency, a duplicate is sent to another replica
+    and the first answer wins, the other request is cancelled.
+"""
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Awaitable, Callable, Dict, List, Set, TypeVar
+from urllib.parse import urlparse, urlunparse
+
+import aiohttp
+from loguru import logger
+from pydantic import BaseModel, Field
+
+from pipeline.base.transport import async_http_transport
+
+T = TypeVar("T")
+
+
+class EndpointPoolConfig(BaseModel):
+    replicas: List[str] = Field(default=[], description="Base URLs (e.g. `http://192.168.1.2:11000`) of other replicas "
+                                                        "serving the same model. \n"
+                                                        "The paths of `predict_url` and `stream_predict_url` are used "
+                                                        "for the replicas too.")
+    hedge: bool = Field(default=False, description="Whether to send a duplicate request to another replica "
+                                                   "when a request is slower than usual, and take the first answer.")
+    hedge_percentile: float = Field(default=0.95, description="A request slower than this percentile of "
+                                                              "the recent latencies is hedged.")
+    hedge_min_samples: int = Field(default=20, description="Number of latencies needed before any request is hedged.")
+    failure_threshold: int = Field(default=3, description="Consecutive failures that open the circuit of a replica.")
+    reset_timeout: float = Field(default=10., description="Seconds before a trial request is sent to a replica "
+                                                          "whose circuit is open.")
+    probe_interval: float = Field(default=5., description="Seconds between the health probes of the replicas "
+                                                          "whose circuit is open. \n"
+                                                          "0 disables the probes.")
+    probe_path: str = Field(default="", description="Path probed with GET (healthy if the status is below 500). \n"
+                                                    "If empty, the probe only opens a TCP connection.")
+
+
+class NoEndpointAvailableError(Exception):
+    def __init__(self, msg: str = "The circuits of all the endpoints are open."):
+        super().__init__(msg)
+
+
+class CircuitState(str, Enum):
+    Closed = "closed"
+    Open = "open"
+    HalfOpen = "half_open"
+
+
+class Endpoint:
+    def __init__(self, base_url: str):
+        uri = urlparse(base_url)
+        self.scheme: str = uri.scheme
+        self.netloc: str = uri.netloc
+        self.outstanding: int = 0
+        self.requests: int = 0
+        self.failures: int = 0
+        self.consecutive_failures: int = 0
+        self.state: CircuitState = CircuitState.Closed
+        self.opened_at: float = 0.
+        # Only one trial request is let through a half-open circuit
+        self.trial_in_flight: bool = False
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.scheme}://{self.netloc}"
+
+    def __repr__(self):
+        return f"Endpoint({self.base_url}, state={self.state.value}, outstanding={self.outstanding})"
+
+
+def _is_endpoint_failure(e: BaseException) -> bool:
+    # A bad query is not the fault of the replica
+    if isinstance(e, aiohttp.ClientResponseError):
+        return e.status >= 500
+    return isinstance(e, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError))
+
+
+class EndpointPool:
+    def __init__(self, urls: List[str], config: EndpointPoolConfig | None = None):
+        """
+        Replicas of one model, see the module document.
+        :param urls: URLs of the replicas, only the scheme and the host are used.
+        :param config: Instance of EndpointPoolConfig.
+        """
+        assert len(urls) > 0, f"At least one endpoint is needed."
+        self._config = config if config is not None else EndpointPoolConfig()
+        self._endpoints: List[Endpoint] = []
+        for url in urls:
+            endpoint = Endpoint(url)
+            if endpoint.base_url not in [e.base_url for e in self._endpoints]:
+                self._endpoints.append(endpoint)
+        self._latencies: deque = deque(maxlen=200)
+        self._round_robin = itertools.count()
+        self._probe_task: asyncio.Task | None = None
+        self.hedges: int = 0
+
+    @staticmethod
+    def from_config(url: str, config: EndpointPoolConfig | None) -> "EndpointPool":
+        """
+        Create the pool of the replicas of the model behind `url`.
+        """
+        replicas = config.replicas if config is not None else []
+        return EndpointPool([url] + replicas, config)
+
+    @property
+    def endpoints(self) -> List[Endpoint]:
+        return self._endpoints
+
+    @staticmethod
+    def resolve(url: str, endpoint: Endpoint) -> str:
+        """
+        Point the URL at the endpoint, keeping its path and query.
+        """
+        uri = urlparse(url)
+        return urlunparse((endpoint.scheme, endpoint.netloc, uri.path, uri.params, uri.query, uri.fragment))
+
+    def _available(self, endpoint: Endpoint, now: float) -> bool:
+        if endpoint.state == CircuitState.Closed:
+            return True
+        if endpoint.state == CircuitState.Open and now - endpoint.opened_at >= self._config.reset_timeout:
+            endpoint.state = CircuitState.HalfOpen
+        return endpoint.state == CircuitState.HalfOpen and not endpoint.trial_in_flight
+
+    def acquire(self, exclude: Set[Endpoint] | None = None) -> Endpoint | None:
+        """
+        Pick the available endpoint with the fewest outstanding requests, ties are broken in turn.
+        The caller must call `release` when the request finishes.
+        :return: The endpoint, None if no endpoint is available.
+        """
+        now = time.monotonic()
+        candidates = [e for e in self._endpoints if (exclude is None or e not in exclude) and self._available(e, now)]
+        if len(candidates) == 0:
+            return None
+        start = next(self._round_robin) % len(candidates)
+        rotated = candidates[start:] + candidates[:start]
+        endpoint = min(rotated, key=lambda e: e.outstanding)
+        if endpoint.state == CircuitState.HalfOpen:
+            endpoint.trial_in_flight = True
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        return endpoint
+
+    def release(self, endpoint: Endpoint, error: BaseException | None = None, latency: float | None = None):
+        """
+        Report the outcome of a request to the endpoint.
+        :param endpoint: The endpoint got from `acquire`.
+        :param error: The exception raised by the request, None if it succeeded.
+        :param latency: Seconds the successful request took.
+        """
+        endpoint.outstanding -= 1
+        endpoint.trial_in_flight = False
+        if error is None:
+            if latency is not None:
+                self._latencies.append(latency)
+            endpoint.consecutive_failures = 0
+            if endpoint.state != CircuitState.Closed:
+                self._close(endpoint, "a request succeeded")
+        elif _is_endpoint_failure(error):
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            if endpoint.state == CircuitState.HalfOpen or \
+                    endpoint.consecutive_failures >= self._config.failure_threshold:
+                self._open(endpoint, error)
+        elif endpoint.state == CircuitState.HalfOpen:
+            # Cancelled or failed for other reasons, the trial tells nothing
+            endpoint.state = CircuitState.Open
+
+    def _open(self, endpoint: Endpoint, error: BaseException):
+        if endpoint.state != CircuitState.Open:
+            logger.warning(f"Circuit of {endpoint.base_url} opened after {endpoint.consecutive_failures} failures: "
+                           f"{error!r}")
+        endpoint.state = CircuitState.Open
+        endpoint.opened_at = time.monotonic()
+        self._ensure_probing()
+
+    def _close(self, endpoint: Endpoint, reason: str):
+        logger.info(f"Circuit of {endpoint.base_url} closed: {reason}")
+        endpoint.state = CircuitState.Closed
+        endpoint.consecutive_failures = 0
+
+    def hedge_delay(self) -> float | None:
+        """
+        Seconds to wait before hedging a request, None if hedging does not apply.
+        """
+        if not self._config.hedge or len(self._endpoints) < 2 or len(self._latencies) == 0 \
+                or len(self._latencies) < self._config.hedge_min_samples:
+            return None
+        latencies = sorted(self._latencies)
+        idx = min(len(latencies) - 1, int(self._config.hedge_percentile * len(latencies)))
+        return latencies[idx]
+
+    async def _attempt(self, endpoint: Endpoint, url: str, send: Callable[[str], Awaitable[T]]) -> T:
+        t_start = time.perf_counter()
+        try:
+            result = await send(self.resolve(url, endpoint))
+        except BaseException as e:
+            self.release(endpoint, error=e)
+            raise
+        self.release(endpoint, latency=time.perf_counter() - t_start)
+        return result
+
+    async def request(self, url: str, send: Callable[[str], Awaitable[T]]) -> T:
+        """
+        Send a request to the best endpoint, hedged with another endpoint if it is slow,
+        or retried on another endpoint if the endpoint fails.
+        :param url: URL of the request, its host is replaced by the chosen endpoint.
+        :param send: Sends the request to the given URL and returns the result, it may be called more than once.
+        :return: The first result.
+        """
+        primary = self.acquire()
+        if primary is None:
+            raise NoEndpointAvailableError()
+        tried = {primary}
+        tasks = {asyncio.create_task(self._attempt(primary, url, send))}
+        delay = self.hedge_delay()
+        error: BaseException | None = None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than usual, send a duplicate to another endpoint
+                    delay = None
+                    secondary = self.acquire(exclude=tried)
+                    if secondary is not None:
+                        self.hedges += 1
+                        logger.debug(f"Hedge {url} with {secondary.base_url}")
+                        tried.add(secondary)
+                        tasks.add(asyncio.create_task(self._attempt(secondary, url, send)))
+                    continue
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not tasks and _is_endpoint_failure(error):
+                    # Fail over to another endpoint
+                    delay = None
+                    secondary = self.acquire(exclude=tried)
+                    if secondary is not None:
+                        logger.warning(f"{url} failed, retry with {secondary.base_url}: {error!r}")
+                        tried.add(secondary)
+                        tasks.add(asyncio.create_task(self._attempt(secondary, url, send)))
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @asynccontextmanager
+    async def stream(self, url: str):
+        """
+        Choose an endpoint for a streamed request, which is neither hedged nor retried.
+        Usage:
+            async with pool.stream(url) as resolved_url:
+                ...
+        """
+        endpoint = self.acquire()
+        if endpoint is None:
+            raise NoEndpointAvailableError()
+        t_start = time.perf_counter()
+        try:
+            yield self.resolve(url, endpoint)
+        except BaseException as e:
+            self.release(endpoint, error=e)
+            raise
+        # The duration of a stream is not a latency, it is not used for hedging
+        self.release(endpoint)
+        logger.debug(f"Stream from {endpoint.base_url} took {time.perf_counter() - t_start:.4f} s")
+
+    def _ensure_probing(self):
+        if self._config.probe_interval <= 0:
+            return
+        if self._probe_task is not None and not self._probe_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._probe_task = loop.create_task(self._probe_loop())
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self._config.probe_interval)
+            opened = [e for e in self._endpoints if e.state != CircuitState.Closed]
+            if len(opened) == 0:
+                return
+            for endpoint, healthy in zip(opened, await asyncio.gather(*[self._probe(e) for e in opened])):
+                if healthy and endpoint.state != CircuitState.Closed:
+                    self._close(endpoint, "health probe succeeded")
+
+    async def _probe(self, endpoint: Endpoint) -> bool:
+        try:
+            if self._config.probe_path:
+                url = endpoint.base_url + self._config.probe_path
+                async with async_http_transport.session().get(url, timeout=aiohttp.ClientTimeout(total=2)) as resp:
+                    return resp.status < 500
+            host, _, port = endpoint.netloc.rpartition(":")
+            if not host:
+                host, port = endpoint.netloc, "443" if endpoint.scheme == "https" else "80"
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout=2)
+            writer.close()
+            return True
+        except Exception as e:
+            logger.debug(f"Health probe of {endpoint.base_url} failed: {e!r}")
+            return False
+
+    def summary(self) -> Dict[str, Dict[str, int | str]]:
+        """
+        Get a snapshot of the endpoints.
+        :return: Base URL => {state, outstanding, requests, failures}.
+        """
+        return {e.base_url: {"state": e.state.value, "outstanding": e.outstanding,
+                             "requests": e.requests, "failures": e.failures} for e in self._endpoints}
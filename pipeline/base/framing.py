@@ -0,0 +1,195 @@
+"""
+Stream Framing
+    A streamed response carries one prediction per frame, but TCP does not preserve the frame boundaries:
+    a chunk read from the socket may hold half a frame, or several frames.
+    `FrameDecoder` reassembles the frames incrementally, so each prediction is decoded as soon as its last byte arrives.
+    Supported formats, chosen by the Content-Type of the response:
+        - NDJSON (`application/x-ndjson` or `application/jsonl`): one JSON document per line.
+        - Length-prefixed (`application/x-length-prefixed`): a 4-byte big-endian length followed by the frame.
+        - Otherwise, JSON documents sent back to back (what the model servers send now), split by matching brackets.
+    The frames are bytes, pydantic parses them without decoding them to str first.
+"""
+import re
+from enum import Enum
+from typing import AsyncIterable, AsyncGenerator, Generator, Iterable, List
+
+
+class FramingError(Exception):
+    def __init__(self, msg: str):
+        super().__init__(msg)
+
+
+class FrameFormat(str, Enum):
+    NDJSON = "ndjson"
+    LengthPrefixed = "length-prefixed"
+    JSON = "json"
+
+
+_LENGTH_PREFIX_SIZE = 4
+_WHITESPACE = b" \t\r\n"
+# Bytes which may change the nesting depth or the string state of a JSON document
+_JSON_TOKEN = re.compile(rb'[{}\[\]"\\]')
+_JSON_STRING_TOKEN = re.compile(rb'["\\]')
+
+
+def frame_format_of(content_type: str | None) -> FrameFormat:
+    """
+    Choose the frame format by the Content-Type of the response.
+    """
+    content_type = (content_type or "").lower()
+    if "ndjson" in content_type or "jsonl" in content_type:
+        return FrameFormat.NDJSON
+    if "length-prefixed" in content_type:
+        return FrameFormat.LengthPrefixed
+    return FrameFormat.JSON
+
+
+class FrameDecoder:
+    def __init__(self, fmt: FrameFormat = FrameFormat.JSON):
+        """
+        Incremental decoder splitting a byte stream into frames.
+        The buffer only holds the incomplete frame, and the bytes already scanned are never scanned again.
+        :param fmt: Format of the frames.
+        """
+        self.format = fmt
+        self._buffer = bytearray()
+        # Offset in the buffer where the scan resumes
+        self._scan = 0
+        # State of the JSON document being scanned
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+
+    def feed(self, data: bytes | bytearray | memoryview) -> List[bytes]:
+        """
+        Add the received bytes.
+        :param data: Any number of bytes.
+        :return: The frames completed by these bytes.
+        """
+        if not data:
+            return []
+        self._buffer += data
+        if self.format == FrameFormat.NDJSON:
+            frames, consumed = self._split_lines()
+        elif self.format == FrameFormat.LengthPrefixed:
+            frames, consumed = self._split_length_prefixed()
+        else:
+            frames, consumed = self._split_json()
+        if consumed > 0:
+            del self._buffer[:consumed]
+            self._scan -= consumed
+            if self._start >= 0:
+                self._start -= consumed
+        return frames
+
+    def close(self) -> List[bytes]:
+        """
+        Finish the stream.
+        :return: The last frame, if the format allows it to end without a delimiter.
+        """
+        rest = bytes(self._buffer).strip(_WHITESPACE)
+        self._buffer.clear()
+        self._scan = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        if not rest:
+            return []
+        if self.format == FrameFormat.NDJSON:
+            return [rest]
+        raise FramingError(f"Stream ended in the middle of a frame ({len(rest)} bytes left)")
+
+    def _split_lines(self):
+        frames = []
+        buffer = self._buffer
+        start = 0
+        while True:
+            end = buffer.find(b"\n", self._scan)
+            if end < 0:
+                self._scan = len(buffer)
+                return frames, start
+            line = bytes(buffer[start:end]).strip(_WHITESPACE)
+            if line:
+                frames.append(line)
+            start = self._scan = end + 1
+
+    def _split_length_prefixed(self):
+        frames = []
+        buffer = self._buffer
+        start = 0
+        while len(buffer) - start >= _LENGTH_PREFIX_SIZE:
+            size = int.from_bytes(buffer[start:start + _LENGTH_PREFIX_SIZE], "big")
+            end = start + _LENGTH_PREFIX_SIZE + size
+            if len(buffer) < end:
+                break
+            frames.append(bytes(buffer[start + _LENGTH_PREFIX_SIZE:end]))
+            start = end
+        self._scan = start
+        return frames, start
+
+    def _split_json(self):
+        frames = []
+        buffer = self._buffer
+        pos = self._scan
+        consumed = 0
+        while pos < len(buffer):
+            if self._start < 0:
+                # Skip the whitespaces between the documents
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos == len(buffer):
+                    consumed = pos
+                    break
+                if buffer[pos] not in b"{[":
+                    raise FramingError(f"Expected a JSON object or array, got {bytes(buffer[pos:pos + 16])!r}")
+                self._start = pos
+            match = (_JSON_STRING_TOKEN if self._in_string else _JSON_TOKEN).search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            token = buffer[match.start()]
+            pos = match.end()
+            if token == 0x5C:  # Backslash, skip the escaped byte
+                if pos == len(buffer):
+                    # Rescan the backslash when the escaped byte arrives
+                    pos -= 1
+                    break
+                pos += 1
+            elif token == 0x22:  # Quote
+                self._in_string = not self._in_string
+            elif token in b"{[":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    frames.append(bytes(buffer[self._start:pos]))
+                    self._start = -1
+                    consumed = pos
+        self._scan = pos
+        return frames, consumed
+
+
+def iter_frames(chunks: Iterable[bytes], fmt: FrameFormat = FrameFormat.JSON) -> Generator[bytes, None, None]:
+    """
+    Split the chunks of a streamed response into frames.
+    :param chunks: Chunks as they are received.
+    :param fmt: Format of the frames.
+    """
+    decoder = FrameDecoder(fmt)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
+
+
+async def aiter_frames(chunks: AsyncIterable[bytes], fmt: FrameFormat = FrameFormat.JSON) -> AsyncGenerator[bytes, None]:
+    """
+    Split the chunks of a streamed response into frames.
+    :param chunks: Chunks as they are received.
+    :param fmt: Format of the frames.
+    """
+    decoder = FrameDecoder(fmt)
+    async for chunk in chunks:
+        for frame in decoder.feed(chunk):
+            yield frame
+    for frame in decoder.close():
+        yield frame
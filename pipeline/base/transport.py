@@ -0,0 +1,150 @@
+"""
+HTTP Transport
+    All the pipelines, the third-party APIs included, send their requests through one pooled, keep-alive
+    `aiohttp.ClientSession` per event loop,
+    so that an utterance, a clause or a screenshot does not open a new TCP (and TLS) connection each time.
+    The size of the pool of each host also limits the concurrent requests to the host.
+    For each request, the time spent establishing a new connection and the time spent on the request itself are
+    recorded separately per host, see `AsyncHttpTransport.stats`.
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, TYPE_CHECKING
+from urllib.parse import urlparse
+
+import aiohttp
+from loguru import logger
+
+if TYPE_CHECKING:
+    from pipeline.base.config import HttpTransportConfig
+
+
+class TransportStats:
+    """
+    Number of requests and connections, and the time spent on connection setup and on the requests, per host.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = dict()
+
+    def record(self, host: str, new_connections: int, connect: float, total: float):
+        with self._lock:
+            stat = self._stats.get(host, None)
+            if stat is None:
+                stat = {"requests": 0, "new_connections": 0, "total_connect": 0., "total_transfer": 0.}
+                self._stats[host] = stat
+            stat["requests"] += 1
+            stat["new_connections"] += new_connections
+            stat["total_connect"] += connect
+            stat["total_transfer"] += total - connect
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get a snapshot of the statistics.
+        :return: Host => {requests, new_connections, reused, avg_connect, avg_transfer} (seconds).
+        """
+        with self._lock:
+            result = dict()
+            for host, stat in self._stats.items():
+                count = stat["requests"]
+                result[host] = {
+                    "requests": count,
+                    "new_connections": stat["new_connections"],
+                    "reused": max(0, count - stat["new_connections"]),
+                    "avg_connect": stat["total_connect"] / stat["new_connections"] if stat["new_connections"] else 0.,
+                    "avg_transfer": stat["total_transfer"] / count if count else 0.,
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+async def _on_request_start(session, ctx: SimpleNamespace, params):
+    ctx.t_start = time.perf_counter()
+    ctx.connect, ctx.new_connections = 0., 0
+
+
+async def _on_connection_create_start(session, ctx: SimpleNamespace, params):
+    ctx.t_connect = time.perf_counter()
+
+
+async def _on_connection_create_end(session, ctx: SimpleNamespace, params):
+    # Including the TLS handshake
+    ctx.connect += time.perf_counter() - ctx.t_connect
+    ctx.new_connections += 1
+
+
+class AsyncHttpTransport:
+    def __init__(self, pool_connections: int = 16, pool_maxsize: int = 8):
+        """
+        Pooled keep-alive HTTP transport for coroutines.
+        A session is bound to the event loop creating it, so each event loop has its own session,
+        the statistics are shared by all the sessions.
+        :param pool_connections: Number of hosts whose connections are kept.
+        :param pool_maxsize: Maximum number of connections to each host,
+                             requests exceeding it wait for a free connection.
+        """
+        self.stats = TransportStats()
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._lock = threading.Lock()
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = dict()
+
+    def configure(self, config: "HttpTransportConfig"):
+        """
+        Apply the transport config to the sessions created later.
+        """
+        assert config.pool_connections > 0 and config.pool_maxsize > 0, f"Pool sizes must be positive."
+        self._pool_connections = config.pool_connections
+        self._pool_maxsize = config.pool_maxsize
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(_on_request_start)
+        trace.on_connection_create_start.append(_on_connection_create_start)
+        trace.on_connection_create_end.append(_on_connection_create_end)
+        trace.on_request_end.append(self._on_request_end)
+        connector = aiohttp.TCPConnector(limit=self._pool_connections * self._pool_maxsize,
+                                         limit_per_host=self._pool_maxsize)
+        # Model inference may take long, only the pipelines decide when to give up
+        timeout = aiohttp.ClientTimeout(total=None)
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=[trace])
+
+    async def _on_request_end(self, session, ctx: SimpleNamespace, params):
+        # Until the response headers are received
+        total = time.perf_counter() - ctx.t_start
+        self.stats.record(urlparse(str(params.url)).netloc, ctx.new_connections, ctx.connect, total)
+        logger.debug("{} {}: {} connection, connect {:.4f} s, transfer {:.4f} s", params.method, params.url,
+                     "new" if ctx.new_connections else "reused", ctx.connect, total - ctx.connect)
+
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Get the session of the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(loop, None)
+            if session is None or session.closed:
+                # Drop the sessions of the closed loops
+                for closed in [l for l in self._sessions if l.is_closed()]:
+                    del self._sessions[closed]
+                session = self._create_session()
+                self._sessions[loop] = session
+            return session
+
+    async def close(self):
+        """
+        Close the session of the running event loop.
+        """
+        with self._lock:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+async_http_transport = AsyncHttpTransport()
@@ -1,6 +1,13 @@
 from pydantic import BaseModel, Field
 
-from pipeline.db.milvus.milvus_sync import MilvusDatabaseConfig
+from pipeline.base.base_sync import AbstractPipelineConfig
+
+
+class MilvusDatabaseConfig(AbstractPipelineConfig):
+    insert_url: str = Field(default="http://127.0.0.1:11000/milvus/insert",
+                            description="The URL for inserting data into Milvus.")
+    search_url: str = Field(default="http://127.0.0.1:11000/milvus/search",
+                            description="The URL for searching data in Milvus.")
 
 
 #########
@@ -3,6 +3,8 @@ from pydantic import Field
 from common.enumerator import BaseEnum
 from common.utils.enum_util import enum_to_markdown
 from pipeline.base.base_sync import AbstractPipelineConfig
+from pipeline.base.cache import ResponseCacheConfig
+from pipeline.base.endpoint import EndpointPoolConfig
 
 
 ##########
@@ -21,3 +23,7 @@ class ImgCapPipelineConfig(AbstractPipelineConfig):
                              description="The URL for image captioning prediction requests.")
     stream_predict_url: str = Field(default="http://127.0.0.1:11000/img-cap/stream-predict",
                                     description="The URL for streaming image captioning prediction requests.")
+    endpoints: EndpointPoolConfig = Field(default=EndpointPoolConfig(),
+                                          description="Replicas of the image captioning model, load balancing, hedging and circuit breaking.")
+    cache: ResponseCacheConfig = Field(default=ResponseCacheConfig(),
+                                       description="Cache of the image captioning responses, keyed by the content of the queries.")
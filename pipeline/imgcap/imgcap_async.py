@@ -1,21 +1,25 @@
-from typing import Literal
-
 from typeguard import typechecked
 from zerolan.data.pipeline.img_cap import ImgCapQuery, ImgCapPrediction
 
-from pipeline.base.base_async import BaseAsyncPipeline, _parse_imgcap_query, get_base_url
+from pipeline.base.base_async import BaseAsyncPipeline, _parse_imgcap_query
 from pipeline.imgcap.config import ImgCapPipelineConfig, ImgCapModelIdEnum
 
 
 class ImgCapAsyncPipeline(BaseAsyncPipeline):
     def __init__(self, config: ImgCapPipelineConfig):
-        super().__init__(base_url=get_base_url(config.predict_url))
-        self._model_id: ImgCapModelIdEnum = config.model_id
-        self._predict_endpoint = "/img-cap/predict"
-        self._stream_predict_endpoint = "/img-cap/stream-predict"
+        super().__init__(config)
+        self.model_id: ImgCapModelIdEnum = config.model_id
+        self.predict_url: str = config.predict_url
 
     @typechecked
     async def predict(self, query: ImgCapQuery) -> ImgCapPrediction:
-        data = _parse_imgcap_query(query)
-        async with self.session.post(self._predict_endpoint, data=data) as resp:
-            return await resp.json(encoding='utf8', loads=ImgCapPrediction.model_validate_json)
+        def load(value: bytes) -> ImgCapPrediction:
+            prediction = ImgCapPrediction.model_validate_json(value)
+            prediction.id = query.id
+            return prediction
+
+        return await self._cached_predict(
+            key=lambda: self._image_cache_key(query),
+            predict=lambda: self._post_model(self.predict_url, ImgCapPrediction, **_parse_imgcap_query(query)),
+            dump=lambda prediction: prediction.model_dump_json().encode("utf-8"),
+            load=load)
@@ -1,14 +1,14 @@
-from requests import Response
 from zerolan.data.pipeline.img_cap import ImgCapQuery, ImgCapPrediction
 
-from pipeline.base.base_sync import AbstractImagePipeline
+from pipeline.base.base_sync import SyncPipelineFacade
 from pipeline.imgcap.config import ImgCapPipelineConfig
+from pipeline.imgcap.imgcap_async import ImgCapAsyncPipeline
 
 
-class ImgCapSyncPipeline(AbstractImagePipeline):
+class ImgCapSyncPipeline(SyncPipelineFacade):
 
     def __init__(self, config: ImgCapPipelineConfig):
-        super().__init__(config)
+        super().__init__(ImgCapAsyncPipeline(config))
 
     def predict(self, query: ImgCapQuery) -> ImgCapPrediction | None:
         assert isinstance(query, ImgCapQuery)
@@ -17,10 +17,3 @@ class ImgCapSyncPipeline(AbstractImagePipeline):
     def stream_predict(self, query: ImgCapQuery, chunk_size: int | None = None):
         assert isinstance(query, ImgCapQuery)
         raise NotImplementedError()
-
-    def parse_query(self, query: any) -> dict:
-        return super().parse_query(query)
-
-    def parse_prediction(self, response: Response) -> ImgCapPrediction:
-        json_val = response.content
-        return ImgCapPrediction.model_validate_json(json_val)
@@ -3,6 +3,7 @@ from pydantic import Field
 from common.enumerator import BaseEnum
 from common.utils.enum_util import enum_to_markdown
 from pipeline.base.base_sync import AbstractPipelineConfig
+from pipeline.base.endpoint import EndpointPoolConfig
 
 
 #######
@@ -36,3 +37,5 @@ class LLMPipelineConfig(AbstractPipelineConfig):
                              description="The URL for LLM prediction requests.")
     stream_predict_url: str = Field(default="http://127.0.0.1:11000/llm/stream-predict",
                                     description="The URL for streaming LLM prediction requests.")
+    endpoints: EndpointPoolConfig = Field(default=EndpointPoolConfig(),
+                                          description="Replicas of the LLM model, load balancing, hedging and circuit breaking.")
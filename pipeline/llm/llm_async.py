@@ -1,25 +1,107 @@
-from typing import Generator
+from typing import AsyncGenerator
 
+from openai import AsyncOpenAI
 from typeguard import typechecked
-from zerolan.data.pipeline.llm import LLMQuery, LLMPrediction
+from zerolan.data.pipeline.llm import LLMQuery, LLMPrediction, RoleEnum, Conversation
 
-from pipeline.base.base_async import BaseAsyncPipeline, get_base_url
+from pipeline.base.base_async import BaseAsyncPipeline, frame_generator, raise_for_status
 from pipeline.llm.config import LLMPipelineConfig, LLMModelIdEnum
 
 
+def _to_openai_format(query: LLMQuery):
+    messages = []
+    for chat in query.history:
+        messages.append({
+            "role": chat.role,
+            "content": chat.content
+        })
+    messages.append({
+        "role": "user",
+        "content": query.text
+    })
+    return messages
+
+
+async def _openai_predict(query: LLMQuery, wrapper):
+    messages = _to_openai_format(query)
+    completion = await wrapper(messages)
+    resp = completion.choices[0].message.content
+    query.history.append(Conversation(role=RoleEnum.user, content=query.text))
+    query.history.append(Conversation(role=RoleEnum.assistant, content=resp))
+    return LLMPrediction(response=resp, history=query.history)
+
+
 class LLMAsyncPipeline(BaseAsyncPipeline):
     def __init__(self, config: LLMPipelineConfig):
-        super().__init__(base_url=get_base_url(config.predict_url))
-        self._model_id: LLMModelIdEnum = config.model_id
-        self._predict_endpoint = "/llm/predict"
-        self._stream_predict_endpoint = "/llm/stream-predict"
+        super().__init__(config)
+        self.model_id: LLMModelIdEnum = config.model_id
+        self.predict_url: str = config.predict_url
+        self.stream_predict_url: str = config.stream_predict_url
+        # Kimi API supported
+        # Reference: https://platform.moonshot.cn/docs/guide/start-using-kimi-api
+        # Deepseek API supported
+        # Reference: https://api-docs.deepseek.com/zh-cn/
+        self._is_openai_format = config.openai_format
+        if self._is_openai_format:
+            assert config.predict_url and config.stream_predict_url, "Please provide `predict_url` or `stream_predict_url`"
+            base_url = config.predict_url if config.predict_url else config.stream_predict_url
+            self._remote_model = AsyncOpenAI(api_key=config.api_key, base_url=base_url)
 
     @typechecked
     async def predict(self, query: LLMQuery) -> LLMPrediction:
-        async with self.session.post(self._predict_endpoint, json=query.model_dump()) as resp:
-            return await resp.json(encoding='utf8', loads=LLMPrediction.model_validate_json)
+        if self._is_openai_format:
+            return await self._openai_format_predict(query)
+        return await self._post_model(self.predict_url, LLMPrediction, json=query.model_dump())
 
-    @typechecked
-    async def stream_predict(self, query: LLMQuery) -> Generator[LLMPrediction, None, None]:
-        async with self.session.post(self._stream_predict_endpoint, json=query.model_dump()) as resp:
-            return await resp.json(encoding='utf8', loads=LLMPrediction.model_validate_json)
+    def _openai_options(self) -> dict:
+        if self.model_id == "moonshot-v1-8k":
+            return {"temperature": 0.3}
+        elif self.model_id in ("deepseek-chat", "doubao-seed-1-6-flash-250715"):
+            return {}
+        else:
+            raise NotImplementedError(f"Unsupported model {self.model_id}")
+
+    async def _openai_format_predict(self, query: LLMQuery) -> LLMPrediction:
+        options = self._openai_options()
+
+        def wrapper(messages):
+            return self._remote_model.chat.completions.create(
+                model=self.model_id,
+                messages=messages,
+                stream=False,
+                **options
+            )
+
+        return await _openai_predict(query, wrapper)
+
+    async def _openai_format_stream_predict(self, query: LLMQuery) -> AsyncGenerator[LLMPrediction, None]:
+        # Like the model servers, each prediction holds the whole response generated so far
+        stream = await self._remote_model.chat.completions.create(
+            model=self.model_id,
+            messages=_to_openai_format(query),
+            stream=True,
+            **self._openai_options()
+        )
+        resp = ""
+        try:
+            async for chunk in stream:
+                if len(chunk.choices) == 0 or not chunk.choices[0].delta.content:
+                    continue
+                resp += chunk.choices[0].delta.content
+                yield LLMPrediction(response=resp, history=query.history + [
+                    Conversation(role=RoleEnum.user, content=query.text),
+                    Conversation(role=RoleEnum.assistant, content=resp)])
+        finally:
+            await stream.close()
+
+    async def stream_predict(self, query: LLMQuery, chunk_size: int | None = None) -> AsyncGenerator[LLMPrediction, None]:
+        assert isinstance(query, LLMQuery)
+        if self._is_openai_format:
+            async for prediction in self._openai_format_stream_predict(query):
+                yield prediction
+            return
+        async with self.endpoint_pool(self.stream_predict_url).stream(self.stream_predict_url) as url:
+            async with self.session.post(url, json=query.model_dump()) as resp:
+                await raise_for_status(resp)
+                async for frame in frame_generator(resp, chunk_size):
+                    yield LLMPrediction.model_validate_json(frame)
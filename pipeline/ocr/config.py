@@ -3,6 +3,8 @@ from pydantic import Field
 from common.enumerator import BaseEnum
 from common.utils.enum_util import enum_to_markdown
 from pipeline.base.base_sync import AbstractPipelineConfig
+from pipeline.base.cache import ResponseCacheConfig
+from pipeline.base.endpoint import EndpointPoolConfig
 
 
 #######
@@ -21,3 +23,7 @@ class OCRPipelineConfig(AbstractPipelineConfig):
                              description="The URL for OCR prediction requests.")
     stream_predict_url: str = Field(default="http://127.0.0.1:11000/ocr/stream-predict",
                                     description="The URL for streaming OCR prediction requests.")
+    endpoints: EndpointPoolConfig = Field(default=EndpointPoolConfig(),
+                                          description="Replicas of the OCR model, load balancing, hedging and circuit breaking.")
+    cache: ResponseCacheConfig = Field(default=ResponseCacheConfig(),
+                                       description="Cache of the OCR responses, keyed by the content of the queries.")
@@ -1,21 +1,25 @@
-from typing import Literal
-
 from typeguard import typechecked
 from zerolan.data.pipeline.ocr import OCRQuery, OCRPrediction
 
-from pipeline.base.base_async import BaseAsyncPipeline, _parse_imgcap_query, get_base_url
+from pipeline.base.base_async import BaseAsyncPipeline, _parse_imgcap_query
 from pipeline.ocr.config import OCRPipelineConfig, OCRModelIdEnum
 
 
 class OCRAsyncPipeline(BaseAsyncPipeline):
     def __init__(self, config: OCRPipelineConfig):
-        super().__init__(base_url=get_base_url(config.predict_url))
-        self._model_id: OCRModelIdEnum = config.model_id
-        self._predict_endpoint = "/ocr/predict"
-        self._stream_predict_endpoint = "/ocr/stream-predict"
+        super().__init__(config)
+        self.model_id: OCRModelIdEnum = config.model_id
+        self.predict_url: str = config.predict_url
 
     @typechecked
     async def predict(self, query: OCRQuery) -> OCRPrediction:
-        data = _parse_imgcap_query(query)
-        async with self.session.post(self._predict_endpoint, data=data) as resp:
-            return await resp.json(encoding='utf8', loads=OCRPrediction.model_validate_json)
+        def load(value: bytes) -> OCRPrediction:
+            prediction = OCRPrediction.model_validate_json(value)
+            prediction.id = query.id
+            return prediction
+
+        return await self._cached_predict(
+            key=lambda: self._image_cache_key(query),
+            predict=lambda: self._post_model(self.predict_url, OCRPrediction, **_parse_imgcap_query(query)),
+            dump=lambda prediction: prediction.model_dump_json().encode("utf-8"),
+            load=load)
@@ -1,16 +1,16 @@
 from typing import List
 
-from requests import Response
 from zerolan.data.pipeline.ocr import OCRQuery, OCRPrediction, RegionResult
 
-from pipeline.base.base_sync import AbstractImagePipeline
+from pipeline.base.base_sync import SyncPipelineFacade
 from pipeline.ocr.config import OCRPipelineConfig
+from pipeline.ocr.ocr_async import OCRAsyncPipeline
 
 
-class OCRSyncPipeline(AbstractImagePipeline):
+class OCRSyncPipeline(SyncPipelineFacade):
 
     def __init__(self, config: OCRPipelineConfig):
-        super().__init__(config)
+        super().__init__(OCRAsyncPipeline(config))
 
     def predict(self, query: OCRQuery) -> OCRPrediction | None:
         assert isinstance(query, OCRQuery)
@@ -20,13 +20,6 @@ class OCRSyncPipeline(AbstractImagePipeline):
         assert isinstance(query, OCRQuery)
         raise NotImplementedError()
 
-    def parse_query(self, query: any) -> dict:
-        return super().parse_query(query)
-
-    def parse_prediction(self, response: Response) -> OCRPrediction:
-        json_val = response.content
-        return OCRPrediction.model_validate_json(json_val)
-
 
 def avg_confidence(p: OCRPrediction) -> float:
     results = len(p.region_results)
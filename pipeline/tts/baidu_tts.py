@@ -1,10 +1,12 @@
 import uuid
 
-import requests
 from loguru import logger
 from pydantic import BaseModel
 from zerolan.data.pipeline.tts import TTSPrediction, TTSQuery
 
+from pipeline.base.base_async import raise_for_status
+from pipeline.base.transport import async_http_transport
+
 
 def _aue_to_str(aue: int) -> str:
     format_map = {
@@ -47,27 +49,32 @@ class BaiduTTSError(BaseModel):
 
 class BaiduTTSPipeline:
     def __init__(self, api_key, secret_key):
-        self._access_token = self._get_access_token(api_key, secret_key)
+        self._api_key = api_key
+        self._secret_key = secret_key
+        # Fetched on the first request
+        self._access_token: str | None = None
         self._cuid = str(uuid.uuid4())
 
     @staticmethod
-    def _get_access_token(api_key, secret_key):
+    async def _get_access_token(api_key, secret_key) -> str:
         """
         使用 AK，SK 生成鉴权签名（Access Token）
-        :return: access_token，或是None(如果错误)
+        :return: access_token
         """
         url = "https://aip.baidubce.com/oauth/2.0/token"
         params = {"grant_type": "client_credentials", "client_id": api_key, "client_secret": secret_key}
-        return str(requests.post(url, params=params).json().get("access_token"))
+        async with async_http_transport.session().post(url, params=params) as resp:
+            await raise_for_status(resp)
+            return str((await resp.json(content_type=None)).get("access_token"))
 
-    def predict(self, query: TTSQuery):
+    async def predict(self, query: TTSQuery) -> TTSPrediction:
         url = "https://tsn.baidu.com/text2audio"
         headers = {
             'Content-Type': 'application/x-www-form-urlencoded',
             'Accept': '*/*'
         }
         if self._access_token is None:
-            raise ValueError("Access token should not be None.")
+            self._access_token = await self._get_access_token(self._api_key, self._secret_key)
         aue = _str_to_aue(query.audio_type)
         payload = {
             'tex': query.text,
@@ -81,26 +88,22 @@ class BaiduTTSPipeline:
             "per": 1,
             "aue": aue
         }
-        response = requests.request("POST", url, headers=headers, data=payload)
-
-        response.raise_for_status()
-
-        # Get Content-Type header
-        content_type = response.headers.get('Content-Type', '').lower()
-
-        # Validate response based on Content-Type
-        if content_type.startswith('application/json') or content_type.startswith('text/'):
-            # Response is text/JSON - likely an error
-            error_data = response.json()
-            error = BaiduTTSError(**error_data)
-            logger.error(f"Error message received: {error_data}")
-            raise Exception(error)
-        elif content_type.startswith('audio/') or 'audio' in content_type:
-            # Response is audio data - proceed normally
-            prediction = TTSPrediction(wave_data=response.content, audio_type=_aue_to_str(aue))
-            return prediction
-        else:
-            raise ValueError(f"Unsupported content type: {content_type}")
-
-    def stream_predict(self, *args, **kwargs):
-        raise NotImplementedError("Baidu stream TTS is not supported.")
\ No newline at end of file
+        async with async_http_transport.session().post(url, headers=headers, data=payload) as resp:
+            await raise_for_status(resp)
+
+            # Get Content-Type header
+            content_type = resp.headers.get('Content-Type', '').lower()
+
+            # Validate response based on Content-Type
+            if content_type.startswith('application/json') or content_type.startswith('text/'):
+                # Response is text/JSON - likely an error
+                error_data = await resp.json(content_type=None)
+                error = BaiduTTSError(**error_data)
+                logger.error(f"Error message received: {error_data}")
+                raise Exception(error)
+            elif content_type.startswith('audio/') or 'audio' in content_type:
+                # Response is audio data - proceed normally
+                prediction = TTSPrediction(wave_data=await resp.read(), audio_type=_aue_to_str(aue))
+                return prediction
+            else:
+                raise ValueError(f"Unsupported content type: {content_type}")
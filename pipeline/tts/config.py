@@ -3,6 +3,8 @@ from pydantic import Field, BaseModel
 from common.enumerator import BaseEnum
 from common.utils.enum_util import enum_to_markdown
 from pipeline.base.base_sync import AbstractPipelineConfig
+from pipeline.base.cache import ResponseCacheConfig
+from pipeline.base.endpoint import EndpointPoolConfig
 
 
 #######
@@ -29,6 +31,14 @@ class TTSPipelineConfig(AbstractPipelineConfig):
                              description="The URL for TTS prediction requests.")
     stream_predict_url: str = Field(default="http://127.0.0.1:11000/tts/stream-predict",
                                     description="The URL for streaming TTS prediction requests.")
+    endpoints: EndpointPoolConfig = Field(default=EndpointPoolConfig(),
+                                          description="Replicas of the TTS model, load balancing, hedging and circuit breaking.")
+    concurrency: int = Field(default=2, gt=0,
+                             description="Number of clauses synthesized at the same time by each replica "
+                                         "(`predict_url` and each of `endpoints.replicas`). \n"
+                                         "The clauses are still played in order. 1 synthesizes one clause at a time.")
+    cache: ResponseCacheConfig = Field(default=ResponseCacheConfig(),
+                                       description="Cache of the TTS responses, keyed by the content of the queries.")
     baidu_tts_config: BaiduTTSConfig = Field(default=BaiduTTSConfig(),
                                              description=f"Baidu TTS config. \n"
                                                          f"Only edit it when you set `model_id` to `{TTSModelIdEnum.BaiduTTS.value}`.\n"
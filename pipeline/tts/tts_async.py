@@ -1,11 +1,13 @@
 import os
 import uuid
-from typing import Generator
+from typing import AsyncGenerator
 
 from typeguard import typechecked
 from zerolan.data.pipeline.tts import TTSQuery, TTSPrediction, TTSStreamPrediction
 
-from pipeline.base.base_async import BaseAsyncPipeline, stream_generator, get_base_url
+from pipeline.base.base_async import BaseAsyncPipeline, stream_generator, raise_for_status
+from pipeline.base.cache import content_key, file_digest
+from pipeline.tts.baidu_tts import BaiduTTSPipeline
 from pipeline.tts.config import TTSPipelineConfig, TTSModelIdEnum
 
 
@@ -15,33 +17,73 @@ def _parse_tts_query(query: TTSQuery) -> TTSQuery:
     return query
 
 
+def _tts_cache_key(model_id: str, query: TTSQuery) -> str:
+    # The reference audio is keyed by its content, the other fields (text, languages, prompt...) by value
+    refer_wav = file_digest(query.refer_wav_path) if os.path.isfile(query.refer_wav_path) else query.refer_wav_path
+    return content_key(model_id, refer_wav, query.model_dump_json(exclude={"id", "refer_wav_path"}))
+
+
 class TTSAsyncPipeline(BaseAsyncPipeline):
     def __init__(self, config: TTSPipelineConfig):
-        super().__init__(base_url=get_base_url(config.predict_url))
-        self._model_id: TTSModelIdEnum = config.model_id
-        self._predict_endpoint = "/tts/predict"
-        self._stream_predict_endpoint = "/tts/stream-predict"
+        super().__init__(config)
+        self.model_id: TTSModelIdEnum = config.model_id
+        self.predict_url: str = config.predict_url
+        self.stream_predict_url: str = config.stream_predict_url
+        # Number of requests the callers should have in flight at the same time
+        self.max_concurrency: int = config.concurrency * (1 + len(config.endpoints.replicas))
+        # Support Baidu TTS API, its blocking client runs in the default thread pool
+        self.baidu = None
+        if config.model_id == TTSModelIdEnum.BaiduTTS and config.baidu_tts_config is not None:
+            self.baidu = BaiduTTSPipeline(api_key=config.baidu_tts_config.api_key,
+                                          secret_key=config.baidu_tts_config.secret_key)
+
+    @property
+    def supports_stream(self) -> bool:
+        """
+        Whether `stream_predict` is available, Baidu TTS only synthesizes whole files.
+        """
+        return self.baidu is None
 
     @typechecked
     async def predict(self, query: TTSQuery) -> TTSPrediction:
+        return await self._cached_predict(
+            key=lambda: _tts_cache_key(str(self.model_id), query),
+            predict=lambda: self._predict(query),
+            dump=lambda prediction: prediction.wave_data,
+            load=lambda value: TTSPrediction(id=query.id, wave_data=value, audio_type=query.audio_type))
+
+    async def _predict(self, query: TTSQuery) -> TTSPrediction:
+        if self.baidu is not None:
+            return await self.baidu.predict(query)
         query = _parse_tts_query(query)
-        async with self.session.post(self._predict_endpoint, json=query.model_dump()) as resp:
-            data = await resp.content.read()
-            return TTSPrediction(wave_data=data, audio_type=query.audio_type)
+        json_val = query.model_dump()
 
-    @typechecked
-    async def stream_predict(self, query: TTSQuery) -> Generator[TTSStreamPrediction, None, None]:
+        async def send(url: str) -> TTSPrediction:
+            async with self.session.post(url, json=json_val) as resp:
+                await raise_for_status(resp)
+                data = await resp.read()
+                return TTSPrediction(wave_data=data, audio_type=query.audio_type)
+
+        return await self.endpoint_pool(self.predict_url).request(self.predict_url, send)
+
+    async def stream_predict(self, query: TTSQuery, chunk_size: int | None = None) -> AsyncGenerator[
+        TTSStreamPrediction, None]:
+        assert isinstance(query, TTSQuery)
+        if self.baidu is not None:
+            raise NotImplementedError("Baidu TTS does not support streaming, use `predict`.")
         query = _parse_tts_query(query)
-        async with self.session.post(self._stream_predict_endpoint, json=query.model_dump()) as resp:
-            last = 0
-            id = str(uuid.uuid4())
-            idx = 0
-            async for chunk in stream_generator(resp):
-                last = idx
-                yield TTSStreamPrediction(seq=idx,
-                                          id=id,
-                                          is_final=False,
-                                          wave_data=chunk,
-                                          audio_type=query.audio_type)
-                idx += 1
-            yield TTSStreamPrediction(is_final=True, seq=last + 1, audio_type=query.audio_type, wave_data=b'')
+        async with self.endpoint_pool(self.stream_predict_url).stream(self.stream_predict_url) as url:
+            async with self.session.post(url, json=query.model_dump()) as resp:
+                await raise_for_status(resp)
+                last = 0
+                id = str(uuid.uuid4())
+                idx = 0
+                async for chunk in stream_generator(resp, chunk_size):
+                    last = idx
+                    yield TTSStreamPrediction(seq=idx,
+                                              id=id,
+                                              is_final=False,
+                                              wave_data=chunk,
+                                              audio_type=query.audio_type)
+                    idx += 1
+                yield TTSStreamPrediction(is_final=True, seq=last + 1, audio_type=query.audio_type, wave_data=b'')
@@ -3,7 +3,7 @@ import os.path
 from typeguard import typechecked
 from zerolan.data.pipeline.vid_cap import VidCapQuery, VidCapPrediction
 
-from pipeline.base.base_async import BaseAsyncPipeline, get_base_url
+from pipeline.base.base_async import BaseAsyncPipeline
 from pipeline.vidcap.config import VidCapPipelineConfig, VidCapModelIdEnum
 
 
@@ -15,12 +15,11 @@ def _parse_vid_cap_query(query: VidCapQuery):
 
 class VidCapAsyncPipeline(BaseAsyncPipeline):
     def __init__(self, config: VidCapPipelineConfig):
-        super().__init__(base_url=get_base_url(config.predict_url))
-        self._model_id: VidCapModelIdEnum = config.model_id
-        self._predict_endpoint = "/vid-cap/predict"
+        super().__init__(config)
+        self.model_id: VidCapModelIdEnum = config.model_id
+        self.predict_url: str = config.predict_url
 
     @typechecked
     async def predict(self, query: VidCapQuery) -> VidCapPrediction:
         data = _parse_vid_cap_query(query)
-        async with self.session.post(self._predict_endpoint, json=data.model_dump()) as resp:
-            return await resp.json(encoding='utf8', loads=VidCapPrediction.model_validate_json)
+        return await self._post_model(self.predict_url, VidCapPrediction, json=data.model_dump())
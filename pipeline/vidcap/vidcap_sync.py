@@ -1,20 +1,20 @@
 import os
 
-from requests import Response
 from zerolan.data.pipeline.vid_cap import VidCapQuery, VidCapPrediction
 
-from pipeline.base.base_sync import CommonModelPipeline
+from pipeline.base.base_sync import SyncPipelineFacade
 from pipeline.vidcap.config import VidCapPipelineConfig
+from pipeline.vidcap.vidcap_async import VidCapAsyncPipeline
 
 
-class VidCapSyncPipeline(CommonModelPipeline):
+class VidCapSyncPipeline(SyncPipelineFacade):
 
     def __init__(self, config: VidCapPipelineConfig):
         """
         此接口保留，但是可能会在将来废弃而放弃维护
         :param config:
         """
-        super().__init__(config)
+        super().__init__(VidCapAsyncPipeline(config))
 
     def predict(self, query: VidCapQuery) -> VidCapPrediction | None:
         assert isinstance(query, VidCapQuery)
@@ -24,7 +24,3 @@ class VidCapSyncPipeline(CommonModelPipeline):
     def stream_predict(self, query: VidCapQuery, chunk_size: int | None = None):
         assert isinstance(query, VidCapQuery)
         raise NotImplementedError()
-
-    def parse_prediction(self, response: Response) -> VidCapPrediction:
-        json_val = response.content
-        return VidCapPrediction.model_validate(json_val)
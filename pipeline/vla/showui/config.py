@@ -1,6 +1,7 @@
 from pydantic import Field
 
 from pipeline.base.base_sync import AbstractPipelineConfig
+from pipeline.base.endpoint import EndpointPoolConfig
 
 
 #######
@@ -13,3 +14,5 @@ class ShowUIConfig(AbstractPipelineConfig):
                              description="The URL for UI prediction requests.")
     stream_predict_url: str = Field(default="http://127.0.0.1:11000/vla/showui/stream-predict",
                                     description="The URL for streaming UI prediction requests.")
+    endpoints: EndpointPoolConfig = Field(default=EndpointPoolConfig(),
+                                          description="Replicas of the UI model, load balancing, hedging and circuit breaking.")
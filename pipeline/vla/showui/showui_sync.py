@@ -1,13 +1,14 @@
 from zerolan.data.pipeline.vla import ShowUiQuery, ShowUiPrediction
 
-from pipeline.base.base_sync import AbstractImagePipeline
+from pipeline.base.base_sync import SyncPipelineFacade
 from pipeline.vla.showui.config import ShowUIConfig
+from pipeline.vla.showui.showui_async import ShowUIAsyncPipeline
 
 
-class ShowUISyncPipeline(AbstractImagePipeline):
+class ShowUISyncPipeline(SyncPipelineFacade):
 
     def __init__(self, config: ShowUIConfig):
-        super().__init__(config)
+        super().__init__(ShowUIAsyncPipeline(config))
 
     def predict(self, query: ShowUiQuery) -> ShowUiPrediction | None:
         assert isinstance(query, ShowUiQuery)
@@ -16,9 +17,3 @@ class ShowUISyncPipeline(AbstractImagePipeline):
     def stream_predict(self, query: ShowUiQuery, chunk_size: int | None = None):
         assert isinstance(query, ShowUiQuery)
         raise NotImplementedError()
-
-    def parse_query(self, query: any) -> dict:
-        return super().parse_query(query=query)
-
-    def parse_prediction(self, json_val: any) -> ShowUiPrediction:
-        return ShowUiPrediction.model_validate_json(json_val)
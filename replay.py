@@ -0,0 +1,159 @@
+"""
+Replay a recording made with `system.emitter.record_path` against ZerolanLiveRobot,
+and report the throughput and the p95 latency of the listeners.
+
+Usage:
+    python replay.py resources/recordings/stream.jsonl --speed 10 --mock
+
+With `--mock`, the LLM, ASR and TTS pipelines are pointed at a local mock server with fixed latency,
+so that a busy stream can be reproduced offline without ZerolanCore.
+"""
+import argparse
+import asyncio
+import io
+import threading
+import time
+import wave
+from urllib.parse import urlparse
+
+import flask
+from flask import request
+from loguru import logger
+from zerolan.data.pipeline.asr import ASRPrediction
+from zerolan.data.pipeline.llm import LLMPrediction, Conversation, RoleEnum
+
+from event.recorder import read_events
+from event.replay import EventReplayer
+from manager.config_manager import get_config
+
+
+def _silence_wav(duration: float, sample_rate: int = 16000) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(b"\x00\x00" * int(duration * sample_rate))
+    return buf.getvalue()
+
+
+class MockModelServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 5890,
+                 llm_latency: float = 0.5, asr_latency: float = 0.2, tts_latency: float = 0.3):
+        """
+        Mock of the LLM, ASR and TTS services of ZerolanCore, which answer after a fixed latency.
+        """
+        self.host = host
+        self.port = port
+        self._app = flask.Flask(__name__)
+        self._init(llm_latency, asr_latency, tts_latency)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _init(self, llm_latency: float, asr_latency: float, tts_latency: float):
+        @self._app.route('/llm/predict', methods=['POST'])
+        def llm_predict():
+            time.sleep(llm_latency)
+            query = request.json
+            history = query.get("history", [])
+            history.append(Conversation(role=RoleEnum.user, content=query["text"]).model_dump())
+            response = "这是一条用于回放测试的回复，它会被切分成几个短句。然后送去合成语音！"
+            history.append(Conversation(role=RoleEnum.assistant, content=response).model_dump())
+            return flask.jsonify(LLMPrediction(id=query["id"], response=response, history=history).model_dump())
+
+        def asr_prediction() -> str:
+            time.sleep(asr_latency)
+            return ASRPrediction(transcript="这是一条回放的语音").model_dump_json()
+
+        @self._app.route('/asr/predict', methods=['POST'])
+        def asr_predict():
+            return flask.Response(asr_prediction(), mimetype="application/json")
+
+        @self._app.route('/asr/stream-predict', methods=['POST'])
+        def asr_stream_predict():
+            return flask.Response(asr_prediction())
+
+        @self._app.route('/tts/predict', methods=['POST'])
+        def tts_predict():
+            time.sleep(tts_latency)
+            text = request.json["text"]
+            # Roughly the length of the spoken text, keep the speaker busy like a real answer
+            return flask.Response(_silence_wav(0.1 * len(text)), mimetype="audio/wav")
+
+    def start(self):
+        thread = threading.Thread(target=lambda: self._app.run(host=self.host, port=self.port, threaded=True),
+                                  daemon=True, name="MockModelServerThread")
+        thread.start()
+        logger.info(f"Mock model server is running at {self.base_url}")
+
+
+def _point_to(url: str, base_url: str) -> str:
+    return base_url + urlparse(url).path
+
+
+def use_mock_server(base_url: str):
+    config = get_config()
+    llm, asr, tts = config.pipeline.llm, config.pipeline.asr, config.pipeline.tts
+    llm.openai_format = False
+    asr.baidu_asr_config = None
+    asr.whisper_asr_config = None
+    tts.baidu_tts_config = None
+    for pipeline_config in [llm, asr, tts]:
+        pipeline_config.enable = True
+        pipeline_config.predict_url = _point_to(pipeline_config.predict_url, base_url)
+        pipeline_config.stream_predict_url = _point_to(pipeline_config.stream_predict_url, base_url)
+
+
+def _parse_speed(speed: str) -> float:
+    if speed == "max":
+        return 0.
+    value = float(speed.rstrip("x"))
+    assert value > 0, f"Speed must be positive or `max`."
+    return value
+
+
+def _print_report(report: dict):
+    total = report.pop("total")
+    print(f"{'Event type':<40}{'count':>8}{'p50 (s)':>10}{'p95 (s)':>10}{'max (s)':>10}")
+    for event_type, stat in sorted(report.items()):
+        print(f"{event_type:<40}{stat['count']:>8}{stat['p50']:>10.4f}{stat['p95']:>10.4f}{stat['max']:>10.4f}")
+    print(f"Emitted {total['events']} events, {total['tasks']} tasks finished in {total['duration']:.2f} s, "
+          f"throughput {total['throughput']:.2f} tasks/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay an event recording against ZerolanLiveRobot.")
+    parser.add_argument("recording", help="Path of the recording file.")
+    parser.add_argument("--speed", default="1", help="1, 10 (times faster) or max.")
+    parser.add_argument("--mock", action="store_true", help="Point the LLM, ASR and TTS pipelines at a mock server.")
+    parser.add_argument("--mock-port", type=int, default=5890)
+    parser.add_argument("--quiet", type=float, default=2., help="Seconds without finished tasks to end the replay.")
+    args = parser.parse_args()
+
+    config = get_config()
+    if args.mock:
+        server = MockModelServer(port=args.mock_port)
+        server.start()
+        use_mock_server(server.base_url)
+    # Only the recorded events should reach the bot
+    config.system.default_enable_microphone = False
+    config.system.emitter.record_path = ""
+
+    from bot import ZerolanLiveRobot
+    bot = ZerolanLiveRobot()
+    bot_task = asyncio.create_task(bot.start())
+    # Give the services a moment to start
+    await asyncio.sleep(1)
+
+    replayer = EventReplayer(read_events(args.recording), speed=_parse_speed(args.speed))
+    report = await replayer.replay(quiet=args.quiet)
+    _print_report(report)
+
+    bot_task.cancel()
+    await bot.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
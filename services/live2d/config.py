@@ -10,3 +10,9 @@ class Live2DViewerConfig(BaseModel):
     auto_breath: bool = Field(default=True, description="Audio eye blink.")
     win_height: int = Field(default=960, description="Window height.")
     win_width: int = Field(default=960, description="Window width.")
+    max_fps: int = Field(default=120, gt=0, description="Frame rate while the character speaks or moves.")
+    idle_fps: int = Field(default=24, gt=0,
+                          description="Frame rate while the character is idle (only breathing and blinking). \n"
+                                      "A lower value leaves more CPU and GPU to OBS.")
+    idle_delay_ms: int = Field(default=500, ge=0,
+                               description="Milliseconds after the last lip sync or motion before the frame rate drops.")
@@ -0,0 +1,84 @@
+"""
+Frame Scheduler
+    The Live2D canvas only renders at `max_fps` while something moves: the lip sync or a motion.
+    A while (`linger_ms`) after the last activity it drops to `idle_fps`,
+    which is still enough for the breath and the blinks, and leaves the CPU and GPU to the encoder of OBS.
+    The time each frame takes to update and draw is collected, see `FrameScheduler.summary`.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+import numpy as np
+from loguru import logger
+
+
+class FrameScheduler:
+    def __init__(self, max_fps: float = 120, idle_fps: float = 24, linger_ms: float = 500, window: int = 1200,
+                 report_interval: float = 60):
+        """
+        :param max_fps: Frame rate while something moves.
+        :param idle_fps: Frame rate while nothing moves.
+        :param linger_ms: Milliseconds the frame rate stays at `max_fps` after the last activity.
+        :param window: Number of recent frames the statistics are computed from.
+        :param report_interval: Seconds between two debug logs of the statistics, 0 disables them.
+        """
+        assert 0 < idle_fps <= max_fps
+        self.max_fps = max_fps
+        self.idle_fps = idle_fps
+        self.linger = linger_ms / 1000
+        self._report_interval = report_interval
+        self._lock = threading.Lock()
+        self._active_until: float = 0.
+        self._frame_times: Deque[float] = deque(maxlen=window)
+        self._frames = 0
+        self._active_frames = 0
+        self._last_report = time.perf_counter()
+
+    def wake(self, seconds: float | None = None):
+        """
+        Render at `max_fps` from now on. Thread-safe.
+        :param seconds: How long, `linger_ms` if None.
+        """
+        until = time.perf_counter() + (self.linger if seconds is None else seconds)
+        with self._lock:
+            self._active_until = max(self._active_until, until)
+
+    @property
+    def active(self) -> bool:
+        return time.perf_counter() < self._active_until
+
+    def interval_ms(self) -> int:
+        """
+        :return: Milliseconds until the next frame.
+        """
+        return round(1000 / (self.max_fps if self.active else self.idle_fps))
+
+    def record(self, frame_time: float):
+        """
+        Record a rendered frame.
+        :param frame_time: Seconds it took to update and draw.
+        """
+        with self._lock:
+            self._frame_times.append(frame_time)
+            self._frames += 1
+            if self.active:
+                self._active_frames += 1
+        if self._report_interval > 0 and time.perf_counter() - self._last_report >= self._report_interval:
+            self._last_report = time.perf_counter()
+            logger.debug(f"Live2D frames: {self.summary()}")
+
+    def summary(self) -> Dict[str, int | float]:
+        """
+        Get a snapshot of the statistics.
+        :return: {frames, active_frames, mean_ms, p95_ms, max_ms}, the times are of the recent frames.
+        """
+        with self._lock:
+            times = np.array(self._frame_times, dtype=np.float64) * 1000
+            frames, active_frames = self._frames, self._active_frames
+        if len(times) == 0:
+            return {"frames": 0, "active_frames": 0, "mean_ms": 0., "p95_ms": 0., "max_ms": 0.}
+        return {"frames": frames, "active_frames": active_frames,
+                "mean_ms": float(times.mean()), "p95_ms": float(np.percentile(times, 95)),
+                "max_ms": float(times.max())}
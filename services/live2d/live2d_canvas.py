@@ -3,19 +3,22 @@ Copied and modified from https://github.com/Arkueid/live2d-py/blob/main/package/
 """
 
 import math
+import time
 from typing import Tuple
 
 import live2d.v3 as live2d
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from live2d.v3 import StandardParams
 
 from common.ver_check import is_live2d_py_version_less_than
+from services.live2d.frame_scheduler import FrameScheduler
 from services.live2d.opengl_canvas import OpenGLCanvas
 from services.live2d.wave_handler import Live2DWaveHandler
 
 
 class Live2DCanvas(OpenGLCanvas):
-    def __init__(self, path: str, lip_sync_n: int = 3, win_size: Tuple[int, int] = (1920, 1080)):
+    def __init__(self, path: str, lip_sync_n: int = 3, win_size: Tuple[int, int] = (1920, 1080),
+                 scheduler: FrameScheduler | None = None):
         super().__init__()
         self.setFixedSize(*win_size)
         self._model_path = path
@@ -27,6 +30,9 @@ class Live2DCanvas(OpenGLCanvas):
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         self.radius_per_frame = math.pi * 0.5 / 120
         self.total_radius = 0
+        # The frame rate drops when nothing moves
+        self.scheduler = scheduler if scheduler is not None else FrameScheduler()
+        self._timer: QTimer | None = None
 
     def on_init(self):
         # live2d-py 6.0 remove glewInit()
@@ -39,21 +45,29 @@ class Live2DCanvas(OpenGLCanvas):
             self.model.LoadModelJson(self._model_path)
         else:
             self.model.LoadModelJson(self._model_path)
-        self.startTimer(int(1000 / 120))
-
-    def timerEvent(self, a0):
-        self.update()
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self.update)
+        self._timer.start(self.scheduler.interval_ms())
 
     def on_draw(self):
+        start = time.perf_counter()
         live2d.clearBuffer()
         if self.wavHandler.Update():
             # Use the loudness of the WAV to update mouth opening and closing.
             self.model.SetParameterValue(
                 StandardParams.ParamMouthOpenY, self.wavHandler.GetRms() * self._lipSyncN
             )
+            self.scheduler.wake()
             # logger.debug(f"Rms: {self.wavHandler.GetRms()}")
+        elif not self.model.IsMotionFinished():
+            self.scheduler.wake()
         self.model.Update()
         self.model.Draw()
+        self.scheduler.record(time.perf_counter() - start)
+        interval = self.scheduler.interval_ms()
+        if self._timer is not None and self._timer.interval() != interval:
+            self._timer.setInterval(interval)
 
     def on_resize(self, width: int, height: int):
         self.model.Resize(width, height)
@@ -2,6 +2,7 @@ import os.path
 import sys
 from pathlib import Path
 from queue import Queue
+from typing import Tuple
 
 import live2d.v3 as live2d
 from PyQt5.QtWidgets import QApplication
@@ -10,7 +11,9 @@ from typeguard import typechecked
 
 from common.concurrent.abs_runnable import ThreadRunnable
 from common.concurrent.killable_thread import KillableThread
+from common.io.audio_clip import AudioClip
 from services.live2d.config import Live2DViewerConfig
+from services.live2d.frame_scheduler import FrameScheduler
 from services.live2d.live2d_canvas import Live2DCanvas
 
 
@@ -23,7 +26,7 @@ class Live2DViewer(ThreadRunnable):
         self._model_path: str = config.model3_json_file
         assert os.path.exists(self._model_path), f'The specified Live2D model file does not exist: {self._model_path}'
         self._canvas: Live2DCanvas | None = None
-        self._audios: Queue[Path] = Queue()
+        self._audios: Queue[Tuple[AudioClip, bool]] = Queue()
         self._sync_lip_loop_thread: KillableThread = KillableThread(target=self._sync_lip_loop, daemon=True)
         self._sync_lip_loop_flag: bool = True
         self._auto_lip_sync: bool = config.auto_lip_sync
@@ -31,12 +34,15 @@ class Live2DViewer(ThreadRunnable):
         self._auto_breath: bool = config.auto_breath
         self._win_h: int = int(config.win_height)
         self._win_w: int = int(config.win_width)
+        self.frame_scheduler = FrameScheduler(max_fps=config.max_fps, idle_fps=min(config.idle_fps, config.max_fps),
+                                              linger_ms=config.idle_delay_ms)
 
     def start(self):
         super().start()
         live2d.init()
         app = QApplication(sys.argv)
-        self._canvas = Live2DCanvas(path=self._model_path, lip_sync_n=3, win_size=(self._win_w, self._win_h))
+        self._canvas = Live2DCanvas(path=self._model_path, lip_sync_n=3, win_size=(self._win_w, self._win_h),
+                                    scheduler=self.frame_scheduler)
         self._sync_lip_loop_thread.start()
         self._canvas.show()
         self.set_auto_blink(self._auto_blink)
@@ -47,8 +53,17 @@ class Live2DViewer(ThreadRunnable):
     def _sync_lip_loop(self):
         while self._sync_lip_loop_flag:
             try:
-                audio_path = self._audios.get(block=True)
-                self._canvas.wavHandler.Start(str(audio_path))
+                clip, follow_playback = self._audios.get(block=True)
+                if follow_playback:
+                    # The clips before it are still playing, its lip sync starts with its audio
+                    while not clip.started.wait(timeout=0.05) and not clip.done.is_set():
+                        pass
+                    if not clip.started.is_set():
+                        # Dropped before it was played
+                        continue
+                self._canvas.wavHandler.StartClip(clip, clip.started_at)
+                # The full frame rate from the next frame on
+                self.frame_scheduler.wake()
             except Exception as e:
                 logger.exception(e)
 
@@ -59,18 +74,22 @@ class Live2DViewer(ThreadRunnable):
         self._sync_lip_loop_thread.kill()
 
     @typechecked
-    def sync_lip(self, audio_path: Path):
+    def sync_lip(self, audio: Path | AudioClip, follow_playback: bool = False):
         """
         Sync the lip of the character.
         Note: This method will NOT block your thread!
               For example, if you have 2 audio files to play and sync lip,
-              You should play the second audio after the first one finished.
-        :param audio_path: The path of the audio file.
+              You should play the second audio after the first one finished,
+              or enqueue the clips to the speaker and set `follow_playback`.
+        :param audio: The path of the audio file, or the audio clip in memory.
+        :param follow_playback: Start the lip sync when the speaker starts playing the clip, instead of now.
         """
         if not self._auto_lip_sync:
             return
-        assert audio_path.exists()
-        self._audios.put(audio_path)
+        if isinstance(audio, Path):
+            assert audio.exists()
+            audio = AudioClip.from_file(audio)
+        self._audios.put((audio, follow_playback))
 
     @typechecked
     def set_auto_blink(self, enable: bool):
@@ -1,30 +1,60 @@
 from live2d.utils.lipsync import WavHandler
-import soundfile as sf
 import time
 from loguru import logger
 
+from common.io.audio_clip import AudioClip
+
 
 class Live2DWaveHandler(WavHandler):
+    """
+    Looks up the precomputed envelope of the playing clip at each frame, instead of computing the RMS of the samples.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._clip: AudioClip | None = None
+
     def Start(self, filePath: str) -> None:
-        # Use `soundfile` instead of `wave`, because it supports more audio types.
-        self.ReleasePcmData()
+        # Use `AudioClip` instead of `wave`, because it supports more audio types.
         try:
-            data, samplerate = sf.read(filePath, dtype='float32')
-
-            self.sampleRate = samplerate
-            self.numChannels = data.ndim if data.ndim > 1 else 1
-            self.numFrames = len(data)
+            clip = AudioClip.from_file(filePath)
+            clip.compute_envelope()
+            self.StartClip(clip)
+        except Exception as e:
+            logger.error(f"Failed to load audio: {e}")
+            self.ReleasePcmData()
 
-            self.pcmData = data
+    def StartClip(self, clip: AudioClip, start_time: float | None = None) -> None:
+        """
+        Start the lip sync of a clip.
+        :param clip: The audio clip, its envelope is computed now if it was not.
+        :param start_time: When the clip started playing, in the clock of `time.time()`. Now if None.
+        """
+        self.ReleasePcmData()
+        if clip.envelope is None:
+            clip.compute_envelope()
+        self._clip = clip
+        self.sampleRate = clip.sample_rate
+        self.numChannels = clip.channels
+        self.startTime = time.time() if start_time is None else start_time
+        self.currentRms = 0.
 
-            if self.numChannels == 1:
-                self.pcmData = self.pcmData.reshape(1, -1)
-            else:
-                self.pcmData = self.pcmData.T  # shape: (channels, frames)
+    def ReleasePcmData(self):
+        super().ReleasePcmData()
+        self._clip = None
 
-            self.startTime = time.time()
-            self.lastOffset = 0
+    def Update(self) -> bool:
+        clip = self._clip
+        if clip is None:
+            return False
+        value = clip.envelope_at(time.time() - self.startTime)
+        if value is None or (clip.started.is_set() and clip.done.is_set()):
+            # Played, or dropped by the speaker
+            self._clip = None
+            self.currentRms = 0.
+            return False
+        self.currentRms = value
+        return True
 
-        except Exception as e:
-            logger.error(f"Failed to load audio: {e}")
-            self.ReleasePcmData()
+    def GetRms(self) -> float:
+        return self.currentRms
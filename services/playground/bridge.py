@@ -9,7 +9,8 @@ from typeguard import typechecked
 from zerolan.data.protocol.protocol import ZerolanProtocol
 
 from common.io.file_sys import fs
-from common.utils.audio_util import get_audio_real_format, get_audio_info
+from common.io.api import save_audio
+from common.io.audio_clip import AudioClip
 from common.utils.collection_util import to_value_list
 from common.utils.web_util import get_local_ip
 from common.web.zrl_ws import ZerolanProtocolWsServer
@@ -84,25 +85,27 @@ class PlaygroundBridge(ZerolanProtocolWsServer):
             self.gameobjects_info[go_info.instance_id] = go_info
         logger.debug("Local gameobjects cache is updated")
 
-    def play_speech(self, bot_id: str, audio_path: Path, transcript: str, bot_name: str):
+    def play_speech(self, bot_id: str, audio: Path | AudioClip, transcript: str, bot_name: str):
         """
         Play a speech clip in the playground for specific bot with transcript subtitle.
         :param bot_id: The ID of the bot. You should configurate it in the `config.yaml`.
-        :param audio_path: The speech file to be played.
+        :param audio: The speech file to be played, or the speech clip in memory.
         :param transcript: The transcript to be shown as subtitle.
         :return:
         """
-        audio_type = get_audio_real_format(audio_path)
-        sample_rate, num_channels, duration = get_audio_info(audio_path)
-        file_id = register_file(audio_path)
+        clip = audio if isinstance(audio, AudioClip) else AudioClip.from_file(audio)
+        if clip.path is None:
+            # The playground downloads the speech from the resource server
+            clip.path = save_audio(wave_data=clip.data, format=clip.format, prefix='tts')
+        file_id = register_file(clip.path)
         self.send(action=Action.PLAY_SPEECH,
                   data=PlaySpeechResponse(bot_id=bot_id, file_id=file_id,
                                           bot_display_name=bot_name,
                                           transcript=transcript,
-                                          audio_type=audio_type,
-                                          sample_rate=sample_rate,
-                                          channels=num_channels,
-                                          duration=duration))
+                                          audio_type=clip.format.value,
+                                          sample_rate=clip.sample_rate,
+                                          channels=clip.channels,
+                                          duration=clip.duration))
 
     def load_live2d_model(self, bot_id: str,
                           bot_display_name: str,
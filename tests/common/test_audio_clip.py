@@ -0,0 +1,81 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from common.io.audio_clip import AudioClip
+from common.io.file_type import AudioFileType
+
+
+def _sine(seconds: float, sample_rate: int) -> np.ndarray:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.3 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def _encode(data: np.ndarray, sample_rate: int, format: str, subtype: str | None = None) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, data, sample_rate, format=format, subtype=subtype)
+    return buffer.getvalue()
+
+
+def test_wav_pcm_is_a_view():
+    pcm = (np.arange(3200, dtype=np.int16)).tobytes()
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(pcm)
+    # A trailing chunk is not part of the samples
+    data = buffer.getvalue() + b"LIST" + (4).to_bytes(4, "little") + b"INFO"
+
+    clip = AudioClip.from_bytes(data)
+    assert clip.format == AudioFileType.WAV
+    assert (clip.sample_rate, clip.channels, clip.sample_width) == (16000, 2, 2)
+    assert clip.duration == pytest.approx(0.1)
+    assert clip.pcm.obj is data and clip.pcm.tobytes() == pcm
+    assert clip.samples().shape == (2, 1600)
+
+
+@pytest.mark.parametrize("format,subtype", [("OGG", "VORBIS"), ("OGG", "OPUS"), ("MP3", None)])
+def test_compressed_header(format, subtype, monkeypatch):
+    sample_rate = 48000 if subtype == "OPUS" else 24000
+    data = _encode(_sine(1.5, sample_rate), sample_rate, format, subtype)
+    # Parsing the header must not decode anything
+    monkeypatch.setattr(sf, "read", lambda *args, **kwargs: pytest.fail("decoded"))
+    monkeypatch.setattr(sf, "info", lambda *args, **kwargs: pytest.fail("decoded"))
+
+    clip = AudioClip.from_bytes(data)
+    assert clip.format == AudioFileType(format.lower())
+    assert (clip.sample_rate, clip.channels) == (sample_rate, 1)
+    assert clip.duration == pytest.approx(1.5, abs=0.06)
+
+
+def test_decoded_once():
+    data = _encode(_sine(0.5, 22050), 22050, "OGG", "VORBIS")
+    clip = AudioClip.from_bytes(data, format=AudioFileType.OGG)
+    pcm = clip.pcm
+    assert clip.pcm is pcm
+    assert len(pcm) == pytest.approx(0.5 * 22050 * 2, abs=2 * 64)
+
+
+def test_raw():
+    clip = AudioClip.from_bytes(b"\x00\x01" * 16001, format=AudioFileType.RAW, raw_sample_rate=16000)
+    assert clip.duration == pytest.approx(16001 / 16000)
+    assert len(clip.pcm) == 32002
+
+
+def test_envelope():
+    sample_rate = 16000
+    # 0.5s of silence, then 0.5s of a sine
+    samples = np.concatenate([np.zeros(sample_rate // 2, dtype=np.float32), _sine(0.5, sample_rate)])
+    clip = AudioClip.from_bytes(_encode(samples, sample_rate, "WAV", "PCM_16"))
+    envelope = clip.compute_envelope(fps=50)
+    assert len(envelope) == 50
+    assert envelope[:20].max() == 0
+    # The RMS of a sine is its amplitude / sqrt(2)
+    assert envelope[45] == pytest.approx(0.3 / np.sqrt(2), rel=0.02)
+    assert clip.envelope_at(0.91) == envelope[45]
+    assert clip.envelope_at(1.0) is None
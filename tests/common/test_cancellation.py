@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from common.concurrent.cancellation import CancellationScope, CancellationToken, OperationCancelledError, \
+    current_token, use_token, raise_if_cancelled
+
+
+def test_token_callbacks():
+    token = CancellationToken("test")
+    called = []
+    token.register(lambda: called.append("a"))
+    unregister = token.register(lambda: called.append("b"))
+    unregister()
+
+    token.cancel("test")
+    token.cancel("again")
+    assert called == ["a"]
+    assert token.reason == "test"
+    # Callbacks registered after cancellation are called immediately
+    token.register(lambda: called.append("c"))
+    assert called == ["a", "c"]
+
+
+def test_token_context():
+    token = CancellationToken("test")
+    assert current_token() is None
+    with use_token(token):
+        assert current_token() is token
+        seen = []
+        # Plain threads do not inherit the context
+        t = threading.Thread(target=lambda: seen.append(current_token()))
+        t.start()
+        t.join()
+        assert seen == [None]
+        token.cancel()
+        with pytest.raises(OperationCancelledError):
+            raise_if_cancelled()
+    assert current_token() is None
+
+
+def test_scope_supersede():
+    scope = CancellationScope("utterance")
+    first = scope.supersede()
+    second = scope.supersede()
+    assert first.cancelled and not second.cancelled
+    assert scope.token is second
+    scope.cancel()
+    assert second.cancelled and scope.token is None
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from common.command_matcher import AhoCorasick, CommandMatcher
+
+
+def test_aho_corasick_overlapping():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    found = sorted((start, automaton.patterns[index]) for start, index in automaton.find_all("ushers"))
+    assert found == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_priority_position_and_argument():
+    matcher = CommandMatcher()
+    matcher.on("游戏", priority=70)(lambda command: "game")
+    matcher.on("网页搜索", priority=80)(lambda command: command.argument)
+    matcher.on("看见", priority=60, max_start=2)(lambda command: "see")
+
+    command = matcher.match("网页搜索：游戏攻略。")
+    assert command.keyword == "网页搜索"
+    assert command.argument == "游戏攻略"
+    assert asyncio.run(command.run()) == "游戏攻略"
+    assert matcher.match("你看见了什么？").command.name == "看见"
+    # Too far from the start
+    assert matcher.match("我昨天在公园看见一只猫") is None
+    assert matcher.match("今天天气怎么样") is None
+
+
+def test_registered_after_compile():
+    matcher = CommandMatcher()
+    matcher.on("open", priority=1)(lambda command: None)
+    assert matcher.match("OPEN the door").keyword == "OPEN"
+
+    async def handler(command):
+        return False
+
+    matcher.on("door", priority=2)(handler)
+    command = matcher.match("open the door")
+    assert command.keyword == "door"
+    assert asyncio.run(command.run()) is False
+
+
+def test_offsets_kept_when_case_folding():
+    matcher = CommandMatcher()
+    matcher.on("search", max_start=4)(lambda command: None)
+    # `İ` is two characters once lowercased
+    command = matcher.match("İİİ SEARCH cats")
+    assert command is not None and command.keyword == "SEARCH"
+    assert command.argument == "cats"
+    assert matcher.match("İİİİ search cats") is None
+
+
+def _bot_commands() -> CommandMatcher:
+    from framework import voice_commands as specs
+    matcher = CommandMatcher()
+    for name in ["OPEN_BROWSER", "CLOSE_BROWSER", "WEB_SEARCH", "GAME", "SEE", "CLICK", "REMEMBER", "LOAD_MODEL",
+                 "SCALE_MODEL"]:
+        matcher.on_spec(getattr(specs, name))(lambda command, name=name: name)
+    return matcher
+
+
+@pytest.mark.parametrize("transcript,expected", [
+    ("你看见了什么？", "SEE"),
+    ("那你看见什么了", "SEE"),
+    ("看见什么了吗", "SEE"),
+    ("我昨天看见一只猫", None),
+    ("我刚才看见你了", None),
+    ("点击登录按钮", "CLICK"),
+    ("请帮我点击登录按钮", "CLICK"),
+    ("我刚才点击了一个链接", None),
+    ("这个视频的点击量很高", None),
+    ("网页搜索：今天的天气", "WEB_SEARCH"),
+    ("打开浏览器", "OPEN_BROWSER"),
+    ("你还记得我吗", "REMEMBER"),
+    ("今天天气怎么样", None),
+])
+def test_bot_commands(transcript, expected):
+    command = _bot_commands().match(transcript)
+    assert (command.command.handler(command) if command is not None else None) == expected
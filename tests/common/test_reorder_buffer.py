@@ -0,0 +1,48 @@
+import asyncio
+import random
+
+import pytest
+
+from common.concurrent.reorder_buffer import ReorderBuffer
+
+
+@pytest.mark.asyncio
+async def test_release_in_order():
+    released = []
+
+    async def release(item: int):
+        await asyncio.sleep(0)
+        released.append(item)
+
+    buffer = ReorderBuffer(release)
+    random.seed(0)
+
+    async def job(seq: int):
+        # Finish in random order, and every 5th job fails
+        await asyncio.sleep(random.random() * 0.05)
+        if seq % 5 == 4:
+            buffer.skip(seq)
+        else:
+            buffer.put(seq, seq)
+
+    await asyncio.gather(*[job(buffer.reserve()) for _ in range(50)])
+    while buffer.waiting > 0 or len(released) < 40:
+        await asyncio.sleep(0.01)
+    assert released == [seq for seq in range(50) if seq % 5 != 4]
+
+
+@pytest.mark.asyncio
+async def test_wait_for_previous():
+    released = []
+
+    async def release(item: str):
+        released.append(item)
+
+    buffer = ReorderBuffer(release)
+    first, second = buffer.reserve(), buffer.reserve()
+    buffer.put(second, "second")
+    await asyncio.sleep(0.01)
+    assert released == [] and buffer.waiting == 1
+    buffer.put(first, "first")
+    await asyncio.sleep(0.01)
+    assert released == ["first", "second"]
@@ -0,0 +1,23 @@
+from common.enumerator import Language
+from common.utils.str_util import ClauseSegmenter, split_by_punc
+
+
+def test_clause_segmenter():
+    text = "你好！今天的直播，我们来玩游戏。好吗？"
+    segmenter = ClauseSegmenter(Language.ZH)
+    clauses = []
+    # Token by token, like a streamed LLM response
+    for i in range(0, len(text), 3):
+        clauses += segmenter.feed(text[i:i + 3])
+    clauses += segmenter.flush()
+    assert clauses == split_by_punc(text, Language.ZH)
+
+
+def test_clause_segmenter_emits_early():
+    segmenter = ClauseSegmenter(Language.EN)
+    assert segmenter.feed("Hello") == []
+    assert segmenter.feed(", world") == ["Hello"]
+    assert segmenter.feed("!!  How are") == ["world"]
+    # The last clause may end without a punctuation
+    assert segmenter.feed(" you") == []
+    assert segmenter.flush() == ["How are you"]
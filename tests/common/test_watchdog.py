@@ -0,0 +1,50 @@
+import threading
+import time
+
+from common.concurrent.watchdog import DeadlineWatchdog
+from common.decorator import log_run_time
+
+
+def test_watchdog_deadline():
+    watchdog = DeadlineWatchdog()
+    fired = []
+
+    slow = watchdog.register("slow", 0.2, lambda task: fired.append(task.name))
+    fast = watchdog.register("fast", 0.5, lambda task: fired.append(task.name))
+    fast.done()
+
+    time.sleep(0.4)
+    assert fired == ["slow"]
+    assert slow.fired and not fast.fired
+    assert watchdog.overdue() == [slow]
+
+    slow.done()
+    assert watchdog.overdue() == []
+    time.sleep(0.3)
+    # Finished tasks never fire
+    assert fired == ["slow"]
+
+
+def test_watchdog_single_thread():
+    watchdog = DeadlineWatchdog()
+    watchdog.register("warm-up", 10).done()
+    threads = threading.active_count()
+    tasks = [watchdog.register(f"task-{i}", 10) for i in range(100)]
+    # No thread is created per registered task
+    assert threading.active_count() == threads
+    for task in tasks:
+        task.done()
+    assert watchdog.live() == []
+
+
+@log_run_time(time_limit=0.1)
+def _slow_function():
+    time.sleep(0.3)
+    return "Task completed"
+
+
+def test_log_run_time_no_extra_thread():
+    threads = threading.active_count()
+    assert _slow_function() == "Task completed"
+    # Only the shared watchdog thread may have been started
+    assert threading.active_count() <= threads + 1
@@ -0,0 +1,64 @@
+import io
+import threading
+import wave
+
+from devices.audio_stream import AudioStream
+
+
+def _wav(pcm: bytes, sample_rate: int = 16000, channels: int = 2) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def _read_all(stream: AudioStream) -> bytes:
+    data = b""
+    while chunk := stream.read_nowait(1000):
+        data += chunk
+    return data
+
+
+def test_wav_header_split_across_chunks():
+    pcm = bytes(range(256)) * 64
+    body = _wav(pcm)
+    stream = AudioStream(preroll_ms=0)
+    for i in range(0, len(body), 7):
+        stream.write(body[i:i + 7])
+    stream.end()
+    assert (stream.sample_rate, stream.channels, stream.sample_width) == (16000, 2, 2)
+    assert stream.wait_preroll()
+    assert _read_all(stream) == pcm
+
+
+def test_raw_pcm_and_preroll():
+    # 100 ms of 32 kHz mono audio per chunk
+    chunk = b"\x01\x00" * 3200
+    stream = AudioStream(preroll_ms=200)
+    stream.write(chunk)
+    assert not stream.ready()
+    assert not stream.wait_preroll(timeout=0.01)
+    stream.write(chunk)
+    assert stream.ready() and stream.wait_preroll(timeout=0.01)
+    assert stream.read_nowait(len(chunk) * 2) == chunk * 2
+
+    # The stream is late, but not over
+    assert stream.read_nowait(len(chunk)) == b""
+    assert not stream.exhausted and stream.underruns == 1
+    stream.write(chunk + b"\x01")
+    stream.end()
+    # Only whole frames are played
+    assert _read_all(stream) == chunk
+    assert stream.exhausted
+
+
+def test_abort():
+    stream = AudioStream(preroll_ms=1000)
+    stream.write(b"\x00\x00" * 100)
+    threading.Timer(0.05, stream.abort).start()
+    assert not stream.wait_preroll()
+    assert stream.read_nowait(100) == b""
+    assert stream.exhausted
@@ -0,0 +1,194 @@
+import io
+import math
+import struct
+import threading
+import time
+import wave
+
+import pytest
+
+pyaudio = pytest.importorskip("pyaudio")
+
+from common.io.audio_clip import AudioClip
+from devices.audio_stream import AudioStream
+from devices.speaker import Speaker, PCMClip
+
+
+def _sine(seconds: float, sample_rate: int = 16000, freq: float = 440.) -> bytes:
+    n = int(seconds * sample_rate)
+    return struct.pack(f"<{n}h", *(int(8000 * math.sin(2 * math.pi * freq * i / sample_rate)) for i in range(n)))
+
+
+def _speaker_without_device(fmt=(16000, 1, 2)) -> Speaker:
+    speaker = Speaker()
+    speaker._activate = True
+    speaker._output_format = fmt
+    return speaker
+
+
+def _pull(speaker: Speaker, frame_count: int = 320):
+    data, flag = speaker._callback(None, frame_count, None, 0)
+    assert len(data) == frame_count * 2
+    return data, flag
+
+
+def test_gapless_in_order():
+    speaker = _speaker_without_device()
+    first, second = _sine(0.05), _sine(0.03, freq=880.)
+    clips = [speaker.enqueue_sound(PCMClip(first, 16000, 1)), speaker.enqueue_sound(PCMClip(second, 16000, 1))]
+    played = b""
+    flag = pyaudio.paContinue
+    while flag == pyaudio.paContinue:
+        data, flag = _pull(speaker)
+        played += data
+    # The second clip starts in the same buffer as the end of the first one, the rest is silence
+    assert played[:len(first + second)] == first + second
+    assert played[len(first + second):] == bytes(len(played) - len(first + second))
+    assert all(clip.done.is_set() for clip in clips)
+    assert speaker.wait(timeout=0)
+
+
+def test_audio_clip_without_decoding():
+    speaker = _speaker_without_device()
+    pcm = _sine(0.02)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(pcm)
+    audio_clip = AudioClip.from_bytes(buffer.getvalue())
+    clip = speaker.enqueue_sound(audio_clip)
+    assert clip.duration == 0.02
+    assert not audio_clip.started.is_set()
+    data, _ = _pull(speaker)
+    assert data == pcm
+    # The lip sync follows the playback
+    assert audio_clip.started.is_set() and audio_clip.done.is_set()
+
+
+def test_stream_waits_for_preroll():
+    speaker = _speaker_without_device()
+    stream = AudioStream(preroll_ms=20, sample_rate=16000, channels=1)
+    speaker.enqueue_sound(stream)
+    stream.write(b"\x01\x00" * 100)
+    # Not enough audio yet, the output plays silence and keeps running
+    data, flag = _pull(speaker)
+    assert flag == pyaudio.paContinue and data == bytes(640)
+    stream.write(b"\x01\x00" * 300)
+    stream.end()
+    data, flag = _pull(speaker)
+    assert data == b"\x01\x00" * 320
+    data, flag = _pull(speaker)
+    assert data[:160] == b"\x01\x00" * 80 and flag == pyaudio.paComplete
+    assert stream.done.is_set()
+
+
+def test_other_format_completes_output():
+    speaker = _speaker_without_device()
+    speaker.enqueue_sound(PCMClip(_sine(0.01), 16000, 1))
+    speaker.enqueue_sound(PCMClip(_sine(0.01, 32000), 32000, 1))
+    _, flag = _pull(speaker)
+    # The output is reopened with the format of the next clip
+    assert flag == pyaudio.paComplete
+    assert not speaker.wait(timeout=0)
+    assert speaker.flush() == 1
+
+
+class _FakeOutput:
+    """
+    Pulls the callback like PortAudio, and stays active a while after `paComplete`, until its last buffer is played.
+    Like `Pa_StopStream`, stopping the stream waits for it.
+    """
+
+    def __init__(self, callback, frame_count: int, drain: float = 0.05):
+        self._callback = callback
+        self._frame_count = frame_count
+        self._drain = drain
+        self._active = False
+        self._thread: threading.Thread | None = None
+        self.drains_waited = 0
+        self.start_stream()
+
+    def _pull(self):
+        while self._callback(None, self._frame_count, None, 0)[1] == pyaudio.paContinue:
+            time.sleep(0.005)
+        time.sleep(self._drain)
+        self._active = False
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def start_stream(self):
+        self._active = True
+        self._thread = threading.Thread(target=self._pull, daemon=True)
+        self._thread.start()
+
+    def stop_stream(self):
+        if self._active:
+            self.drains_waited += 1
+        self._thread.join()
+
+    def close(self):
+        self.stop_stream()
+
+
+class _FakePyAudio:
+    def __init__(self):
+        self.opened = 0
+
+    def get_format_from_width(self, width: int) -> int:
+        return width
+
+    def open(self, rate: int, frames_per_buffer: int, stream_callback, **kwargs) -> _FakeOutput:
+        self.opened += 1
+        return _FakeOutput(stream_callback, frames_per_buffer)
+
+
+@pytest.mark.parametrize("second_rate", [16000, 32000])
+def test_reopens_after_completed_output_drains(second_rate):
+    speaker = Speaker()
+    speaker._activate = True
+    speaker._pyaudio = _FakePyAudio()
+    speaker._speaker_thread.start()
+    try:
+        first = speaker.enqueue_sound(PCMClip(_sine(0.02), 16000, 1))
+        assert first.done.wait(timeout=1)
+        # The output has completed, but is still playing its last buffer
+        time.sleep(0.01)
+        assert speaker._output.is_active()
+        first_output = speaker._output
+        second = speaker.enqueue_sound(PCMClip(_sine(0.02, second_rate), second_rate, 1))
+        assert second.done.wait(timeout=1)
+        assert speaker.wait(timeout=1)
+        # The speaker thread waited for the drain by stopping the stream, without polling it
+        assert first_output.drains_waited == 1
+    finally:
+        speaker._stop_flag = True
+        speaker._wakeup.set()
+
+
+def test_cpu_usage():
+    p = pyaudio.PyAudio()
+    try:
+        p.get_default_output_device_info()
+    except (IOError, OSError):
+        pytest.skip("No audio output device.")
+    finally:
+        p.terminate()
+    speaker = Speaker()
+    speaker.start()
+    try:
+        t = time.process_time()
+        time.sleep(1)
+        idle = time.process_time() - t
+
+        t = time.process_time()
+        speaker.playsound(PCMClip(_sine(1), 16000, 1), block=True)
+        playback = time.process_time() - t
+    finally:
+        speaker.stop()
+    print(f"CPU time of the process: {idle:.3f}s while idle, {playback:.3f}s during 1s playback")
+    # The busy wait used to take a whole core (about 1s of CPU time per second of speech)
+    assert idle < 0.05
+    assert playback < 0.2
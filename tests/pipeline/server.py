@@ -11,9 +11,9 @@ This server is just for test. But you can learn how to implement your server!
 
 
 class TestServer:
-    def __init__(self):
+    def __init__(self, port: int = 5889):
         self._host = "127.0.0.1"
-        self._port = 5889
+        self._port = port
         self._app = flask.Flask(__name__)
 
     def start(self):
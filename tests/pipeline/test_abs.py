@@ -1,60 +0,0 @@
-import time
-import uuid
-
-from zerolan.data.pipeline.llm import LLMQuery
-
-from common.concurrent.killable_thread import KillableThread
-from pipeline.server import TestServer
-from pipeline.base.base_sync import CommonModelPipeline, AbstractPipelineConfig, PipelineDisabledException
-
-base_url = "http://127.0.0.1:5889"
-
-# To test, start this first
-test_server = TestServer()
-test_server.init()
-thread = KillableThread(target=test_server.start, daemon=True)
-thread.start()
-time.sleep(2)
-
-
-class MyPipelineConfig(AbstractPipelineConfig):
-    model_id: str = "test-llm-model"
-    predict_url: str = f"{base_url}/llm/predict"
-    stream_predict_url: str = f"{base_url}/llm/stream-predict"
-
-
-def test_disabled_common_model_pipeline():
-    cfg = MyPipelineConfig(
-        enable=False,
-        model_id="test-llm-model",
-        predict_url=f"{base_url}/llm/predict",
-        stream_predict_url=f"{base_url}/llm/stream-predict",
-    )
-    try:
-        CommonModelPipeline(cfg)
-    except Exception as e:
-        assert isinstance(e, PipelineDisabledException), "Test passed"
-    else:
-        assert False, "Test failed"
-
-
-def test_common_model_pipeline_predict():
-    id = str(uuid.uuid4())
-
-    p = CommonModelPipeline(MyPipelineConfig())
-    r = p.predict(LLMQuery(id=id, text="Test", history=[]))
-    # Common model pipeline will not auto convert AbstractModelPrediction to LLMPrediction
-    assert id in r.model_dump_json()
-
-
-def test_common_model_pipeline_stream_predict():
-    id = str(uuid.uuid4())
-
-    p = CommonModelPipeline(MyPipelineConfig())
-    # Common model pipeline will not auto convert AbstractModelPrediction to LLMPrediction
-    for r in p.stream_predict(LLMQuery(id=id, text="Test", history=[])):
-        print(r)
-
-
-def test_stop_test_server():
-    thread.kill()
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from typing import List
+
+from zerolan.data.pipeline.asr import ASRPrediction, ASRStreamQuery
+
+from common.io.audio_clip import AudioClip
+from common.io.file_type import AudioFileType
+from common.utils.audio_util import from_pcm_to_wav_bytes
+from event.event_data import DeviceMicrophoneVADEvent
+from pipeline.asr.asr_async import _parse_asr_stream_query
+from pipeline.asr.config import ASRPipelineConfig
+from pipeline.asr.stream_session import ASRStreamSession
+
+
+class _FakeASR:
+    def __init__(self, stream_cumulative: bool):
+        self.supports_partial = True
+        self.stream_cumulative = stream_cumulative
+        self.queries: List[ASRStreamQuery] = []
+        self.utterance_ids: List[str | None] = []
+
+    async def stream_predict(self, query: ASRStreamQuery, utterance_id: str | None = None):
+        self.queries.append(query)
+        self.utterance_ids.append(utterance_id)
+        # One character per 100ms of audio
+        seconds = len(AudioClip.from_bytes(query.audio_data).pcm) / 32000
+        yield ASRPrediction(transcript="字" * round(seconds * 10))
+
+
+def _event(pcm: bytes, is_final: bool, utterance_id: str | None, chunk_index: int) -> DeviceMicrophoneVADEvent:
+    return DeviceMicrophoneVADEvent(speech=from_pcm_to_wav_bytes(pcm, sample_rate=16000, channels=1),
+                                    audio_type=AudioFileType.WAV, channels=1, sample_rate=16000,
+                                    is_final=is_final, utterance_id=utterance_id, chunk_index=chunk_index)
+
+
+async def _utterance(session: ASRStreamSession, chunks: List[bytes], tail: bytes, chunk_index: int | None = None):
+    partials = []
+    for i, chunk in enumerate(chunks):
+        partials.append(await session.partial(_event(chunk, False, "u1", i if chunk_index is None else chunk_index)))
+    finals = [p async for p in session.final(_event(b"".join(chunks) + tail, True, "u1", len(chunks)))]
+    return partials, finals
+
+
+def test_incremental():
+    asr = _FakeASR(stream_cumulative=False)
+    session = ASRStreamSession(asr)
+    # Two chunks of 0.6s, then 0.2s after the last chunk
+    partials, finals = asyncio.run(_utterance(session, [bytes(19200)] * 2, bytes(6400)))
+    assert [p.transcript for p in partials] == ["字" * 6, "字" * 12]
+    assert [p.transcript for p in finals] == ["字" * 14]
+    # Only the tail is recognized at the end
+    assert [q.is_final for q in asr.queries] == [False, False, True]
+    assert len(AudioClip.from_bytes(asr.queries[-1].audio_data).pcm) == 6400
+    # The model keeps the state of the stream by the utterance
+    assert asr.utterance_ids == ["u1"] * 3
+
+
+def test_cumulative():
+    asr = _FakeASR(stream_cumulative=True)
+    session = ASRStreamSession(asr)
+    partials, finals = asyncio.run(_utterance(session, [bytes(19200)] * 2, bytes(6400)))
+    assert [p.transcript for p in partials] == ["字" * 6, "字" * 12]
+    assert [p.transcript for p in finals] == ["字" * 14]
+    assert len(AudioClip.from_bytes(asr.queries[-1].audio_data).pcm) == 19200 * 2 + 6400
+
+
+def test_cumulative_by_default():
+    assert ASRPipelineConfig().stream_cumulative
+
+
+def test_stream_query_keeps_ids():
+    query = ASRStreamQuery(is_final=False, audio_data=b"audio", channels=1, sample_rate=16000, media_type="wav")
+    data = _parse_asr_stream_query(query, "u1")
+    sent = json.loads(data._fields[0][2])
+    assert sent["id"] == query.id and sent["utterance_id"] == "u1"
+
+
+def test_missing_chunk_falls_back_to_whole_utterance():
+    asr = _FakeASR(stream_cumulative=False)
+    session = ASRStreamSession(asr)
+    # Chunk 0 was dropped
+    partials, finals = asyncio.run(_utterance(session, [bytes(19200)], bytes(6400), chunk_index=1))
+    assert partials == [None]
+    assert [p.transcript for p in finals] == ["字" * 8]
+    assert len(asr.queries) == 1
@@ -0,0 +1,72 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+from zerolan.data.pipeline.llm import LLMQuery
+
+from common.concurrent.cancellation import CancellationToken, OperationCancelledError, use_token
+from common.concurrent.killable_thread import KillableThread
+from pipeline.base.base_sync import PipelineDisabledException
+from pipeline.llm.config import LLMPipelineConfig
+from pipeline.llm.llm_async import LLMAsyncPipeline
+from pipeline.llm.llm_sync import LLMSyncPipeline
+from pipeline.server import TestServer
+
+base_url = "http://127.0.0.1:5891"
+
+test_server = TestServer(port=5891)
+test_server.init()
+thread = KillableThread(target=test_server.start, daemon=True)
+thread.start()
+time.sleep(2)
+
+_config = LLMPipelineConfig(predict_url=f"{base_url}/llm/predict",
+                            stream_predict_url=f"{base_url}/llm/stream-predict")
+
+
+@pytest.mark.asyncio
+async def test_async_stream_predict():
+    id = str(uuid.uuid4())
+    llm = LLMAsyncPipeline(_config)
+    predictions = [p async for p in llm.stream_predict(LLMQuery(id=id, text="Test", history=[]))]
+    # The test server sends one prediction per HTTP chunk
+    assert len(predictions) == len("Test passed")
+    assert all(p.id == id for p in predictions)
+    assert predictions[-1].response == "Test passe"
+    await llm.close()
+
+
+@pytest.mark.asyncio
+async def test_async_concurrent_predict():
+    llm = LLMAsyncPipeline(_config)
+    ids = [str(uuid.uuid4()) for _ in range(32)]
+    predictions = await asyncio.gather(*[llm.predict(LLMQuery(id=id, text="Test", history=[])) for id in ids])
+    assert [p.id for p in predictions] == ids
+    await llm.close()
+
+
+def test_sync_facade():
+    id = str(uuid.uuid4())
+    llm = LLMSyncPipeline(_config)
+    assert llm.predict(LLMQuery(id=id, text="Test", history=[])).id == id
+    predictions = list(llm.stream_predict(LLMQuery(id=id, text="Test", history=[])))
+    assert len(predictions) == len("Test passed")
+
+
+def test_sync_facade_cancelled():
+    llm = LLMSyncPipeline(_config)
+    token = CancellationToken("test")
+    token.cancel("barge-in")
+    with use_token(token):
+        with pytest.raises(OperationCancelledError):
+            llm.predict(LLMQuery(text="Test", history=[]))
+
+
+def test_disabled_pipeline():
+    with pytest.raises(PipelineDisabledException):
+        LLMAsyncPipeline(LLMPipelineConfig(enable=False))
+
+
+def test_stop_test_server():
+    thread.kill()
@@ -0,0 +1,117 @@
+import asyncio
+import http.server
+import threading
+
+import pytest
+from zerolan.data.pipeline.tts import TTSQuery
+
+from pipeline.base.cache import ResponseCache, ResponseCacheConfig
+from pipeline.tts.config import TTSPipelineConfig
+from pipeline.tts.tts_async import TTSAsyncPipeline
+
+
+def _start_tts_server():
+    served = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            served.append(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            body = b"RIFF" + len(served).to_bytes(4, "little")
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", served
+
+
+def test_memory_lru(tmp_path):
+    cache = ResponseCache("test", ResponseCacheConfig(memory_items=2, disk_max_mb=0))
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+    # "b" is the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+    assert cache.stats.summary()["memory_hits"] == 3
+    assert cache.stats.summary()["misses"] == 1
+
+
+def test_disk_tier(tmp_path):
+    config = ResponseCacheConfig(memory_items=0, disk_max_mb=2 / 1024, disk_dir=str(tmp_path))
+    cache = ResponseCache("test", config)
+    cache.put("a" * 64, b"x" * 1024)
+    cache.put("b" * 64, b"y" * 1024)
+    assert cache.get("a" * 64) == b"x" * 1024
+    cache.put("c" * 64, b"z" * 1024)
+    assert cache.stats.disk_evictions == 1
+    assert cache.get("b" * 64) is None
+
+    # The disk tier survives restarts
+    cache = ResponseCache("test", config)
+    assert cache.get("a" * 64) == b"x" * 1024
+    assert cache.get("c" * 64) == b"z" * 1024
+    assert cache.stats.summary()["disk_hits"] == 2
+
+
+def test_disk_tier_opt_in(tmp_path):
+    cache = ResponseCache("test", ResponseCacheConfig(disk_dir=str(tmp_path)))
+    cache.put("a" * 64, b"x")
+    assert not tmp_path.joinpath("test").exists()
+
+
+@pytest.mark.asyncio
+async def test_key_off_event_loop():
+    cache = ResponseCache("test", ResponseCacheConfig())
+    threads = []
+
+    def key() -> str:
+        threads.append(threading.current_thread())
+        return "a" * 64
+
+    async def predict() -> bytes:
+        await asyncio.sleep(0)
+        return b"1"
+
+    for _ in range(2):
+        assert await cache.get_or_predict(key, predict, dump=lambda v: v, load=lambda v: v) == b"1"
+    # The key may hash a whole file, it is never computed in the thread of the event loop
+    assert threading.main_thread() not in threads
+    assert cache.stats.summary()["memory_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_tts_cache(tmp_path):
+    url, served = _start_tts_server()
+    refer_wav = tmp_path.joinpath("refer.wav")
+    refer_wav.write_bytes(b"reference")
+    config = TTSPipelineConfig(predict_url=f"{url}/tts/predict",
+                               cache=ResponseCacheConfig(disk_max_mb=8, disk_dir=str(tmp_path.joinpath("cache"))))
+    tts = TTSAsyncPipeline(config)
+
+    def query(text: str) -> TTSQuery:
+        return TTSQuery(text=text, text_language="zh", refer_wav_path=str(refer_wav),
+                        prompt_text="Prompt", prompt_language="zh", audio_type="wav")
+
+    first = await tts.predict(query("Hello"))
+    second = await tts.predict(query("Hello"))
+    assert first.wave_data == second.wave_data
+    assert len(served) == 1
+
+    await tts.predict(query("World"))
+    assert len(served) == 2
+
+    # Same path, different reference audio
+    refer_wav.write_bytes(b"another reference")
+    await tts.predict(query("Hello"))
+    assert len(served) == 3
+    assert tts.cache.stats.summary()["hit_rate"] == 0.25
+    await tts.close()
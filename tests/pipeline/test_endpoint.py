@@ -0,0 +1,115 @@
+import asyncio
+import http.server
+import socket
+import threading
+import time
+
+import aiohttp
+import pytest
+
+from pipeline.base.base_async import get_base_url
+from pipeline.base.endpoint import EndpointPool, EndpointPoolConfig, CircuitState
+
+
+def _start_replica(delay: float = 0., status: int = 200):
+    served = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            served.append(time.time())
+            time.sleep(delay)
+            body = b'{"response": "Test passed"}'
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", served
+
+
+def _unused_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+async def _send(session: aiohttp.ClientSession, url: str):
+    async with session.post(url, json={"text": "Test"}) as resp:
+        resp.raise_for_status()
+        return (await resp.json(content_type=None))["response"]
+
+
+@pytest.mark.parametrize("url, base_url", [
+    ("https://tts.example.com/tts/predict", "https://tts.example.com"),
+    ("http://127.0.0.1:9880/tts/predict?lang=zh", "http://127.0.0.1:9880"),
+])
+def test_url_without_port(url, base_url):
+    assert get_base_url(url) == base_url
+    pool = EndpointPool.from_config(url, None)
+    assert [e.base_url for e in pool.endpoints] == [base_url]
+    # The request is sent to the URL as written
+    assert EndpointPool.resolve(url, pool.endpoints[0]) == url
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding():
+    (url_a, served_a), (url_b, served_b) = _start_replica(0.05), _start_replica(0.05)
+    pool = EndpointPool([url_a + "/tts/predict", url_b])
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(*[pool.request(url_a + "/tts/predict", lambda u: _send(session, u))
+                                         for _ in range(20)])
+    assert results == ["Test passed"] * 20
+    assert len(served_a) == len(served_b) == 10
+    assert all(e.outstanding == 0 for e in pool.endpoints)
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker():
+    url, served = _start_replica()
+    dead_url = _unused_url()
+    pool = EndpointPool([dead_url, url], EndpointPoolConfig(failure_threshold=2, reset_timeout=60, probe_interval=0))
+    async with aiohttp.ClientSession() as session:
+        for _ in range(6):
+            # Requests to the dead replica fail over to the other one
+            assert await pool.request(dead_url + "/llm/predict", lambda u: _send(session, u)) == "Test passed"
+    dead, alive = pool.endpoints
+    assert dead.state == CircuitState.Open
+    assert dead.failures == 2
+    assert alive.state == CircuitState.Closed and len(served) == 6
+
+
+@pytest.mark.asyncio
+async def test_server_error_opens_circuit():
+    url, _ = _start_replica(status=500)
+    pool = EndpointPool([url], EndpointPoolConfig(failure_threshold=1, reset_timeout=60, probe_interval=0))
+    async with aiohttp.ClientSession() as session:
+        with pytest.raises(aiohttp.ClientResponseError):
+            await pool.request(url + "/ocr/predict", lambda u: _send(session, u))
+    assert pool.endpoints[0].state == CircuitState.Open
+    assert pool.acquire() is None
+
+
+@pytest.mark.asyncio
+async def test_hedging():
+    (slow_url, _), (fast_url, _) = _start_replica(1.), _start_replica(0.)
+    pool = EndpointPool([slow_url, fast_url], EndpointPoolConfig(hedge=True, hedge_min_samples=10))
+    for _ in range(10):
+        endpoint = pool.acquire()
+        pool.release(endpoint, latency=0.05)
+    async with aiohttp.ClientSession() as session:
+        t_start = time.perf_counter()
+        results = await asyncio.gather(*[pool.request(slow_url + "/llm/predict", lambda u: _send(session, u))
+                                         for _ in range(4)])
+        elapsed = time.perf_counter() - t_start
+    assert results == ["Test passed"] * 4
+    # The requests sent to the slow replica are answered by the fast one after about 0.05 s
+    assert pool.hedges == 2
+    assert elapsed < 0.5
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from pipeline.base.framing import FrameDecoder, FrameFormat, FramingError, aiter_frames, frame_format_of, iter_frames
+
+_DOCS = [{"id": "1", "response": "Hello {world} [\"quoted\"] \\"},
+         {"id": "2", "response": "你好，世界", "history": [{"role": "user", "content": "}]"}]},
+         {"id": "3", "response": ""}]
+
+
+def _split_everywhere(body: bytes):
+    # Every split of the body into two chunks, plus one byte at a time
+    for i in range(len(body) + 1):
+        yield [body[:i], body[i:]]
+    yield [body[i:i + 1] for i in range(len(body))]
+
+
+def _decode(chunks, fmt):
+    return [json.loads(frame) for frame in iter_frames(chunks, fmt)]
+
+
+def test_json_frames():
+    body = "".join(json.dumps(doc, ensure_ascii=False) for doc in _DOCS).encode("utf-8")
+    for chunks in _split_everywhere(body):
+        assert _decode(chunks, FrameFormat.JSON) == _DOCS
+
+
+def test_ndjson_frames():
+    body = "".join(json.dumps(doc, ensure_ascii=False) + "\r\n" for doc in _DOCS).encode("utf-8")
+    for chunks in _split_everywhere(body):
+        assert _decode(chunks, FrameFormat.NDJSON) == _DOCS
+    # The last line may end without a newline
+    assert _decode([body.rstrip()], FrameFormat.NDJSON) == _DOCS
+
+
+def test_length_prefixed_frames():
+    body = b""
+    for doc in _DOCS:
+        frame = json.dumps(doc).encode("utf-8")
+        body += len(frame).to_bytes(4, "big") + frame
+    for chunks in _split_everywhere(body):
+        assert _decode(chunks, FrameFormat.LengthPrefixed) == _DOCS
+
+
+def test_frames_are_yielded_as_soon_as_complete():
+    decoder = FrameDecoder(FrameFormat.JSON)
+    assert decoder.feed(b'{"id": "1"}{"id"') == [b'{"id": "1"}']
+    assert decoder.feed(b': "2"}') == [b'{"id": "2"}']
+    assert decoder.close() == []
+
+
+def test_truncated_stream():
+    decoder = FrameDecoder(FrameFormat.JSON)
+    decoder.feed(b'{"id": "1"')
+    with pytest.raises(FramingError):
+        decoder.close()
+    with pytest.raises(FramingError):
+        FrameDecoder(FrameFormat.JSON).feed(b"Internal Server Error")
+
+
+def test_frame_format_of():
+    assert frame_format_of("application/x-ndjson; charset=utf-8") == FrameFormat.NDJSON
+    assert frame_format_of("application/x-length-prefixed") == FrameFormat.LengthPrefixed
+    assert frame_format_of("text/html; charset=utf-8") == FrameFormat.JSON
+    assert frame_format_of(None) == FrameFormat.JSON
+
+
+@pytest.mark.asyncio
+async def test_aiter_frames():
+    async def chunks():
+        yield b'{"id": "1"}\n{"id":'
+        yield b' "2"}\n'
+
+    assert [frame async for frame in aiter_frames(chunks(), FrameFormat.NDJSON)] == [b'{"id": "1"}', b'{"id": "2"}']
@@ -0,0 +1,50 @@
+import asyncio
+import http.server
+import threading
+
+from pipeline.base.transport import AsyncHttpTransport
+
+
+class _KeepAliveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"response": "Test passed"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connection_reuse():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/llm/predict"
+    transport = AsyncHttpTransport(pool_maxsize=2)
+
+    async def run():
+        try:
+            for i in range(5):
+                async with transport.session().post(url, json={"text": str(i)}) as resp:
+                    assert (await resp.json())["response"] == "Test passed"
+            for i in range(5):
+                async with transport.session().post(url, json={"text": str(i)}) as resp:
+                    body = b"".join([chunk async for chunk in resp.content.iter_chunked(4)])
+                    assert body == b'{"response": "Test passed"}'
+        finally:
+            await transport.close()
+
+    try:
+        asyncio.run(run())
+        stat = transport.stats.summary()[f"127.0.0.1:{server.server_port}"]
+        assert stat["requests"] == 10
+        # Only the first request opens a connection
+        assert stat["new_connections"] == 1
+        assert stat["reused"] == 9
+    finally:
+        server.shutdown()
@@ -0,0 +1,29 @@
+import time
+
+from services.live2d.frame_scheduler import FrameScheduler
+
+
+def test_idle_and_active_rate():
+    scheduler = FrameScheduler(max_fps=100, idle_fps=20, linger_ms=50)
+    assert not scheduler.active
+    assert scheduler.interval_ms() == 50
+    scheduler.wake()
+    assert scheduler.active
+    assert scheduler.interval_ms() == 10
+    time.sleep(0.06)
+    # Back to the idle rate once the activity is over
+    assert scheduler.interval_ms() == 50
+
+
+def test_summary():
+    scheduler = FrameScheduler(window=10, report_interval=0)
+    assert scheduler.summary()["frames"] == 0
+    for i in range(20):
+        scheduler.record((i + 1) / 1000)
+    scheduler.wake()
+    scheduler.record(0.001)
+    summary = scheduler.summary()
+    assert summary["frames"] == 21 and summary["active_frames"] == 1
+    # Only the last 10 frames are kept
+    assert summary["max_ms"] == 20
+    assert 1 < summary["mean_ms"] < 20
@@ -1,4 +1,5 @@
 import asyncio
+import threading
 import time
 from asyncio import TaskGroup
 from dataclasses import dataclass
@@ -66,3 +67,309 @@ async def test_event_emitter():
         emitter.emit(ConnTest(content="Ciallo"))
         await asyncio.sleep(1)
         await emitter.stop()
+
+
+class DispatchTestEvent(BaseEvent):
+    content: str
+    type: str = "test.dispatch"
+
+
+@pytest.mark.asyncio
+async def test_direct_dispatch():
+    from event.event_emitter import TypedEventEmitter, DispatchMode
+
+    direct_emitter = TypedEventEmitter(mode=DispatchMode.DIRECT)
+    received = []
+    inline_threads = []
+
+    @direct_emitter.on("test.dispatch")
+    def on_dispatch(event: DispatchTestEvent):
+        received.append(event.content)
+
+    @direct_emitter.on("test.dispatch", inline=True)
+    def on_dispatch_inline(event: DispatchTestEvent):
+        inline_threads.append(threading.get_ident())
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(direct_emitter.start())
+        await asyncio.sleep(0.1)
+        for i in range(10):
+            direct_emitter.emit(DispatchTestEvent(content=str(i)))
+        await asyncio.sleep(0.5)
+        await direct_emitter.stop()
+
+    assert sorted(received) == [str(i) for i in range(10)]
+    # Inline listeners run in the emitting thread
+    assert inline_threads == [threading.get_ident()] * 10
+    summary = direct_emitter.stats.summary()["test.dispatch"]
+    assert summary["count"] == 20
+    print(summary)
+
+
+class HighPriorityTestEvent(BaseEvent):
+    type: str = "test.dispatch.high"
+
+
+@pytest.mark.asyncio
+async def test_overload_shedding():
+    from event.config import EmitterConfig, OverflowPolicy
+    from event.event_emitter import TypedEventEmitter, EventPolicy
+
+    bounded_emitter = TypedEventEmitter()
+    bounded_emitter.configure(EmitterConfig(max_workers=1))
+    bounded_emitter.set_policy("test.dispatch", EventPolicy(max_pending=3, priority=0,
+                                                            overflow=OverflowPolicy.DropOldest))
+    bounded_emitter.set_policy("test.dispatch.high", EventPolicy(priority=5))
+    order = []
+
+    @bounded_emitter.on("test.dispatch")
+    def on_low(event: DispatchTestEvent):
+        time.sleep(0.05)
+        order.append(event.content)
+
+    @bounded_emitter.on("test.dispatch.high")
+    def on_high(_):
+        order.append("high")
+
+    def produce():
+        for i in range(10):
+            bounded_emitter.emit(DispatchTestEvent(content=str(i)))
+        bounded_emitter.emit(HighPriorityTestEvent())
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(bounded_emitter.start())
+        await asyncio.sleep(0.1)
+        await asyncio.to_thread(produce)
+        await asyncio.sleep(0.5)
+        await bounded_emitter.stop()
+
+    # The first task is running, the high priority one jumps the queue, and only the 3 newest are kept
+    assert order == ["0", "high", "7", "8", "9"]
+    assert bounded_emitter.stats.summary()["test.dispatch"]["dropped"] == 6
+
+
+class LaneTestEvent(BaseEvent):
+    content: str
+    type: str = "test.lane"
+
+
+@pytest.mark.asyncio
+async def test_lane_serialization():
+    from event.config import EmitterConfig
+    from event.event_emitter import TypedEventEmitter
+
+    lane_emitter = TypedEventEmitter()
+    lane_emitter.configure(EmitterConfig(max_workers=4))
+    lock = threading.Lock()
+    running = {"chat": 0, "max": 0}
+    chat_order = []
+    other = []
+
+    @lane_emitter.on("test.lane", lane="chat")
+    def on_chat(event: LaneTestEvent):
+        with lock:
+            running["chat"] += 1
+            running["max"] = max(running["max"], running["chat"])
+        time.sleep(0.02)
+        chat_order.append(event.content)
+        with lock:
+            running["chat"] -= 1
+
+    @lane_emitter.on("test.dispatch", lane=lambda event: "chat" if event.content == "shared" else None)
+    def on_other(event: DispatchTestEvent):
+        time.sleep(0.02)
+        other.append(event.content)
+        if event.content == "shared":
+            chat_order.append(event.content)
+
+    def produce():
+        for i in range(5):
+            lane_emitter.emit(LaneTestEvent(content=str(i)))
+            lane_emitter.emit(DispatchTestEvent(content="free"))
+        lane_emitter.emit(DispatchTestEvent(content="shared"))
+        lane_emitter.emit(LaneTestEvent(content="5"))
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(lane_emitter.start())
+        await asyncio.sleep(0.1)
+        await asyncio.to_thread(produce)
+        await asyncio.sleep(0.5)
+        await lane_emitter.stop()
+
+    # Tasks in the same lane run one at a time in emission order, even across event types
+    assert running["max"] == 1
+    assert chat_order == ["0", "1", "2", "3", "4", "shared", "5"]
+    assert other.count("free") == 5
+
+
+class ChainTestEvent(BaseEvent):
+    content: str
+    type: str = "test.chain"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_chain():
+    from common.concurrent.cancellation import CancellationScope, current_token, use_token
+    from event.config import EmitterConfig
+    from event.event_emitter import TypedEventEmitter
+
+    chain_emitter = TypedEventEmitter()
+    chain_emitter.configure(EmitterConfig(max_workers=1))
+    scope = CancellationScope("test")
+    handled = []
+    tokens = []
+    cancelled = []
+
+    @chain_emitter.on("test.chain")
+    def on_chain(event: ChainTestEvent):
+        # The token of the emitting thread follows the event
+        tokens.append(current_token())
+        time.sleep(0.05)
+        handled.append(event.content)
+
+    @chain_emitter.on("test.dispatch")
+    async def on_async(_):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    def produce():
+        with use_token(scope.supersede()):
+            for i in range(3):
+                chain_emitter.emit(ChainTestEvent(content=str(i)))
+            chain_emitter.emit(DispatchTestEvent(content="slow"))
+        time.sleep(0.02)
+        # A new chain cancels the pending and running tasks of the previous one
+        with use_token(scope.supersede()):
+            chain_emitter.emit(ChainTestEvent(content="new"))
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(chain_emitter.start())
+        await asyncio.sleep(0.1)
+        await asyncio.to_thread(produce)
+        await asyncio.sleep(0.3)
+        await chain_emitter.stop()
+
+    assert handled == ["0", "new"]
+    assert tokens[-1] is scope.token
+    assert cancelled == [True]
+    assert chain_emitter.stats.summary()["test.chain"]["cancelled"] == 2
+
+
+class PayloadTestEvent(BaseEvent):
+    speech: bytes
+    channels: int
+    sample_rate: int
+    type: str = "test.payload"
+
+
+def test_emit_throughput():
+    from loguru import logger
+    from typeguard import typechecked
+    from event.event_emitter import TypedEventEmitter
+
+    bench_emitter = TypedEventEmitter()
+
+    @bench_emitter.on("test.payload", inline=True)
+    def on_payload(_):
+        pass
+
+    speech = b"\x00" * 32000 * 3
+    n = 20000
+
+    def rate(func) -> float:
+        t_start = time.perf_counter()
+        for _ in range(n):
+            func()
+        return n / (time.perf_counter() - t_start)
+
+    event = PayloadTestEvent(speech=speech, channels=1, sample_rate=16000)
+    # The emit path before it dropped `@typechecked`
+    checked_emit = typechecked(TypedEventEmitter.emit)
+    logger.disable("event.event_emitter")
+    try:
+        validated = rate(lambda: PayloadTestEvent(speech=speech, channels=1, sample_rate=16000))
+        constructed = rate(lambda: PayloadTestEvent.model_construct(speech=speech, channels=1, sample_rate=16000))
+        emit_checked = rate(lambda: checked_emit(bench_emitter, event))
+        emit = rate(lambda: bench_emitter.emit(event))
+    finally:
+        logger.enable("event.event_emitter")
+
+    print(f"\nEvent validated: {validated:.0f}/s, constructed: {constructed:.0f}/s")
+    print(f"Emit with typeguard: {emit_checked:.0f}/s, emit: {emit:.0f}/s")
+    assert bench_emitter.stats.summary()["test.payload"]["count"] == 2 * n
+
+
+class BlockTestEvent(BaseEvent):
+    content: str
+    type: str = "test.block"
+
+
+@pytest.mark.asyncio
+async def test_block_from_worker_does_not_deadlock():
+    from event.config import EmitterConfig, OverflowPolicy
+    from event.event_emitter import TypedEventEmitter, EventPolicy
+
+    bounded_emitter = TypedEventEmitter()
+    bounded_emitter.configure(EmitterConfig(max_workers=1))
+    bounded_emitter.set_policy("test.block", EventPolicy(max_pending=1, overflow=OverflowPolicy.Block))
+    received = []
+
+    @bounded_emitter.on("test.block")
+    def on_block(event: BlockTestEvent):
+        received.append(event.content)
+        if event.content == "first":
+            # The only worker emits into its own full queue, it must not wait for itself
+            for i in range(3):
+                bounded_emitter.emit(BlockTestEvent(content=str(i)))
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(bounded_emitter.start())
+        await asyncio.sleep(0.1)
+        await asyncio.to_thread(bounded_emitter.emit, BlockTestEvent(content="first"))
+        await asyncio.sleep(0.5)
+        await bounded_emitter.stop()
+
+    # The queue holds one task, the older ones are dropped instead of blocking the worker
+    assert received == ["first", "2"]
+    assert bounded_emitter.stats.summary()["test.block"]["dropped"] == 2
+
+
+def test_clear_wakes_blocked_producers():
+    from event.config import OverflowPolicy
+    from event.event_emitter import PendingTasks, DispatchStats, EventPolicy
+
+    class _Task:
+        def __init__(self, name: str, lane: str | None = None):
+            self.name = name
+            self.event_type = "test.block"
+            self.target = None
+            self.lane = lane
+            self.created_at = time.time()
+
+    cond = threading.Condition()
+    pending = PendingTasks(DispatchStats(), cond)
+    pending.set_policy("test.block", EventPolicy(max_pending=1, overflow=OverflowPolicy.Block))
+    with cond:
+        pending.put(_Task("running", lane="lane"))
+        pending.pop()
+        pending.put(_Task("waiting"))
+    put = threading.Event()
+
+    def produce():
+        with cond:
+            pending.put(_Task("blocked"), can_block=True)
+        put.set()
+
+    threading.Thread(target=produce, daemon=True).start()
+    assert not put.wait(0.1)
+    with cond:
+        pending.clear()
+    assert put.wait(1)
+    with cond:
+        # The blocked task is in the new queue, and the lane of the task running before is free again
+        assert len(pending) == 1 and pending.pop().name == "blocked"
+        pending.put(_Task("next", lane="lane"))
+        assert pending.pop().name == "next"
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+from zerolan.data.data.danmaku import Danmaku
+
+from common.io.file_type import AudioFileType
+from event.event_data import DeviceMicrophoneVADEvent, LiveStreamDanmakuEvent
+from event.event_emitter import TypedEventEmitter
+from event.recorder import EventRecorder, read_events, read_records
+from event.registry import EventKeyRegistry
+from event.replay import EventReplayer, percentile
+
+
+def _record(path) -> TypedEventEmitter:
+    recording_emitter = TypedEventEmitter()
+    recorder = EventRecorder(path)
+    recording_emitter.set_recorder(recorder)
+    recording_emitter.emit(DeviceMicrophoneVADEvent(speech=b"\x00\xff" * 8, audio_type=AudioFileType.WAV,
+                                                    channels=1, sample_rate=16000))
+    for i in range(3):
+        time.sleep(0.05)
+        recording_emitter.emit(LiveStreamDanmakuEvent(platform="bilibili",
+                                                      danmaku=Danmaku(uid="1", username="test", content=str(i),
+                                                                      ts=0)))
+    recorder.close()
+    return recording_emitter
+
+
+def test_recording_round_trip(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    _record(path)
+
+    events = list(read_events(path))
+    assert [recorded.event.type for recorded in events] == [EventKeyRegistry.Device.MICROPHONE_VAD] + \
+           [EventKeyRegistry.LiveStream.DANMAKU] * 3
+    # Bytes survive the JSON encoding
+    assert events[0].event.speech == b"\x00\xff" * 8
+    assert [recorded.event.danmaku.content for recorded in events[1:]] == ["0", "1", "2"]
+    assert events[-1].t - events[1].t >= 0.1
+
+    # Appending a second session keeps the timeline increasing
+    _record(path)
+    events = list(read_events(path))
+    assert len(events) == 8
+    assert all(a.t <= b.t for a, b in zip(events, events[1:]))
+    assert sum(1 for record in read_records(path) if record["kind"] == "header") == 2
+
+
+def test_percentile():
+    samples = [float(i) for i in range(1, 101)]
+    assert percentile(samples, 50) == 50.
+    assert percentile(samples, 95) == 95.
+    assert percentile([], 95) == 0.
+
+
+@pytest.mark.asyncio
+async def test_replay_speed(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    _record(path)
+    replay_emitter = TypedEventEmitter()
+    handled = []
+
+    @replay_emitter.on(EventKeyRegistry.LiveStream.DANMAKU)
+    def on_danmaku(event: LiveStreamDanmakuEvent):
+        handled.append(event.danmaku.content)
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(replay_emitter.start())
+        replayer = EventReplayer(read_events(path), speed=0, target=replay_emitter)
+        t_start = time.perf_counter()
+        report = await replayer.replay(quiet=0.2)
+        elapsed = time.perf_counter() - t_start
+        await replay_emitter.stop()
+
+    assert sorted(handled) == ["0", "1", "2"]
+    # At max speed, the recorded gaps (0.1 s at least) are skipped
+    assert elapsed < 0.1 + 0.2 + 0.2
+    assert report["total"]["events"] == 4
+    assert report[EventKeyRegistry.LiveStream.DANMAKU]["count"] == 3
@@ -0,0 +1,34 @@
+import time
+
+from agent.intent_router import IntentRouter
+
+# Names and descriptions of the tools of `CustomAgent`
+_TOOLS = [("百度百科", "当你需要搜索某个专业的知识点、概念的时候，使用此工具。"),
+          ("萌娘百科", "当你需要搜索二次元人物、游戏、漫画等资料时，使用此工具。"),
+          ("语言切换", "当用户需要切换语言时，使用此工具"),
+          ("麦克风控制器", "当用户要求打开或关闭麦克风时，使用此工具"),
+          ("游戏对象创建器", "当用户要求你创建一个游戏对象（例如立方体、球体）的时候，使用此工具。")]
+
+
+def test_route():
+    router = IntentRouter(_TOOLS)
+    assert router.route("帮我把麦克风关掉") == ["麦克风控制器"]
+    assert router.route("我们说英语吧") == ["语言切换"]
+    assert router.route("Please switch to English") == ["语言切换"]
+    assert router.route("量子纠缠是什么") == ["百度百科"]
+    assert router.route("给我创建一个立方体") == ["游戏对象创建器"]
+    assert "萌娘百科" in router.route("搜索一下这个二次元人物")
+
+
+def test_chat_needs_no_tool():
+    router = IntentRouter(_TOOLS)
+    for query in ["你好呀，今天过得怎么样？", "你喜欢玩游戏吗", "晚上吃什么好呢", "Good morning!"]:
+        assert router.route(query) == [], query
+
+
+def test_speed():
+    router = IntentRouter(_TOOLS)
+    start = time.perf_counter()
+    for _ in range(1000):
+        router.route("你好呀，今天过得怎么样？我们来聊聊天吧")
+    assert (time.perf_counter() - start) / 1000 < 1e-3
@@ -0,0 +1,37 @@
+from zerolan.data.pipeline.llm import Conversation, RoleEnum
+
+from character.config import ChatConfig
+from manager.llm_prompt_manager import LLMPromptManager
+
+
+def _round(text: str, response: str):
+    return [Conversation(role=RoleEnum.user, content=text), Conversation(role=RoleEnum.assistant, content=response)]
+
+
+def test_forget_round():
+    manager = LLMPromptManager(ChatConfig(system_prompt="system", injected_history=[], max_history=20))
+    history = manager.current_history + _round("a", "1") + _round("b", "2")
+    manager.reset_history(history)
+    # The decision comes after another round has been added
+    manager.reset_history(manager.current_history + _round("c", "3"))
+    assert manager.forget_round("b", "2")
+    assert [c.content for c in manager.current_history] == ["system", "a", "1", "c", "3"]
+    assert not manager.forget_round("b", "2")
+
+
+def test_forget_round_with_leading_line_break():
+    manager = LLMPromptManager(ChatConfig(system_prompt="system", injected_history=[], max_history=20))
+    # The history keeps the raw response, the bot has stripped its leading line break
+    manager.reset_history(manager.current_history + _round("a", "\n1"))
+    assert manager.forget_round("a", "1")
+    assert [c.content for c in manager.current_history] == ["system"]
+
+
+def test_forgotten_round_not_restored_by_stale_history():
+    manager = LLMPromptManager(ChatConfig(system_prompt="system", injected_history=[], max_history=20))
+    manager.reset_history(manager.current_history + _round("a", "1"))
+    # A newer reply is in flight, with the history of before the forget
+    stale = manager.current_history + _round("b", "2")
+    assert manager.forget_round("a", "1")
+    manager.reset_history(stale)
+    assert [c.content for c in manager.current_history] == ["system", "b", "2"]
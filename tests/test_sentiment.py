@@ -0,0 +1,47 @@
+import time
+
+from agent.sentiment import SentimentClassifier, log_label
+
+_LABELS = ["Default", "开心", "难过", "生气", "惊讶"]
+
+
+def test_lexicon():
+    classifier = SentimentClassifier(_LABELS)
+    assert classifier.predict("太好了，我们赢了！哈哈")[0] == "开心"
+    assert classifier.predict("呜呜，对不起")[0] == "难过"
+    assert classifier.predict("什么？你居然来了？！")[0] == "惊讶"
+    assert classifier.predict("I am so happy 🎉")[0] == "开心"
+    # Nothing found, the neutral label wins but the classifier is not confident
+    label, confidence = classifier.predict("今天的天气是晴天。")
+    assert label == "Default" and confidence < 0.5
+
+
+def test_english_words_are_not_matched_inside_others():
+    classifier = SentimentClassifier(["Default", "disgust"])
+    assert classifier.predict("This is new.")[0] == "Default"
+    assert classifier.predict("Ew, gross.")[0] == "disgust"
+
+
+def test_labels_without_lexicon():
+    classifier = SentimentClassifier(["[happy]", "傲娇"])
+    assert classifier.predict("哼，我才不是傲娇呢")[0] == "傲娇"
+
+
+def test_calibration(tmp_path):
+    path = tmp_path.joinpath("labels.jsonl")
+    for _ in range(3):
+        log_label(path, "主人又来摸鱼了", "生气")
+    classifier = SentimentClassifier(_LABELS)
+    assert classifier.predict("主人摸鱼")[0] == "Default"
+    assert classifier.calibrate(path) == 3
+    assert classifier.predict("主人摸鱼")[0] == "生气"
+
+
+def test_speed():
+    classifier = SentimentClassifier(_LABELS)
+    text = "哇，今天真的好开心呀，谢谢大家来看我的直播！"
+    start = time.perf_counter()
+    for _ in range(1000):
+        classifier.predict(text)
+    # Microseconds, instead of an LLM round trip
+    assert (time.perf_counter() - start) / 1000 < 1e-3
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+import manager.tts_prompt_manager as tts_prompt_manager
+from character.config import SpeechConfig
+from common.enumerator import Language
+from manager.tts_prompt_manager import TTSPromptManager
+
+
+def _touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+
+
+@pytest.fixture
+def prompts_dir(tmp_path):
+    prompts_dir = tmp_path.joinpath("prompts")
+    _touch(prompts_dir.joinpath("[zh][Default]大家好.wav"))
+    _touch(prompts_dir.joinpath("[zh][开心]太好了！.wav"))
+    _touch(prompts_dir.joinpath("en", "[en][happy] Wow.wav"))
+    _touch(prompts_dir.joinpath("readme.txt"))
+    return prompts_dir
+
+
+def test_index(prompts_dir, tmp_path):
+    manager = TTSPromptManager(SpeechConfig(prompts_dir=str(prompts_dir)), tmp_path.joinpath("index.json"))
+    assert sorted(manager.sentiments) == ["Default", "开心"]
+    assert manager.get_tts_prompt("开心").prompt_text == "太好了！"
+    assert manager.get_tts_prompt("悲伤") is manager.default_tts_prompt
+
+    manager.set_lang(Language.EN)
+    assert manager.sentiments == ["happy"]
+    # No `Default` prompt, the first one is the fallback
+    assert manager.get_tts_prompt("sad").prompt_text == " Wow"
+
+
+def test_persisted_index(prompts_dir, tmp_path, monkeypatch):
+    index_path = tmp_path.joinpath("index.json")
+    TTSPromptManager(SpeechConfig(prompts_dir=str(prompts_dir)), index_path)
+
+    def walk(_):
+        pytest.fail("The prompts directory is walked again")
+
+    with monkeypatch.context() as m:
+        m.setattr(tts_prompt_manager, "_get_all_files", walk)
+        manager = TTSPromptManager(SpeechConfig(prompts_dir=str(prompts_dir)), index_path)
+        assert sorted(manager.sentiments) == ["Default", "开心"]
+
+    # A new file changes the mtime of its directory, the index is rebuilt
+    new_file = prompts_dir.joinpath("en", "[en][sad] Oh no.wav")
+    _touch(new_file)
+    os.utime(new_file.parent, ns=(0, 0))
+    manager = TTSPromptManager(SpeechConfig(prompts_dir=str(prompts_dir)), index_path)
+    manager.set_lang(Language.EN)
+    assert sorted(manager.sentiments) == ["happy", "sad"]